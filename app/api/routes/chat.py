@@ -1,21 +1,25 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Optional, List
 from pydantic import BaseModel
-from app.services.claude_service import claude_service
-from app.services.pdf_service import pdf_service
-from app.services.telecom_bill_processor import bill_processor, query_processor
+from app.core.container import container
+from app.services.claude_service import ClaudeService
+from app.services.pdf_service import PDFService
+from app.services.pdf_content.hebrew import render_rtl
+from app.services.telecom_bill_processor import TelecomBillProcessor
 import logging
 from dataclasses import asdict
-from app.services.chat_history.service import chat_history_service
+from app.services.chat_history.service import InvalidCursorError, chat_history_service
 from app.services.chat_history.models import ChatMessage
+from app.services.chat_history.writer import chat_history_writer
 from uuid import UUID
 from app.core.database import db
 from datetime import datetime
 import json
 import hashlib
-from app.core.redis import redis_client
+from app.core.redis import RedisClient
 import aioredis
 from app.services.monitoring.metrics_service import metrics_service, RateLimitMetrics
+from app.services.monitoring.registry import metrics
 
 
 
@@ -23,6 +27,26 @@ from app.services.monitoring.metrics_service import metrics_service, RateLimitMe
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+CHAT_STAGE_LATENCY = metrics.histogram(
+    "chat_stage_duration_seconds",
+    "Time spent in each /chat stage",
+    ["stage"]
+)
+CHAT_CACHE_LOOKUPS = metrics.counter(
+    "chat_response_cache_lookups_total",
+    "Response cache lookups by result",
+    ["result"]
+)
+CHAT_RATE_LIMITED = metrics.counter(
+    "chat_rate_limited_total",
+    "/chat requests rejected with 429"
+)
+
+PDF_ID_BY_PATH = db.named_query(
+    "pdf_id_by_path",
+    "SELECT id FROM telecom.pdf_documents WHERE path = $1 LIMIT 1"
+)
+
 
 
 class Message(BaseModel):
@@ -36,6 +60,8 @@ class ChatRequest(BaseModel):
     customerId: str
     context: Optional[List[Message]] = []
     pdf_path: Optional[str] = None
+    # Wrap Hebrew runs in the reply as [text]{dir="rtl"} for display
+    rtl_markup: bool = False
 
 class ChatResponse(BaseModel):
     response: str
@@ -44,14 +70,28 @@ class ChatResponse(BaseModel):
     bill_data: Optional[dict] = None
 
 @router.get("/chat/history/{customer_id}")
-async def get_chat_history(customer_id: str, days: int = 30):
-    """Get chat history for a customer"""
+async def get_chat_history(
+    customer_id: str,
+    days: int = 30,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_count: bool = False
+):
+    """Get chat history for a customer, paged with next_cursor"""
     try:
-        messages = await chat_history_service.get_customer_history(customer_id, days)
+        messages = await chat_history_service.get_customer_history(
+            customer_id,
+            days,
+            limit=limit,
+            cursor=cursor,
+            include_count=include_count
+        )
         return {
             "status": "success",
             "messages": messages
         }
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -72,13 +112,7 @@ async def get_pdf_id(path: str, db) -> Optional[UUID]:
 async def get_pdf_id_from_path(file_path: str) -> Optional[UUID]:
     """Get or create PDF document ID from file path"""
     try:
-        query = """
-            SELECT id 
-            FROM telecom.pdf_documents 
-            WHERE path = $1 
-            LIMIT 1
-        """
-        result = await db.fetch_one(query, file_path)
+        result = await db.fetch_one(PDF_ID_BY_PATH, file_path, record=True, replica=True)
         if result:
             return result['id']
         return None
@@ -88,7 +122,13 @@ async def get_pdf_id_from_path(file_path: str) -> Optional[UUID]:
 
 
 @router.post("/chat")
-async def chat(request: ChatRequest, req: Request):
+async def chat(
+    request: ChatRequest,
+    req: Request,
+    claude_service: ClaudeService = Depends(container.provide("claude_service")),
+    pdf_service: PDFService = Depends(container.provide("pdf_service")),
+    redis_client: RedisClient = Depends(container.provide("redis_client"))
+):
     start_time = datetime.utcnow()
     post_tokens = None
     pre_tokens = None
@@ -106,8 +146,9 @@ async def chat(request: ChatRequest, req: Request):
 
     try:
         # session handling
-        logger.info(f"Request state: {vars(req.state)}")
-        session = getattr(req.state, 'session', None)
+        with CHAT_STAGE_LATENCY.time(stage="session"):
+            lazy_session = getattr(req.state, 'session', None)
+            session = await lazy_session.get(request.customerId) if lazy_session else None
         logger.info(f"Session found: {session}")
 
         if not session:
@@ -137,27 +178,30 @@ async def chat(request: ChatRequest, req: Request):
         }
 
         # Add rate limit check
-        rate_limit_key = f"rate_limit:{request.customerId}"
-        current_requests = await redis_client.get(rate_limit_key)
-        if current_requests and int(current_requests) >= 5:  # 5 requests per minute
-            await metrics_service.store_metrics_in_db(
-                request.customerId,
-                RateLimitMetrics(
-                    queue_length=initial_metrics.queue_length,
-                    rate_limited_requests=initial_metrics.rate_limited_requests + 1,
-                    token_usage=initial_metrics.token_usage,
-                    avg_response_time=initial_metrics.avg_response_time
+        with CHAT_STAGE_LATENCY.time(stage="rate_limit"):
+            rate_limit_key = f"rate_limit:{request.customerId}"
+            current_requests = await redis_client.get(rate_limit_key)
+            if current_requests and int(current_requests) >= 5:  # 5 requests per minute
+                CHAT_RATE_LIMITED.inc()
+                await metrics_service.store_metrics_in_db(
+                    request.customerId,
+                    RateLimitMetrics(
+                        queue_length=initial_metrics.queue_length,
+                        rate_limited_requests=initial_metrics.rate_limited_requests + 1,
+                        token_usage=initial_metrics.token_usage,
+                        avg_response_time=initial_metrics.avg_response_time
+                    )
+                )
+                raise HTTPException(
+                    status_code=429, 
+                    detail="Rate limit exceeded. Please wait before sending more requests."
                 )
-            )
-            raise HTTPException(
-                status_code=429, 
-                detail="Rate limit exceeded. Please wait before sending more requests."
-            )
 
-        await redis_client.incr(rate_limit_key)
-        await redis_client.expire(rate_limit_key, 60)  # 1 minute window
+            await redis_client.incr(rate_limit_key)
+            await redis_client.expire(rate_limit_key, 60)  # 1 minute window
 
-        pdfs = await pdf_service.get_customer_pdfs(request.customerId)
+        with CHAT_STAGE_LATENCY.time(stage="pdf_listing"):
+            pdfs = await pdf_service.get_customer_pdfs(request.customerId)
         if not pdfs:
             raise HTTPException(status_code=404, detail="No bills found")
 
@@ -178,11 +222,12 @@ async def chat(request: ChatRequest, req: Request):
                 logger.warning(f"Could not get PDF ID for first PDF: {e}")
 
         combined_text = []
-        for pdf in pdfs:
-            pdf_text = await pdf_service.extract_pdf_text(pdf.path)
-            if pdf_text:
-                bill_section = f"=== חשבונית {pdf.date.strftime('%d/%m/%Y')} ===\n{pdf_text}"
-                combined_text.append(bill_section)
+        with CHAT_STAGE_LATENCY.time(stage="text_extraction"):
+            for pdf in pdfs:
+                pdf_text = await pdf_service.extract_pdf_text(pdf.path)
+                if pdf_text:
+                    bill_section = f"=== חשבונית {pdf.date.strftime('%d/%m/%Y')} ===\n{pdf_text}"
+                    combined_text.append(bill_section)
 
         table_instructions = """
 בהצגת השוואה בין חשבוניות, אנא השתמש בפורמט הבא:
@@ -221,8 +266,10 @@ async def chat(request: ChatRequest, req: Request):
 
         # Check cache before saving user message
         cache_key = f"chat_cache:{hashlib.sha256(f'{request.message}:{request.customerId}'.encode()).hexdigest()}"
-        cached_response = await redis_client.get(cache_key)
+        with CHAT_STAGE_LATENCY.time(stage="cache_lookup"):
+            cached_response = await redis_client.get(cache_key)
         is_cache_hit = bool(cached_response)
+        CHAT_CACHE_LOOKUPS.inc(result="hit" if is_cache_hit else "miss")
         metrics_data = {
             "queue_length": initial_metrics.queue_length if initial_metrics else 0,
             "response_time": 0,
@@ -242,7 +289,8 @@ async def chat(request: ChatRequest, req: Request):
                     'cache_hit': is_cache_hit
                 }
             )
-            await chat_history_service.save_message(user_message)
+            with CHAT_STAGE_LATENCY.time(stage="history_save"):
+                chat_history_writer.enqueue(user_message)
         except Exception as e:
             logger.error(f"Failed to save user message: {e}", exc_info=True)
 
@@ -268,12 +316,13 @@ async def chat(request: ChatRequest, req: Request):
                 logger.debug(f"Pre-tokens value: {pre_tokens_value}")
 
 
-                response = await claude_service.get_response(
-                    message=enhanced_message,
-                    customer_id=request.customerId,
-                    pdf_content=chr(10).join(combined_text),
-                    context=request.context
-                )
+                with CHAT_STAGE_LATENCY.time(stage="claude"):
+                    response = await claude_service.get_response(
+                        message=enhanced_message,
+                        customer_id=request.customerId,
+                        pdf_content=chr(10).join(combined_text),
+                        context=request.context
+                    )
 
                 post_tokens_result = await metrics_service.get_token_usage(request.customerId)
                 post_tokens_value = post_tokens_result.used if post_tokens_result else pre_tokens_value
@@ -303,16 +352,17 @@ async def chat(request: ChatRequest, req: Request):
                 })
 
         try:
-            queue_metrics = await metrics_service.get_queue_metrics()
-            await metrics_service.store_metrics_in_db(
-                request.customerId,
-                RateLimitMetrics(
-                    queue_length=queue_metrics.total_queued,
-                    rate_limited_requests=initial_metrics.rate_limited_requests if initial_metrics else 0,
-                    token_usage=metrics_data["token_usage"],
-                    avg_response_time=metrics_data["response_time"]
+            with CHAT_STAGE_LATENCY.time(stage="metrics_write"):
+                queue_metrics = await metrics_service.get_queue_metrics()
+                await metrics_service.store_metrics_in_db(
+                    request.customerId,
+                    RateLimitMetrics(
+                        queue_length=queue_metrics.total_queued,
+                        rate_limited_requests=initial_metrics.rate_limited_requests if initial_metrics else 0,
+                        token_usage=metrics_data["token_usage"],
+                        avg_response_time=metrics_data["response_time"]
+                    )
                 )
-            )
         except Exception as e:
             logger.error(f"Error storing metrics: {e}")
 
@@ -330,14 +380,15 @@ async def chat(request: ChatRequest, req: Request):
                     'cache_hit': is_cache_hit
                 }
             )
-            await chat_history_service.save_message(bot_message)
+            with CHAT_STAGE_LATENCY.time(stage="history_save"):
+                chat_history_writer.enqueue(bot_message)
         except Exception as e:
             logger.error(f"Failed to save bot response: {e}", exc_info=True)
 
 
 
         return {
-            "response": response,
+            "response": render_rtl(response) if request.rtl_markup else response,
             "status": "success",
             "bills_analyzed": len(combined_text),
             "session_id": str(session['id']),
@@ -346,6 +397,8 @@ async def chat(request: ChatRequest, req: Request):
             "metrics": metrics_data
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         # Try to store error metrics if possible
@@ -364,11 +417,14 @@ async def chat(request: ChatRequest, req: Request):
 
         raise HTTPException(status_code=500, detail=str(e))
 @router.get("/bill-info/{customer_id}")
-async def get_bill_info(request: Request, customer_id: str):
+async def get_bill_info(
+    request: Request,
+    customer_id: str,
+    pdf_service: PDFService = Depends(container.provide("pdf_service")),
+    bill_processor: TelecomBillProcessor = Depends(container.provide("bill_processor"))
+):
     """Get processed bill information"""
     try:
-                # Get session info if needed
-        session = getattr(request.state, 'session', None)
         pdfs = await pdf_service.get_customer_pdfs(customer_id)
         if not pdfs:
             raise HTTPException(status_code=404, detail="No bills found")
@@ -388,10 +444,15 @@ async def get_bill_info(request: Request, customer_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/bill-analysis/{customer_id}")
-async def analyze_bill(request: Request, customer_id: str, query: Optional[str] = None):
+async def analyze_bill(
+    request: Request,
+    customer_id: str,
+    query: Optional[str] = None,
+    pdf_service: PDFService = Depends(container.provide("pdf_service")),
+    bill_processor: TelecomBillProcessor = Depends(container.provide("bill_processor"))
+):
     """Analyze specific aspects of the bill"""
     try:
-        session = getattr(request.state, 'session', None)
         pdfs = await pdf_service.get_customer_pdfs(customer_id)
         if not pdfs:
             raise HTTPException(status_code=404, detail="No bills found")
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import os
 import logging
-from app.services.pdf_service import pdf_service
+from app.core.container import container
+from app.services.pdf_service import PDFService
 from dataclasses import asdict
 
 router = APIRouter()
@@ -20,7 +21,10 @@ class LegacyTriggerResponse(BaseModel):
     error: Optional[str] = None
 
 @router.post("/legacy/trigger")
-async def handle_legacy_trigger(request: LegacyTriggerRequest):
+async def handle_legacy_trigger(
+    request: LegacyTriggerRequest,
+    pdf_service: PDFService = Depends(container.provide("pdf_service"))
+):
     """Handle legacy system trigger and return PDF list"""
     try:
         logger.info(f"Processing legacy trigger for customer: {request.customer_id}")
@@ -69,7 +73,10 @@ async def handle_legacy_trigger(request: LegacyTriggerRequest):
         )
 
 @router.get("/pdf/view/{filename}")
-async def get_pdf(filename: str):
+async def get_pdf(
+    filename: str,
+    pdf_service: PDFService = Depends(container.provide("pdf_service"))
+):
     """Serve PDF file"""
     try:
         pdf_path = os.path.join(pdf_service.base_directory, filename)
@@ -89,7 +96,11 @@ async def get_pdf(filename: str):
         raise HTTPException(status_code=404, detail="PDF not found")
 
 @router.get("/pdf/info/{customer_id}/{filename}")
-async def get_pdf_info(customer_id: str, filename: str):
+async def get_pdf_info(
+    customer_id: str,
+    filename: str,
+    pdf_service: PDFService = Depends(container.provide("pdf_service"))
+):
     """Get PDF metadata and content information"""
     try:
         file_path = os.path.join(pdf_service.base_directory, filename)
@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class SessionSettings(BaseSettings):
@@ -16,6 +17,53 @@ class SessionSettings(BaseSettings):
     DB_NAME: str = "telecom_qa"
     DB_POOL_MIN_SIZE: int = 10
     DB_POOL_MAX_SIZE: int = 30
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_SLOW_QUERY_MS: int = 200
+
+    # Optional streaming replica for replica-safe reads
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: int = 5432
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL: float = 1.0
+
+    # Chat history write-behind buffer
+    CHAT_HISTORY_FLUSH_MS: int = 200
+    CHAT_HISTORY_BATCH_SIZE: int = 100
+    CHAT_HISTORY_SPOOL_PATH: str = "data/chat_history_spool.jsonl"
+    # Messages Postgres rejects on their own (FK violation, oversize value)
+    CHAT_HISTORY_DEAD_LETTER_PATH: str = "data/chat_history_dead_letter.jsonl"
+
+    # Cache of customer/session ids known to exist in Postgres
+    KNOWN_IDS_MAX_SIZE: int = 10000
+    KNOWN_IDS_TTL: int = 3600
+    KNOWN_IDS_REDIS_BACKED: bool = False
+
+    # Cross-worker WebSocket delivery over Redis pub/sub
+    WS_PUBSUB_ENABLED: bool = True
+    # Per-socket outbound queue; clients that fill it or stall a send are evicted
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SEND_TIMEOUT: float = 5.0
+    # Ping sockets quiet for an interval; drop those quiet for the idle timeout
+    WS_HEARTBEAT_INTERVAL: float = 30.0
+    WS_IDLE_TIMEOUT: float = 90.0
+
+    # Rate limit metrics rollups
+    METRICS_BUCKET_SECONDS: int = 10
+    METRICS_FLUSH_SECONDS: float = 10.0
+    # Buckets held in memory while writes fail; the oldest go first
+    METRICS_MAX_BUCKETS: int = 10000
+
+    # Background dependency probes behind /readyz and /health
+    HEALTH_CHECK_INTERVAL: float = 5.0
+    HEALTH_CHECK_TIMEOUT: float = 2.0
+
+    # Logging goes through a queue to a listener thread (app/core/logging.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: str = "logs/app.log"
+    # Per-logger levels, e.g. {"app.services.claude_service": "DEBUG"}
+    LOG_LEVELS: Dict[str, str] = {}
+    # Keep one in N records logged with extra=SAMPLED (bulky debug dumps)
+    LOG_SAMPLE_RATE: int = 100
 
     # API Settings
     DEBUG: bool = True
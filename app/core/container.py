@@ -0,0 +1,100 @@
+# app/core/container.py
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+class Container:
+    """
+    Lazily built service singletons.
+
+    Each service is registered as a factory and created on first get(),
+    so importing a service module has no side effects. warm() builds a
+    set of services off the event loop during startup; provide() adapts a
+    service for FastAPI's Depends.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """Return the service, creating it on first use"""
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+        # Per-service locks, so a factory may get() the services it needs
+        with self._locks[name]:
+            if name not in self._instances:
+                self._instances[name] = self._factories[name]()
+                logger.debug("Created service %s", name)
+            return self._instances[name]
+
+    def created(self, name: str) -> bool:
+        return name in self._instances
+
+    def provide(self, name: str) -> Callable[[], Any]:
+        """Dependency for Depends(), resolving the service per request"""
+        def dependency() -> Any:
+            return self.get(name)
+        dependency.__name__ = f"provide_{name}"
+        return dependency
+
+    async def warm(self, names: Iterable[str]) -> None:
+        """Create services concurrently in worker threads"""
+        await asyncio.gather(*(asyncio.to_thread(self.get, name) for name in names))
+
+    def override(self, name: str, instance: Any) -> None:
+        """Use `instance` for `name`, e.g. a fake in tests"""
+        with self._guard:
+            self._instances[name] = instance
+
+    def reset(self) -> None:
+        """Drop created instances; factories stay registered"""
+        with self._guard:
+            self._instances.clear()
+
+def _redis_client():
+    from app.core.redis import RedisClient
+    return RedisClient()
+
+def _rate_limit_service():
+    from app.services.rate_limiting.service import RateLimitService
+    return RateLimitService(container.get("redis_client"))
+
+def _claude_service():
+    from app.services.claude_service import create_claude_service
+    return create_claude_service(container.get("rate_limit_service"))
+
+def _pdf_service():
+    from app.services.pdf_service import PDFService
+    return PDFService("/root/telecom-customer-service/pdf-test")
+
+def _bill_processor():
+    from app.services.telecom_bill_processor import TelecomBillProcessor, enhance_bill_processor
+    return enhance_bill_processor(TelecomBillProcessor())
+
+def _query_processor():
+    from app.services.telecom_bill_processor import TelecomQueryProcessor
+    return TelecomQueryProcessor()
+
+container = Container()
+container.register("redis_client", _redis_client)
+container.register("rate_limit_service", _rate_limit_service)
+container.register("claude_service", _claude_service)
+container.register("pdf_service", _pdf_service)
+container.register("bill_processor", _bill_processor)
+container.register("query_processor", _query_processor)
+
+__all__ = ['Container', 'container']
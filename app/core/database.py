@@ -1,16 +1,145 @@
 # app/core/database.py
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import asyncio
+import json
 import logging
-from typing import AsyncGenerator, Any 
+import time
+from typing import AsyncGenerator, Any, Iterable, Optional, Sequence, Union
 import asyncpg
 from fastapi import FastAPI
 from app.core.config import settings  # You'll need to create this
+from app.services.monitoring.registry import metrics
 
 logger = logging.getLogger(__name__)
 
+DB_ACQUIRE_WAIT = metrics.histogram(
+    "db_pool_acquire_wait_seconds",
+    "Time spent waiting for a pool connection"
+)
+DB_QUERY_LATENCY = metrics.histogram(
+    "db_query_duration_seconds",
+    "Query latency by registered statement name",
+    ["statement"]
+)
+DB_READ_ROUTES = metrics.counter(
+    "db_replica_safe_reads_total",
+    "Replica-safe reads by the pool that served them",
+    ["target"]
+)
+DB_SLOW_QUERIES = metrics.counter(
+    "db_slow_queries_total",
+    "Queries slower than DB_SLOW_QUERY_MS",
+    ["statement"]
+)
+
+@dataclass(frozen=True)
+class NamedQuery:
+    """
+    Hot query with a stable name, so its latency and slow-query counts
+    are reported per statement instead of under "adhoc".
+
+    Nothing is prepared up front: like any other query it goes through
+    asyncpg's per-connection statement cache (DB_STATEMENT_CACHE_SIZE).
+    """
+    name: str
+    sql: str
+
+Query = Union[str, NamedQuery]
+
+def _sql(query: Query) -> str:
+    return query.sql if isinstance(query, NamedQuery) else query
+
+def _statement_name(query: Query) -> str:
+    return query.name if isinstance(query, NamedQuery) else "adhoc"
+
+@asynccontextmanager
+async def _timed(query: Query) -> AsyncGenerator[None, None]:
+    """Record latency for query and log it when over DB_SLOW_QUERY_MS"""
+    name = _statement_name(query)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        DB_QUERY_LATENCY.observe(elapsed, statement=name)
+        if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+            DB_SLOW_QUERIES.inc(statement=name)
+            logger.warning(
+                f"Slow query {name} took {elapsed * 1000:.1f}ms: "
+                f"{' '.join(_sql(query).split())[:200]}"
+            )
+
+# Seconds the replica is behind; 0 when it has replayed everything received
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# Errors meaning the replica itself is unusable, not that the query is wrong
+REPLICA_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError)
+
+def _encode_json(value: Any) -> str:
+    # Callers historically pass pre-serialized JSON strings
+    return value if isinstance(value, str) else json.dumps(value)
+
+class Transaction:
+    """
+    Unit of work pinned to one pool connection.
+
+    Yielded by DatabaseManager.transaction() and DatabaseManager.batch();
+    mirrors the DatabaseManager query helpers so code can take either.
+    """
+
+    def __init__(self, conn: asyncpg.Connection):
+        self.conn = conn
+
+    async def fetch_one(self, query: Query, *args, record: bool = False) -> dict:
+        async with _timed(query):
+            row = await self.conn.fetchrow(_sql(query), *args)
+        if record or row is None:
+            return row
+        return dict(row)
+
+    async def fetch_all(self, query: Query, *args, record: bool = False) -> list:
+        async with _timed(query):
+            rows = await self.conn.fetch(_sql(query), *args)
+        if record:
+            return rows
+        return [dict(row) for row in rows]
+
+    async def fetch_val(self, query: Query, *args) -> Any:
+        async with _timed(query):
+            return await self.conn.fetchval(_sql(query), *args)
+
+    async def execute(self, query: Query, *args) -> str:
+        async with _timed(query):
+            return await self.conn.execute(_sql(query), *args)
+
+    async def executemany(self, query: Query, args: Iterable[Sequence]) -> None:
+        async with _timed(query):
+            await self.conn.executemany(_sql(query), args)
+
+    async def copy_records_to_table(self, table: str, records: Iterable[Sequence], **kwargs) -> str:
+        """Bulk load records with COPY, e.g. columns=[...], schema_name='telecom'"""
+        return await self.conn.copy_records_to_table(table, records=records, **kwargs)
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncGenerator["Transaction", None]:
+        """Nested block rolled back on its own if it raises (a plain transaction inside batch())"""
+        async with self.conn.transaction():
+            yield self
+
 class DatabaseManager:
     def __init__(self):
         self.pool = None
+        self.replica_pool = None
+        # None while the replica is unknown, unreachable or not configured
+        self._replica_lag: Optional[float] = None
+        self._replica_monitor: Optional[asyncio.Task] = None
         self._config = {
             'host': settings.DB_HOST,
             'port': settings.DB_PORT,
@@ -19,68 +148,190 @@ class DatabaseManager:
             'database': settings.DB_NAME,
             'min_size': settings.DB_POOL_MIN_SIZE,
             'max_size': settings.DB_POOL_MAX_SIZE,
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'init': self._init_connection,
         }
+        metrics.gauge("db_pool_size", "Open pool connections", func=self._pool_size)
+        metrics.gauge("db_pool_idle", "Idle pool connections", func=self._pool_idle)
+        metrics.gauge("db_pool_in_use", "Pool connections checked out", func=self._pool_in_use)
+        metrics.gauge("db_pool_max_size", "Configured maximum pool size", func=lambda: settings.DB_POOL_MAX_SIZE)
+        metrics.gauge("db_replica_lag_seconds", "Last measured replica lag, -1 if unavailable", func=self._replica_lag_metric)
         logger.info(f"Initializing DatabaseManager with host: {settings.DB_HOST}")
 
+    def _pool_size(self) -> int:
+        return self.pool.get_size() if self.pool else 0
+
+    def _pool_idle(self) -> int:
+        return self.pool.get_idle_size() if self.pool else 0
+
+    def _pool_in_use(self) -> int:
+        return self._pool_size() - self._pool_idle()
+
+    def _replica_lag_metric(self) -> float:
+        return -1 if self._replica_lag is None else self._replica_lag
+
+    def replica_available(self) -> bool:
+        """Whether replica-safe reads currently go to the replica"""
+        return (
+            self.replica_pool is not None
+            and self._replica_lag is not None
+            and self._replica_lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        )
+
+    @staticmethod
+    def named_query(name: str, sql: str) -> NamedQuery:
+        """Name a hot query for per-statement metrics; see NamedQuery"""
+        return NamedQuery(name, sql)
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        """Pool init hook: install JSON codecs"""
+        for typename in ('json', 'jsonb'):
+            await conn.set_type_codec(
+                typename,
+                encoder=_encode_json,
+                decoder=json.loads,
+                schema='pg_catalog'
+            )
 
     async def connect(self) -> None:
         """Initialize database connection pool"""
         try:
             self.pool = await asyncpg.create_pool(**self._config)
             logger.info("Database connection pool created")
-            
+
             # Test connection
             async with self.pool.acquire() as conn:
                 version = await conn.fetchval('SELECT version()')
                 logger.info(f"Connected to PostgreSQL: {version}")
-                
+
         except Exception as e:
             logger.error(f"Failed to create database pool: {str(e)}")
             raise
 
+        if settings.DB_REPLICA_HOST:
+            await self._connect_replica()
+
+    async def _connect_replica(self) -> None:
+        """Open the replica pool and watch it; reads stay on the primary until it is usable"""
+        await self._open_replica()
+        # Started even if the replica is down, so it is retried
+        self._replica_monitor = asyncio.create_task(self._monitor_replica())
+
+    async def _open_replica(self) -> None:
+        try:
+            self.replica_pool = await asyncpg.create_pool(**{
+                **self._config,
+                'host': settings.DB_REPLICA_HOST,
+                'port': settings.DB_REPLICA_PORT,
+            })
+            self._replica_lag = await self._probe_replica()
+            logger.info(f"Replica pool created for {settings.DB_REPLICA_HOST}, lag {self._replica_lag:.2f}s")
+        except Exception as e:
+            logger.warning(f"Replica unavailable, reading from primary: {str(e)}")
+
+    async def _probe_replica(self) -> float:
+        async with self.replica_pool.acquire(timeout=settings.DB_REPLICA_CHECK_INTERVAL) as conn:
+            return float(await conn.fetchval(REPLICA_LAG_QUERY, timeout=settings.DB_REPLICA_CHECK_INTERVAL))
+
+    async def _monitor_replica(self) -> None:
+        """Refresh the cached replica lag so the read path never probes"""
+        while True:
+            await asyncio.sleep(settings.DB_REPLICA_CHECK_INTERVAL)
+            if self.replica_pool is None:
+                await self._open_replica()
+                continue
+            try:
+                lag = await self._probe_replica()
+                if lag > settings.DB_REPLICA_MAX_LAG_SECONDS and self.replica_available():
+                    logger.warning(f"Replica lag {lag:.2f}s over tolerance, reading from primary")
+                self._replica_lag = lag
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._replica_lag is not None:
+                    logger.warning(f"Replica lag probe failed, reading from primary: {str(e)}")
+                self._replica_lag = None
+
     async def disconnect(self) -> None:
         """Close database connection pool"""
+        if self._replica_monitor:
+            self._replica_monitor.cancel()
+            try:
+                await self._replica_monitor
+            except asyncio.CancelledError:
+                pass
+            self._replica_monitor = None
+        if self.replica_pool:
+            await self.replica_pool.close()
+            self.replica_pool = None
+            self._replica_lag = None
         if self.pool:
             await self.pool.close()
             logger.info("Database connection pool closed")
 
     @asynccontextmanager
-    async def connection(self) -> AsyncGenerator[asyncpg.Connection, None]:
-        """Get a database connection from the pool"""
+    async def connection(self, replica: bool = False) -> AsyncGenerator[asyncpg.Connection, None]:
+        """Get a database connection from the pool, or the replica pool if replica is set and usable"""
         if not self.pool:
             raise RuntimeError("Database not initialized")
-            
-        async with self.pool.acquire() as conn:
+
+        pool = self.replica_pool if replica and self.replica_available() else self.pool
+        start = time.perf_counter()
+        async with pool.acquire() as conn:
+            DB_ACQUIRE_WAIT.observe(time.perf_counter() - start)
             try:
                 yield conn
             except Exception as e:
-                await conn.execute('ROLLBACK')
                 logger.error(f"Database error: {str(e)}")
                 raise
 
-    async def fetch_one(self, query: str, *args) -> dict:
-        """Fetch a single row"""
+    @asynccontextmanager
+    async def transaction(self) -> AsyncGenerator[Transaction, None]:
+        """Run a unit of work in one transaction on one connection"""
         async with self.connection() as conn:
-            row = await conn.fetchrow(query, *args)
-            return dict(row) if row else None
+            async with conn.transaction():
+                yield Transaction(conn)
 
-    async def fetch_all(self, query: str, *args) -> list:
-        """Fetch multiple rows"""
-        async with self.connection() as conn:
-            rows = await conn.fetch(query, *args)
-            return [dict(row) for row in rows]
+    @asynccontextmanager
+    async def batch(self, replica: bool = False) -> AsyncGenerator[Transaction, None]:
+        """Pin one connection for several statements, each committed on its own"""
+        async with self.connection(replica=replica) as conn:
+            yield Transaction(conn)
 
-    async def fetch_val(self, query: str, *args) -> Any:
-        """Fetch a single value"""
-        async with self.connection() as conn:
-            return await conn.fetchval(query, *args)
-            
-    async def execute(self, query: str, *args) -> str:
+    async def _read(self, replica: bool, method: str, query: Query, *args, **kwargs) -> Any:
+        """Run a read on the replica when allowed and healthy, else on the primary"""
+        if replica and self.replica_available():
+            try:
+                async with self.batch(replica=True) as tx:
+                    result = await getattr(tx, method)(query, *args, **kwargs)
+                DB_READ_ROUTES.inc(target="replica")
+                return result
+            except REPLICA_ERRORS as e:
+                logger.warning(f"Replica read failed, retrying on primary: {str(e)}")
+                self._replica_lag = None
+        if replica:
+            DB_READ_ROUTES.inc(target="primary")
+        async with self.batch() as tx:
+            return await getattr(tx, method)(query, *args, **kwargs)
+
+    async def fetch_one(self, query: Query, *args, record: bool = False, replica: bool = False) -> dict:
+        """Fetch a single row, as asyncpg.Record if record is set; replica marks the read replica-safe"""
+        return await self._read(replica, 'fetch_one', query, *args, record=record)
+
+    async def fetch_all(self, query: Query, *args, record: bool = False, replica: bool = False) -> list:
+        """Fetch multiple rows, as asyncpg.Records if record is set; replica marks the read replica-safe"""
+        return await self._read(replica, 'fetch_all', query, *args, record=record)
+
+    async def fetch_val(self, query: Query, *args, replica: bool = False) -> Any:
+        """Fetch a single value; replica marks the read replica-safe"""
+        return await self._read(replica, 'fetch_val', query, *args)
+
+    async def execute(self, query: Query, *args) -> str:
         """Execute a query"""
-        async with self.connection() as conn:
-            return await conn.execute(query, *args)
+        async with self.batch() as tx:
+            return await tx.execute(query, *args)
+
 
-            
 # Global instance
 db = DatabaseManager()
 
@@ -89,4 +340,4 @@ async def connect_to_db(app: FastAPI) -> None:
     await db.connect()
 
 async def close_db_connection(app: FastAPI) -> None:
-    await db.disconnect()
\ No newline at end of file
+    await db.disconnect()
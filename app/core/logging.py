@@ -1,68 +1,135 @@
 # app/core/logging.py
+import atexit
+import itertools
+import json
 import logging
+import queue
 import sys
+from functools import wraps
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
 from app.core.config import settings
 
-# Create logs directory if it doesn't exist
-Path(settings.LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+# Pass as extra= on bulky debug dumps; only one in LOG_SAMPLE_RATE is kept
+SAMPLED = {"sampled": True}
 
-# Configure logging
-def setup_logging():
-    """Configure application logging."""
-    
-    # Create logger
-    logger = logging.getLogger('app')
-    logger.setLevel(getattr(logging, settings.LOG_LEVEL))
+_listener: Optional[QueueListener] = None
 
-    # Create formatters
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'
-    )
-    console_formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s'
-    )
+class LazyJson:
+    """
+    Defers json.dumps until the record is formatted, which with
+    setup_logging() is on the listener thread; records dropped by level
+    or sampling are never rendered.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return json.dumps(self.value, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in `rate` records marked with SAMPLED, and all others"""
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        return next(self._counter) % self.rate == 0
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener.
 
-    # Create file handler
+    The stock prepare() renders msg % args on the emitting thread so the
+    record can be pickled. Our queue never leaves the process, so the
+    record is enqueued as is and the listener's formatters do the work.
+    Arguments are rendered when the record is written, not when it is
+    logged: don't log objects that are mutated right after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def setup_logging(
+    level: str = settings.LOG_LEVEL,
+    log_file: str = settings.LOG_FILE,
+    levels: Dict[str, str] = settings.LOG_LEVELS,
+    sample_rate: int = settings.LOG_SAMPLE_RATE
+) -> None:
+    """
+    Route all logging through one queue.
+
+    The root logger gets a single DeferredQueueHandler; a QueueListener
+    thread owns the file and console handlers, so message formatting and
+    writes both happen off the event loop. Call once at startup; later
+    calls are no-ops.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
     file_handler = RotatingFileHandler(
-        settings.LOG_FILE,
+        log_file,
         maxBytes=10485760,  # 10MB
-        backupCount=5
+        backupCount=5,
+        encoding="utf-8"
     )
-    file_handler.setFormatter(file_formatter)
-    file_handler.setLevel(logging.DEBUG)
-
-    # Create console handler
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'
+    ))
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(console_formatter)
-    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
 
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
 
-    return logger
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    for name, logger_level in levels.items():
+        logging.getLogger(name).setLevel(logger_level.upper())
 
-# Create logger instance
-logger = setup_logging()
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 # Logging decorator
 def log_function_call(func):
     """
     Decorator to log function calls.
-    
+
     Usage:
         @log_function_call
         async def my_function(arg1, arg2):
             ...
     """
+    logger = logging.getLogger(func.__module__)
+
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        logger.debug(f"Calling {func.__name__} with args: {args}, kwargs: {kwargs}")
+        logger.debug("Calling %s with args: %s, kwargs: %s", func.__name__, args, kwargs)
         try:
             result = await func(*args, **kwargs)
-            logger.debug(f"{func.__name__} completed successfully")
+            logger.debug("%s completed successfully", func.__name__)
             return result
         except Exception as e:
             logger.error(f"Error in {func.__name__}: {str(e)}", exc_info=True)
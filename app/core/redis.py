@@ -60,6 +60,9 @@ class RedisClient:
     async def hget(self, key: str, field: str) -> Optional[str]:
         return self.redis_client.hget(key, field)
 
+    async def hmget(self, key: str, *fields: str) -> List[Optional[str]]:
+        return self.redis_client.hmget(key, list(fields))
+
     async def hgetall(self, key: str) -> Dict[str, str]:
         return self.redis_client.hgetall(key)
 
@@ -78,6 +81,10 @@ class RedisClient:
         """Get score of member in sorted set."""
         return self.redis_client.zscore(key, member)
 
+    async def zrangebyscore(self, key: str, min: Union[float, str], max: Union[float, str], withscores: bool = False) -> List:
+        """Get members of a sorted set with scores between min and max."""
+        return self.redis_client.zrangebyscore(key, min, max, withscores=withscores)
+
     async def multi_get(self, keys: List[str]) -> List[Optional[str]]:
         """Get multiple values at once."""
         pipe = self.redis_client.pipeline()
@@ -109,9 +116,22 @@ class RedisClient:
         """Remove one or more members from a set."""
         return self.redis_client.srem(key, *values)
 
+    def register_script(self, script: str):
+        """Register a Lua script to be run with run_script."""
+        return self.redis_client.register_script(script)
+
+    async def run_script(self, script, keys: List[str], args: List[Any]) -> Any:
+        """Run a registered Lua script atomically."""
+        return script(keys=keys, args=args)
+
+
+def __getattr__(name: str):
+    # Module-level singletons are built on first use by app.core.container
+    if name in ("redis_client",):
+        from app.core.container import container
+        return container.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Create Redis client instance
-redis_client = RedisClient()
 __all__ = ['redis_client']
 
 # Cache decorator
@@ -130,6 +150,8 @@ def cache_response(ttl: int = None):
             # Create cache key from function name and arguments
             cache_key = f"{func.__name__}:{hash(str(args) + str(kwargs))}"
             
+            redis_client = __getattr__("redis_client")
+
             # Try to get from cache
             cached_result = await redis_client.get(cache_key)
             if cached_result:
@@ -15,7 +15,15 @@ def setup_cleanup_jobs(scheduler: AsyncIOScheduler):
             id='cleanup_chat_history',
             replace_existing=True
         )
-        logger.info("Chat history cleanup job scheduled")
+        scheduler.add_job(
+            chat_history_service.ensure_future_partitions,
+            'cron',
+            hour=2,  # Run before the cleanup job
+            kwargs={'months_ahead': 3},
+            id='create_chat_history_partitions',
+            replace_existing=True
+        )
+        logger.info("Chat history cleanup and partition jobs scheduled")
     except Exception as e:
         logger.error(f"Error setting up cleanup job: {e}")
         raise
\ No newline at end of file
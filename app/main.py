@@ -1,52 +1,119 @@
 from contextlib import asynccontextmanager
+import asyncio
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.services.session import SessionManager, SessionMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.services.session import SessionManager, SessionMiddleware, SessionActivityBatcher
 from app.api.routes import customer, chat, legacy_trigger
+from app.core.container import container
 from app.core.database import db
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from app.jobs.cleanup import setup_cleanup_jobs
-from app.services.rate_limiting.service import rate_limit_service
-from app.services.claude_service import create_claude_service
+from app.services.chat_history.known_ids import known_customers, known_sessions
+from app.services.chat_history.writer import chat_history_writer
+from app.services.monitoring.aggregator import metrics_aggregator
+from app.services.monitoring.health import health_monitor
+from app.services.monitoring.registry import metrics
 import logging
+from app.core.logging import setup_logging
 from app.api.routes import websocket
+from app.services.websocket.metrics_publisher import metrics_publisher
+from app.services.websocket.websocket_manager import websocket_manager
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Global instances
-session_manager = None
+session_manager = SessionManager()
+session_activity = SessionActivityBatcher(session_manager)
 scheduler = AsyncIOScheduler()
 
+# Built off the event loop at startup, concurrently with connecting
+STARTUP_SERVICES = (
+    "redis_client",
+    "rate_limit_service",
+    "claude_service",
+    "pdf_service",
+    "bill_processor",
+    "query_processor",
+)
+
+async def _probe_postgres() -> bool:
+    async with db.connection() as conn:
+        return await conn.fetchval('SELECT 1') == 1
+
+async def _probe_redis() -> bool:
+    # The session client is synchronous; keep its PING off the event loop
+    return await asyncio.to_thread(session_manager.redis.ping)
+
+async def _probe_scheduler() -> bool:
+    return scheduler.running
+
+health_monitor.register("postgresql", _probe_postgres)
+health_monitor.register("redis", _probe_redis)
+health_monitor.register("scheduler", _probe_scheduler)
+
+async def _connect_redis() -> None:
+    """Open the first connection of both Redis pools"""
+    if not await _probe_redis():
+        raise Exception("Redis health check failed")
+    await asyncio.to_thread(container.get("redis_client").redis_client.ping)
+    logger.info("Successfully connected to Redis")
+
+async def _warm_services() -> None:
+    """Build services, which compiles the bill parser regexes, and open the HTTP client"""
+    await container.warm(STARTUP_SERVICES)
+    await container.get("claude_service").start()
+    logger.info("Services initialized")
+
+async def _warm_caches() -> None:
+    await asyncio.gather(known_customers.preload(), known_sessions.preload())
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events."""
-    global session_manager
     try:
         # Startup
         logger.info("Starting up server...")
-        
-        # Initialize PostgreSQL
-        logger.info("Connecting to PostgreSQL...")
-        await db.connect()
-        logger.info("Successfully connected to PostgreSQL")
-        
-        # Initialize session manager
-        session_manager = SessionManager()
-        
-        # Test Redis connection
-        is_healthy = await session_manager.check_health()
-        if not is_healthy:
-            raise Exception("Redis health check failed")
-        logger.info("Successfully connected to Redis")
+        start = time.perf_counter()
+
+        # Postgres, Redis and the services don't depend on each other;
+        # let every step settle before failing so cleanup sees a stable state
+        results = await asyncio.gather(
+            db.connect(),
+            _connect_redis(),
+            _warm_services(),
+            _warm_caches(),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        logger.info(f"Connections and services ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        # Start write-behind chat history buffer and metrics rollups
+        await chat_history_writer.start()
+        await metrics_aggregator.start()
+
+        # Start write-behind session activity updates
+        session_activity.start()
+
+        # Deliver WebSocket messages from other workers and push metrics
+        websocket_manager.start()
+        metrics_publisher.start()
         
         # Initialize and start scheduler
-        if session_manager:
-            logger.info("Setting up cleanup jobs...")
-            setup_cleanup_jobs(scheduler)
-            scheduler.start()
-            logger.info("Cleanup scheduler started successfully")
+        logger.info("Setting up cleanup jobs...")
+        setup_cleanup_jobs(scheduler)
+        scheduler.start()
+        logger.info("Cleanup scheduler started successfully")
+
+        # First probe round runs before /readyz can report ready
+        await health_monitor.start()
+        health_monitor.accepting = True
+        logger.info("Server ready")
         
         yield
         
@@ -54,19 +121,30 @@ async def lifespan(app: FastAPI):
         logger.error(f"Startup error: {str(e)}")
         raise
     finally:
-        # Shutdown
+        # Shutdown; /readyz fails from here on
         logger.info("Shutting down server...")
+        await health_monitor.stop()
         
         # Stop scheduler if running
         if scheduler.running:
             logger.info("Shutting down scheduler...")
             scheduler.shutdown()
+
+        await metrics_publisher.stop()
+        await websocket_manager.stop()
+
+        # Flush pending session activity and close Redis connection
+        await session_activity.stop()
+        await session_manager.close()
+        logger.info("Closed Redis connection")
         
-        # Close Redis connection
-        if session_manager:
-            await session_manager.close()
-            logger.info("Closed Redis connection")
-        
+        # Write out buffered chat history and metrics before the pool goes away
+        await chat_history_writer.stop()
+        await metrics_aggregator.stop()
+
+        if container.created("claude_service"):
+            await container.get("claude_service").close()
+
         # Close PostgreSQL connection
         await db.disconnect()
         logger.info("Closed PostgreSQL connection")
@@ -84,53 +162,40 @@ app.add_middleware(
 )
 
 # Session middleware setup
-@app.on_event("startup")
-async def startup_event():
-    """Add session middleware after session manager is initialized."""
-    global session_manager
-    if session_manager:
-        app.add_middleware(SessionMiddleware, session_manager=session_manager)
-    else:
-        logger.error("Session manager not initialized")
-
-# Health check endpoint
-@app.get("/health")
-async def health_check():
-    db_healthy = False
-    redis_healthy = False
-    scheduler_healthy = scheduler.running
-    
-    try:
-        # Check PostgreSQL
-        async with db.connection() as conn:
-            await conn.fetchval('SELECT 1')
-            db_healthy = True
-    except Exception as e:
-        logger.error(f"PostgreSQL health check failed: {str(e)}")
+app.add_middleware(
+    SessionMiddleware,
+    session_manager=session_manager,
+    activity=session_activity
+)
 
-    try:
-        # Check Redis
-        redis_healthy = await session_manager.check_health()
-    except Exception as e:
-        logger.error(f"Redis health check failed: {str(e)}")
+@app.get("/livez")
+async def liveness():
+    """The process is up and serving requests"""
+    return {"status": "alive"}
 
+@app.get("/readyz")
+async def readiness():
+    """Ready once startup has finished and every dependency probe is fresh and up"""
+    ready = health_monitor.is_ready()
+    return JSONResponse(
+        {"status": "ready" if ready else "not ready", "checks": health_monitor.snapshot()},
+        status_code=200 if ready else 503
+    )
+
+# Health check endpoint; reads cached probe results, see HealthMonitor
+@app.get("/health")
+async def health_check():
+    checks = health_monitor.snapshot()
+    healthy = all(check["status"] == "up" for check in checks.values())
     return {
-        "status": "healthy" if (db_healthy and redis_healthy and scheduler_healthy) else "unhealthy",
-        "postgresql": "up" if db_healthy else "down",
-        "redis": "up" if redis_healthy else "down",
-        "scheduler": "up" if scheduler_healthy else "down"
+        "status": "healthy" if healthy else "unhealthy",
+        **{name: check["status"] for name, check in checks.items()}
     }
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    claude_service = create_claude_service(rate_limit_service)
-    queue_processor = asyncio.create_task(
-        rate_limit_service.process_claude_queue()
-    )
-    try:
-        yield
-    finally:
-        queue_processor.cancel()
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint for this worker"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # Include routers
 app.include_router(customer.router, prefix="/api")
@@ -0,0 +1,95 @@
+# app/scripts/bench_db_overhead.py
+"""
+Compare per-query overhead of the hot PDF cache lookup:
+
+  * baseline: the pool as it was configured before (asyncpg's default
+    statement cache, no JSON codecs) + dict copy
+  * db.fetch_one: DB_STATEMENT_CACHE_SIZE, JSON codecs, timing + dict copy
+  * db.fetch_one(..., record=True): same, returning the asyncpg.Record
+
+Usage:
+    python app/scripts/bench_db_overhead.py --queries 5000
+
+Inserts one row into telecom.pdf_content_cache under a scratch hash and
+removes it afterwards. Database settings come from the SESSION_DB_* env.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import asyncpg
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from app.core.database import db
+
+BENCH_HASH = "bench_db_overhead"
+
+# Same statement as pdf_service.PDF_CONTENT_BY_HASH, redefined so the
+# benchmark does not import the PDF service
+PDF_CONTENT_BY_HASH = db.named_query(
+    "pdf_content_by_hash",
+    """
+    SELECT content FROM telecom.pdf_content_cache 
+    WHERE content_hash = $1 AND page_number = $2
+    """
+)
+
+async def timed(label: str, count: int, call) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        await call()
+    per_query = (time.perf_counter() - start) / count
+    print(f"{label:28} {per_query * 1e6:10.1f} us/query")
+    return per_query
+
+async def run(args):
+    await db.connect()
+    try:
+        await db.execute(
+            """
+            INSERT INTO telecom.pdf_content_cache (content_hash, page_number, content)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (content_hash, page_number) DO NOTHING
+            """,
+            BENCH_HASH, 0, "x" * args.content_size
+        )
+
+        # The old DatabaseManager config: asyncpg defaults, no init hook
+        baseline_pool = await asyncpg.create_pool(
+            **{**db._config, 'statement_cache_size': 100, 'init': None, 'min_size': 1}
+        )
+        async def fetch_baseline():
+            async with baseline_pool.acquire() as conn:
+                row = await conn.fetchrow(PDF_CONTENT_BY_HASH.sql, BENCH_HASH, 0)
+                return dict(row) if row else None
+
+        for _ in range(50):
+            await fetch_baseline()
+            await db.fetch_one(PDF_CONTENT_BY_HASH, BENCH_HASH, 0)
+
+        base = await timed("baseline pool + dict", args.queries, fetch_baseline)
+        await baseline_pool.close()
+        await timed(
+            "db.fetch_one + dict", args.queries,
+            lambda: db.fetch_one(PDF_CONTENT_BY_HASH, BENCH_HASH, 0)
+        )
+        record = await timed(
+            "db.fetch_one + Record", args.queries,
+            lambda: db.fetch_one(PDF_CONTENT_BY_HASH, BENCH_HASH, 0, record=True)
+        )
+        print(f"{'Record vs baseline':28} {base / record:10.2f}x")
+    finally:
+        await db.execute(
+            "DELETE FROM telecom.pdf_content_cache WHERE content_hash = $1", BENCH_HASH
+        )
+        await db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--content-size", type=int, default=2000)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,73 @@
+# app/scripts/bench_hebrew_normalizer.py
+"""
+Compare the previous multi-pass _fix_hebrew_text with normalize_hebrew on
+the sample bills in pdf-test/, and check that both produce the same text
+once render_rtl adds back the markup the old function inlined.
+
+Usage:
+    python app/scripts/bench_hebrew_normalizer.py --repeat 200
+
+Each bill is extracted once with PyPDF2; only normalization is timed.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+import PyPDF2
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from app.services.pdf_content.hebrew import normalize_hebrew, render_rtl
+
+def legacy_fix_hebrew_text(text: str) -> str:
+    """PDFService._fix_hebrew_text before the translation-table rewrite"""
+    if not text:
+        return ""
+    text = re.sub(r'(?<=[\u0590-\u05ff])\s+(?=[\u0590-\u05ff])', '', text)
+    hebrew_replacements = {
+        '×': 'א', '÷': 'ח', 'ñ': 'ם', 'í': 'ן', 'ó': 'ס', 'ú': 'ץ', 'ö': 'צ',
+        '\u200e': '', '\u200f': '', '\u202a': '', '\u202b': '', '\u202c': '', '¬': '',
+    }
+    for old, new in hebrew_replacements.items():
+        text = text.replace(old, new)
+    text = re.sub(r'[\u0591-\u05c7]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = text.strip()
+    return re.sub(r'([\u0590-\u05ff]+)', lambda m: f'[{m.group(1)}]{{dir="rtl"}}', text)
+
+def timed(label: str, texts, repeat: int, normalize) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            normalize(text)
+    elapsed = time.perf_counter() - start
+    per_bill = elapsed / (repeat * len(texts))
+    print(f"{label:22} {per_bill * 1e3:8.3f} ms/bill")
+    return per_bill
+
+def run(args):
+    paths = sorted(glob.glob(os.path.join(args.pdf_dir, "*.pdf")))
+    if not paths:
+        sys.exit(f"No PDFs in {args.pdf_dir}")
+
+    texts = []
+    for path in paths:
+        reader = PyPDF2.PdfReader(path)
+        text = '\n'.join(page.extract_text() for page in reader.pages)
+        texts.append(text)
+        print(f"{os.path.basename(path)}: {len(reader.pages)} pages, {len(text)} chars")
+        assert legacy_fix_hebrew_text(text) == render_rtl(normalize_hebrew(text)), f"output differs for {path}"
+
+    legacy = timed("legacy multi-pass", texts, args.repeat, legacy_fix_hebrew_text)
+    current = timed("normalize_hebrew", texts, args.repeat, normalize_hebrew)
+    print(f"speedup {legacy / current:.2f}x; cache hits now skip normalization entirely")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf-dir", default=os.path.join(project_root, "pdf-test"))
+    parser.add_argument("--repeat", type=int, default=200)
+    run(parser.parse_args())
@@ -0,0 +1,86 @@
+# app/scripts/bench_logging.py
+"""
+Time spent on the request thread by logging while processing a bill,
+the bulk of /chat's log volume outside the Claude call:
+
+  * sync:  FileHandler + StreamHandler on the root logger at DEBUG, the
+           way CustomLogger and PDFService._setup_logging were wired
+  * queue: app.core.logging.setup_logging at DEBUG (sampled dumps)
+  * queue: app.core.logging.setup_logging at INFO (the default)
+
+Usage:
+    python app/scripts/bench_logging.py --repeat 50 > /dev/null
+
+Results go to stderr. Log files are written under a temp directory.
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import PyPDF2
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from app.core import logging as app_logging
+from app.services.pdf_content.hebrew import normalize_hebrew
+from app.services.telecom_bill_processor import TelecomBillProcessor
+
+def load_bills():
+    bills = []
+    for path in sorted(glob.glob(os.path.join(project_root, "pdf-test", "*.pdf"))):
+        reader = PyPDF2.PdfReader(path)
+        bills.append(normalize_hebrew('\n'.join(page.extract_text() for page in reader.pages)))
+    if not bills:
+        sys.exit("No sample PDFs in pdf-test/")
+    return bills
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+def timed(label: str, bills, repeat: int) -> None:
+    processor = TelecomBillProcessor()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for bill in bills:
+            processor.process_bill(bill)
+    per_bill = (time.perf_counter() - start) / (repeat * len(bills))
+    print(f"{label:26} {per_bill * 1e3:8.3f} ms/bill", file=sys.stderr)
+
+def run(args):
+    bills = load_bills()
+    workdir = tempfile.mkdtemp(prefix="bench_logging_")
+
+    reset_root()
+    root = logging.getLogger()
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s')
+    for handler in (logging.FileHandler(os.path.join(workdir, "sync.log")), logging.StreamHandler(sys.stdout)):
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    timed("sync handlers, DEBUG", bills, args.repeat)
+    reset_root()
+
+    for level in ("DEBUG", "INFO"):
+        app_logging.setup_logging(
+            level=level,
+            log_file=os.path.join(workdir, f"queue_{level.lower()}.log"),
+            levels={},
+            sample_rate=args.sample_rate
+        )
+        timed(f"queue listener, {level}", bills, args.repeat)
+        app_logging.stop_logging()
+        reset_root()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--sample-rate", type=int, default=100)
+    run(parser.parse_args())
@@ -0,0 +1,116 @@
+# app/scripts/bench_multi_replace.py
+"""
+Throughput of BillTextProcessor's OCR-fix and section-marker tables on
+large synthetic bills:
+
+  * one str.replace per pattern (the previous implementation)
+  * MultiReplacer: one compiled alternation, one subn pass
+  * a pure-Python trie matcher (Aho-Corasick style), for reference
+
+Usage:
+    python app/scripts/bench_multi_replace.py --pages 200 --repeat 5
+
+Bills are built by repeating the text of the sample PDFs in pdf-test/
+with OCR errors sprinkled in.
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+import PyPDF2
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from app.services.bill_text_processor import BillTextProcessor
+
+class TrieMatcher:
+    """
+    Leftmost-longest, non-overlapping replacement over a pattern trie.
+
+    This is the matching half of Aho-Corasick. Failure links do not help
+    here: after a match the scan restarts past it, and without a match it
+    restarts one character later.
+    """
+
+    def __init__(self, replacements):
+        self.replacements = replacements
+        self.root = {}
+        for pattern in replacements:
+            node = self.root
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node[None] = pattern
+
+    def replace(self, text):
+        parts, count, last, i, size = [], 0, 0, 0, len(text)
+        root = self.root
+        while i < size:
+            node, j, best = root, i, None
+            while j < size and text[j] in node:
+                node = node[text[j]]
+                j += 1
+                if None in node:
+                    best = j
+            if best is None:
+                i += 1
+                continue
+            parts.append(text[last:i])
+            parts.append(self.replacements[text[i:best]])
+            count += 1
+            last = i = best
+        parts.append(text[last:])
+        return ''.join(parts), count
+
+def sequential(table, text):
+    for old, new in table.items():
+        text = text.replace(old, new)
+    return text
+
+def timed(label: str, repeat: int, chars: int, call) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:28} {elapsed * 1e3:9.2f} ms  {chars / elapsed / 1e6:7.2f} Mchar/s")
+    return elapsed
+
+def build_bill(pages: int, processor: BillTextProcessor) -> str:
+    texts = []
+    for path in sorted(glob.glob(os.path.join(project_root, "pdf-test", "*.pdf"))):
+        texts.extend(page.extract_text() for page in PyPDF2.PdfReader(path).pages)
+    if not texts:
+        sys.exit("No sample PDFs in pdf-test/")
+    random.seed(0)
+    noise = list(processor.ocr_fixes)
+    bill = []
+    for i in range(pages):
+        words = texts[i % len(texts)].split(' ')
+        for _ in range(len(words) // 50):
+            words.insert(random.randrange(len(words)), random.choice(noise))
+        bill.append(' '.join(words))
+    return '\n'.join(bill)
+
+def run(args):
+    processor = BillTextProcessor()
+    bill = build_bill(args.pages, processor)
+    print(f"synthetic bill: {args.pages} pages, {len(bill)} chars")
+
+    for name, replacer in (("OCR fixes", processor._ocr_replacer), ("section markers", processor._marker_replacer)):
+        table = replacer.replacements
+        automaton = TrieMatcher(table)
+        expected, count = replacer.replace(bill)
+        assert automaton.replace(bill) == (expected, count)
+        print(f"\n{name}: {len(table)} patterns, {count} replacements")
+        timed("str.replace per pattern", args.repeat, len(bill), lambda: sequential(table, bill))
+        timed("MultiReplacer (re.subn)", args.repeat, len(bill), lambda: replacer.replace(bill))
+        timed("pure-Python trie", args.repeat, len(bill), lambda: automaton.replace(bill))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    run(parser.parse_args())
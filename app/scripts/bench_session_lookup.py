@@ -0,0 +1,87 @@
+# app/scripts/bench_session_lookup.py
+"""
+Compare the old KEYS scan with the customer_session pointer lookup.
+
+Usage:
+    python app/scripts/bench_session_lookup.py --sessions 100000 --db 15
+
+Uses a scratch Redis database which is flushed before and after the run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from app.services.session.manager import SessionManager, SESSION_TTL
+
+def legacy_get_active_session(manager: SessionManager, customer_id: str):
+    """Previous implementation: KEYS session:* followed by a GET per key"""
+    for key in manager.redis.keys("session:*"):
+        session_data = manager.redis.get(key)
+        if session_data:
+            session = json.loads(session_data)
+            if session["customer_id"] == customer_id:
+                return session
+    return None
+
+def populate(manager: SessionManager, count: int) -> list:
+    customer_ids = []
+    pipe = manager.redis.pipeline(transaction=False)
+    now = datetime.utcnow().isoformat()
+    for i in range(count):
+        customer_id = f"bench{i}"
+        session_id = str(uuid.uuid4())
+        pipe.setex(f"session:{session_id}", SESSION_TTL, json.dumps({
+            "id": session_id,
+            "customer_id": customer_id,
+            "created_at": now,
+            "last_active": now
+        }))
+        pipe.setex(f"customer_session:{customer_id}", SESSION_TTL, session_id)
+        customer_ids.append(customer_id)
+        if i % 10000 == 0:
+            pipe.execute()
+    pipe.execute()
+    return customer_ids
+
+async def run(args):
+    manager = SessionManager(host=args.host, port=args.port, db=args.db)
+    manager.redis.flushdb()
+    try:
+        print(f"Populating {args.sessions} sessions...")
+        customer_ids = populate(manager, args.sessions)
+        targets = customer_ids[::max(1, len(customer_ids) // args.lookups)][:args.lookups]
+
+        start = time.perf_counter()
+        for customer_id in targets[:args.legacy_lookups]:
+            legacy_get_active_session(manager, customer_id)
+        legacy = (time.perf_counter() - start) / min(len(targets), args.legacy_lookups)
+
+        start = time.perf_counter()
+        for customer_id in targets:
+            await manager.get_active_session(customer_id)
+        pointer = (time.perf_counter() - start) / len(targets)
+
+        print(f"KEYS scan:       {legacy * 1000:10.3f} ms/lookup")
+        print(f"Pointer lookup:  {pointer * 1000:10.3f} ms/lookup")
+        print(f"Speedup:         {legacy / pointer:10.1f}x")
+    finally:
+        manager.redis.flushdb()
+        await manager.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6380)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--legacy-lookups", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
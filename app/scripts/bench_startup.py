@@ -0,0 +1,64 @@
+# app/scripts/bench_startup.py
+"""
+Cold startup time of the Postgres pool plus service warm-up:
+
+  * sequential: db.connect(), then each service built in turn (the old
+    lifespan order, with services built at import)
+  * parallel: db.connect() and container.warm() under one gather, as
+    main.lifespan does now
+
+Usage:
+    python app/scripts/bench_startup.py --runs 5
+
+Each run is a fresh interpreter, so module imports are cold. Needs the
+SESSION_DB_* settings to point at a reachable database. Redis is left
+out: its PING is a single round trip either way.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+# pdf_service is left out: it creates its PDF directory on construction
+SERVICES = ("redis_client", "rate_limit_service", "claude_service", "bill_processor", "query_processor")
+
+async def startup(mode: str) -> float:
+    from app.core.container import container
+    from app.core.database import db
+
+    start = time.perf_counter()
+    if mode == "sequential":
+        await db.connect()
+        for name in SERVICES:
+            container.get(name)
+    else:
+        await asyncio.gather(db.connect(), container.warm(SERVICES))
+    elapsed = time.perf_counter() - start
+    await db.disconnect()
+    return elapsed
+
+def run(args):
+    if args.mode:
+        print(asyncio.run(startup(args.mode)))
+        return
+    for mode in ("sequential", "parallel"):
+        timings = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode],
+                capture_output=True, text=True, check=True
+            ).stdout
+            timings.append(float(out.strip().splitlines()[-1]))
+        print(f"{mode:11} median {statistics.median(timings) * 1e3:7.1f} ms  min {min(timings) * 1e3:7.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mode", choices=("sequential", "parallel"))
+    run(parser.parse_args())
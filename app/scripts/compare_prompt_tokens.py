@@ -0,0 +1,95 @@
+# app/scripts/compare_prompt_tokens.py
+"""
+Report prompt size with and without per-word RTL markup for the sample
+bills in pdf-test/.
+
+  * markup: bill text as the old normalizer stored it (every Hebrew run
+    wrapped as [run]{dir="rtl"}) inside the old ClaudeService template
+  * plain: normalize_hebrew output inside the current template
+
+Usage:
+    python app/scripts/compare_prompt_tokens.py
+
+Token counts come from the anthropic SDK's local tokenizer when the
+package is installed. That tokenizer predates the current models, so
+treat the counts as relative; the character counts are exact.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+
+import PyPDF2
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+
+from app.services.pdf_content.hebrew import normalize_hebrew, render_rtl
+
+# ClaudeService.get_response template before markup was dropped
+MARKUP_TEMPLATE = """[אתה נציג שירות לקוחות של פלאפון המנתח חשבונית]{dir="rtl"}.
+
+    === [תוכן החשבונית]{dir="rtl"} ===
+    {content}
+    =====================
+
+    [הנחיות]{dir="rtl"}:
+    1. [התייחס אך ורק למידע שמופיע בחשבונית למעלה]{dir="rtl"}
+    2. [כשמדובר בסכומים, השתמש תמיד בסימן ₪]{dir="rtl"}
+    3. [אם המידע המבוקש לא נמצא בחשבונית, ציין זאת בבירור]{dir="rtl"}
+    4. [בתשובתך התייחס לתקופת החיוב הרלוונטית]{dir="rtl"}
+
+    [שאלת הלקוח]{dir="rtl"}: {question}"""
+PLAIN_TEMPLATE = re.sub(r'\[([^\]\n]*)\]\{dir="rtl"\}', r'\1', MARKUP_TEMPLATE)
+
+def token_counter():
+    try:
+        from anthropic import Anthropic
+    except ImportError:
+        return None
+    client = Anthropic(api_key="unused-for-local-counting")
+    return client.count_tokens
+
+def build(template: str, content: str, question: str) -> str:
+    return template.replace("{content}", content).replace("{question}", question)
+
+def run(args):
+    paths = sorted(glob.glob(os.path.join(args.pdf_dir, "*.pdf")))
+    if not paths:
+        sys.exit(f"No PDFs in {args.pdf_dir}")
+    count_tokens = token_counter()
+    if count_tokens is None:
+        print("anthropic not installed; reporting characters only")
+
+    totals = {"markup": [0, 0], "plain": [0, 0]}
+    print(f"{'bill':24} {'markup chars':>13} {'plain chars':>12} {'markup tok':>11} {'plain tok':>10} {'saved':>7}")
+    for path in paths:
+        reader = PyPDF2.PdfReader(path)
+        plain_text = normalize_hebrew('\n'.join(page.extract_text() for page in reader.pages))
+        prompts = {
+            "markup": build(MARKUP_TEMPLATE, render_rtl(plain_text), args.question),
+            "plain": build(PLAIN_TEMPLATE, plain_text, args.question),
+        }
+        row = {}
+        for mode, prompt in prompts.items():
+            tokens = count_tokens(prompt) if count_tokens else 0
+            row[mode] = (len(prompt), tokens)
+            totals[mode][0] += len(prompt)
+            totals[mode][1] += tokens
+        saved = 1 - (row["plain"][1] / row["markup"][1] if count_tokens else row["plain"][0] / row["markup"][0])
+        print(
+            f"{os.path.basename(path):24} {row['markup'][0]:13} {row['plain'][0]:12} "
+            f"{row['markup'][1]:11} {row['plain'][1]:10} {saved:7.1%}"
+        )
+
+    markup_chars, markup_tokens = totals["markup"]
+    plain_chars, plain_tokens = totals["plain"]
+    saved = 1 - (plain_tokens / markup_tokens if count_tokens else plain_chars / markup_chars)
+    print(f"{'total':24} {markup_chars:13} {plain_chars:12} {markup_tokens:11} {plain_tokens:10} {saved:7.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf-dir", default=os.path.join(project_root, "pdf-test"))
+    parser.add_argument("--question", default="כמה אני משלם על שירות תיקונים?")
+    run(parser.parse_args())
@@ -1,7 +1,15 @@
 from typing import Dict, List, Optional
 import re
 from dataclasses import dataclass
-from app.utils.custom_logger import logger
+import logging
+from app.utils.multi_replace import MultiReplacer
+
+logger = logging.getLogger(__name__)
+
+_SHEKEL_SPACING = re.compile(r'(\d+)\s*₪')
+_THOUSANDS_SEPARATOR = re.compile(r'(\d),(\d)')
+_DATE = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+_PHONE = re.compile(r'(\d{3})-?(\d{7})')
 
 @dataclass
 class TextSegment:
@@ -14,7 +22,6 @@ class BillTextProcessor:
     """Text preprocessing layer for Telecom bill processing"""
 
     def __init__(self):
-        self.debug = True
         # Common Hebrew OCR fixes
         self.ocr_fixes = {
             'נוו': 'ניו',
@@ -40,6 +47,21 @@ class BillTextProcessor:
             }
         }
 
+        # Each table is applied in one pass instead of one replace per entry
+        self._ocr_replacer = MultiReplacer(self.ocr_fixes)
+        marker_replacements = {}
+        for section, markers in self.section_markers.items():
+            for start in markers["start"]:
+                marker_replacements[start] = f"[SECTION_{section.upper()}_START]{start}"
+            for end in markers["end"]:
+                marker_replacements[end] = f"{end}[SECTION_{section.upper()}_END]"
+        self._marker_replacer = MultiReplacer(marker_replacements)
+
+    @property
+    def debug(self) -> bool:
+        """Verbose tracing follows this module's logger level"""
+        return logger.isEnabledFor(logging.DEBUG)
+
     def process(self, text: str) -> str:
         """Main processing pipeline"""
         try:
@@ -63,17 +85,13 @@ class BillTextProcessor:
     def _fix_ocr_errors(self, text: str) -> str:
         """Fix common OCR errors in Hebrew text"""
         try:
-            fixed = text
-            for error, correction in self.ocr_fixes.items():
-                fixed = fixed.replace(error, correction)
+            fixed, fix_count = self._ocr_replacer.replace(text)
                 
             # Fix spacing around numbers
-            fixed = re.sub(r'(\d+)\s*₪', r'\1 ₪', fixed)
+            fixed = _SHEKEL_SPACING.sub(r'\1 ₪', fixed)
             
-            if self.debug:
-                diff_count = sum(1 for i, j in zip(text, fixed) if i != j)
-                if diff_count:
-                    logger.debug(f"Fixed {diff_count} OCR errors")
+            if self.debug and fix_count:
+                logger.debug(f"Fixed {fix_count} OCR errors")
                     
             return fixed
 
@@ -87,15 +105,13 @@ class BillTextProcessor:
             standardized = text
             
             # Standardize numbers with thousands separator
-            standardized = re.sub(r'(\d),(\d)', r'\1\2', standardized)
+            standardized = _THOUSANDS_SEPARATOR.sub(r'\1\2', standardized)
             
             # Standardize date formats
-            date_pattern = r'(\d{2})/(\d{2})/(\d{4})'
-            standardized = re.sub(date_pattern, r'\1/\2/\3', standardized)
+            standardized = _DATE.sub(r'\1/\2/\3', standardized)
 
             # Standardize phone numbers
-            phone_pattern = r'(\d{3})-?(\d{7})'
-            standardized = re.sub(phone_pattern, r'\1-\2', standardized)
+            standardized = _PHONE.sub(r'\1-\2', standardized)
 
             return standardized
 
@@ -106,18 +122,9 @@ class BillTextProcessor:
     def _add_section_markers(self, text: str) -> str:
         """Add machine-readable markers for section identification"""
         try:
-            marked = text
-            for section, markers in self.section_markers.items():
-                for start in markers["start"]:
-                    marked = marked.replace(
-                        start,
-                        f"[SECTION_{section.upper()}_START]{start}"
-                    )
-                for end in markers["end"]:
-                    marked = marked.replace(
-                        end,
-                        f"{end}[SECTION_{section.upper()}_END]"
-                    )
+            marked, marker_count = self._marker_replacer.replace(text)
+            if self.debug and marker_count:
+                logger.debug(f"Added {marker_count} section markers")
             return marked
 
         except Exception as e:
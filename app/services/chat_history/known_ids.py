@@ -0,0 +1,127 @@
+from typing import Iterable, Optional
+from collections import OrderedDict
+import logging
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# KEYS: ids zset  ARGV: now, expires at, max size, key ttl, ids...
+# Scores are expiry times, so expired ids and the oldest ids over the cap
+# are trimmed on every add
+ADD_SCRIPT = """
+for i = 5, #ARGV do
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[i])
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+local excess = redis.call('ZCARD', KEYS[1]) - tonumber(ARGV[3])
+if excess > 0 then
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, excess - 1)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return excess
+"""
+
+class KnownIdCache:
+    """
+    Bounded TTL/LRU set of ids already confirmed to exist in Postgres.
+
+    Customers and sessions are never deleted mid-conversation, so once an id
+    is known we can skip the SELECT EXISTS / upsert for it. When a Redis
+    client is given the set is shared between workers as well, as a sorted
+    set scored by each id's expiry and capped at max_size.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = settings.KNOWN_IDS_MAX_SIZE,
+        ttl: int = settings.KNOWN_IDS_TTL,
+        redis_client=None
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = redis_client
+        self.redis_key = f"known_ids:{name}:expiry"
+        self._add_script = redis_client.register_script(ADD_SCRIPT) if redis_client is not None else None
+        # id -> expiry timestamp, least recently used first
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    def _contains_local(self, key: str) -> bool:
+        expires = self._entries.get(key)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._entries[key]
+            return False
+        self._entries.move_to_end(key)
+        return True
+
+    def _add_local(self, key: str, ttl: Optional[float] = None) -> None:
+        self._entries[key] = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def contains(self, value) -> bool:
+        key = str(value)
+        if self._contains_local(key):
+            return True
+        if self.redis is None:
+            return False
+        try:
+            expires = await self.redis.zscore(self.redis_key, key)
+            remaining = (expires or 0) - time.time()
+            if remaining > 0:
+                self._add_local(key, remaining)
+                return True
+        except Exception as e:
+            logger.warning(f"Known id lookup failed for {self.name}: {e}")
+        return False
+
+    async def add(self, values: Iterable) -> None:
+        keys = [str(value) for value in values]
+        if not keys:
+            return
+        for key in keys:
+            self._add_local(key)
+        if self.redis is None:
+            return
+        now = time.time()
+        try:
+            await self.redis.run_script(
+                self._add_script,
+                keys=[self.redis_key],
+                args=[now, now + self.ttl, self.max_size, self.ttl, *keys]
+            )
+        except Exception as e:
+            logger.warning(f"Known id update failed for {self.name}: {e}")
+
+    async def preload(self) -> int:
+        """Fill the local set from the shared Redis set, up to max_size"""
+        if self.redis is None:
+            return 0
+        now = time.time()
+        try:
+            members = await self.redis.zrangebyscore(self.redis_key, now, "+inf", withscores=True)
+        except Exception as e:
+            logger.warning(f"Known id preload failed for {self.name}: {e}")
+            return 0
+        # Ascending by expiry, so the freshest ids survive the local cap
+        for key, expires in members[-self.max_size:]:
+            self._add_local(key, expires - now)
+        return min(len(members), self.max_size)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+def _shared_redis() -> Optional[object]:
+    if not settings.KNOWN_IDS_REDIS_BACKED:
+        return None
+    from app.core.redis import redis_client
+    return redis_client
+
+# Shared per process
+known_customers = KnownIdCache("customers", redis_client=_shared_redis())
+known_sessions = KnownIdCache("sessions", redis_client=_shared_redis())
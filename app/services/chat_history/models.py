@@ -27,5 +27,6 @@ class ChatMessage(BaseModel):
 
 class ChatHistoryResponse(BaseModel):
     messages: list[ChatMessage]
-    total_count: int
-    has_more: bool
\ No newline at end of file
+    has_more: bool
+    next_cursor: Optional[str] = None
+    total_count: Optional[int] = None
\ No newline at end of file
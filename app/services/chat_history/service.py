@@ -1,14 +1,48 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 from uuid import UUID
 from app.core.database import db
 from .models import ChatMessage, ChatHistoryResponse
+from .known_ids import known_customers, known_sessions
 import logging
+import base64
 import json
 import secrets
 
 logger = logging.getLogger(__name__)
 
+CUSTOMER_INSERT = db.named_query(
+    "chat_customer_insert",
+    """
+    INSERT INTO telecom.customers (id, created_at, metadata)
+    VALUES ($1, NOW(), $2)
+    ON CONFLICT (id) DO NOTHING
+    """
+)
+SESSION_UPSERT = db.named_query(
+    "chat_session_upsert",
+    """
+    INSERT INTO telecom.sessions
+    (id, customer_id, session_token, created_at, last_activity, expires_at, metadata)
+    VALUES ($1, $2, $3, NOW(), NOW(), $4, $5)
+    ON CONFLICT (id) DO UPDATE
+    SET last_activity = NOW(),
+        expires_at = EXCLUDED.expires_at
+    """
+)
+CHAT_MESSAGE_INSERT = db.named_query(
+    "chat_message_insert",
+    """
+    INSERT INTO telecom.chat_messages 
+    (session_id, message_type, content, pdf_context, metadata)
+    VALUES ($1, $2, $3, $4, $5)
+    RETURNING id
+    """
+)
+
+class InvalidCursorError(ValueError):
+    """A history cursor that did not come from encode_cursor"""
+
 class ChatHistoryService:
     SESSION_EXPIRY_MINUTES = 60 
     @staticmethod
@@ -23,6 +57,8 @@ class ChatHistoryService:
 
     async def ensure_customer_exists(self, customer_id: str) -> bool:
         """Ensure customer exists in the database"""
+        if await known_customers.contains(customer_id):
+            return True
         try:
             # First check if customer exists
             check_query = """
@@ -48,7 +84,8 @@ class ChatHistoryService:
                 }
                 await db.execute(create_query, customer_id, json.dumps(metadata))
                 logger.info(f"Created new customer record for {customer_id}")
-            
+
+            await known_customers.add([customer_id])
             return True
         except Exception as e:
             logger.error(f"Error ensuring customer exists: {e}")
@@ -57,6 +94,8 @@ class ChatHistoryService:
 
     async def ensure_session_exists(self, session_id: UUID, customer_id: str) -> bool:
         """Create session if it doesn't exist"""
+        if await known_sessions.contains(session_id):
+            return True
         try:
             await self.ensure_customer_exists(customer_id)
             check_query = """
@@ -93,83 +132,136 @@ class ChatHistoryService:
                     json.dumps(metadata)
                 )
                 logger.info(f"Created new session {session_id} with expiry {expires_at}")
-                return True
-            
+
+            await known_sessions.add([session_id])
             return True
         except Exception as e:
             logger.error(f"Error ensuring session exists: {e}")
             raise
 
+    @staticmethod
+    def customer_metadata() -> str:
+        return json.dumps({
+            'created_timestamp': datetime.utcnow().isoformat(),
+            'source': 'chat_service'
+        })
+
+    @staticmethod
+    def session_metadata(customer_id: str, expires_at: datetime) -> str:
+        return json.dumps({
+            'created_timestamp': datetime.utcnow().isoformat(),
+            'customer_id': customer_id,
+            'expires_at': expires_at.isoformat()
+        })
+
     async def save_message(self, message: ChatMessage) -> UUID:
-        """Save a chat message to the database"""
+        """Save a chat message, creating its customer and session, in one transaction"""
         try:
             customer_id = message.metadata.get('customer_id')
             if not customer_id:
                 raise ValueError("customer_id not found in message metadata")
 
-            update_session_query = """
-                UPDATE telecom.sessions 
-                SET last_activity = NOW(),
-                    expires_at = $2
-                WHERE id = $1
-            """
-            new_expiry = ChatHistoryService.calculate_expiry() 
-            await db.execute(
-                update_session_query,
-                str(message.session_id),
-                new_expiry
-            )
+            new_customer = not await known_customers.contains(customer_id)
+            expires_at = ChatHistoryService.calculate_expiry()
+            async with db.transaction() as tx:
+                if new_customer:
+                    await tx.execute(CUSTOMER_INSERT, customer_id, self.customer_metadata())
+                await tx.execute(
+                    SESSION_UPSERT,
+                    str(message.session_id),
+                    customer_id,
+                    self.generate_session_token(),
+                    expires_at,
+                    self.session_metadata(customer_id, expires_at)
+                )
+                message_id = await tx.fetch_val(
+                    CHAT_MESSAGE_INSERT,
+                    str(message.session_id),
+                    message.message_type,
+                    message.content,
+                    str(message.pdf_context) if message.pdf_context else None,
+                    json.dumps(message.metadata)
+                )
 
-            await self.ensure_session_exists(message.session_id, customer_id)
-            query = """
-                INSERT INTO telecom.chat_messages 
-                (session_id, message_type, content, pdf_context, metadata)
-                VALUES ($1, $2, $3, $4, $5)
-                RETURNING id
-            """
-            metadata_json = json.dumps(message.metadata)
-            message_id = await db.fetch_one(
-                query,
-                str(message.session_id),
-                message.message_type,
-                message.content,
-                str(message.pdf_context) if message.pdf_context else None,
-                metadata_json
-            )
-            return message_id['id']
+            await known_customers.add([customer_id])
+            await known_sessions.add([message.session_id])
+            return message_id
         except Exception as e:
             logger.error(f"Error saving chat message: {e}")
             raise
 
+    @staticmethod
+    def encode_cursor(created_at: datetime, message_id: UUID) -> str:
+        """Encode the (created_at, id) keyset position of a message"""
+        raw = f"{created_at.isoformat()}|{message_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Tuple[Optional[datetime], Optional[str]]:
+        """Decode a cursor from encode_cursor, (None, None) for the first page"""
+        if not cursor:
+            return None, None
+        try:
+            created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), str(UUID(message_id))
+        except Exception:
+            raise InvalidCursorError(f"Invalid history cursor: {cursor}")
+
+    def _build_page(self, rows: List[dict], limit: int, include_count: bool) -> ChatHistoryResponse:
+        """Build a response from limit+1 rows ordered by (created_at, id) DESC"""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        total = None
+        if include_count:
+            total = rows[0]['total_count'] if rows else 0
+
+        messages = []
+        for row in rows:
+            row.pop('total_count', None)
+            if isinstance(row.get('metadata'), str):
+                row['metadata'] = json.loads(row['metadata'])
+            messages.append(ChatMessage(**row))
+
+        next_cursor = None
+        if has_more:
+            next_cursor = self.encode_cursor(messages[-1].created_at, messages[-1].id)
+
+        return ChatHistoryResponse(
+            messages=messages,
+            has_more=has_more,
+            next_cursor=next_cursor,
+            total_count=total
+        )
+
     async def get_session_history(
         self, 
         session_id: UUID, 
         limit: int = 50,
-        offset: int = 0
+        cursor: Optional[str] = None,
+        include_count: bool = False
     ) -> ChatHistoryResponse:
-        """Get chat history for a session"""
+        """
+        Get chat history for a session, newest first.
+
+        Pass next_cursor from the previous page to continue. include_count adds
+        a COUNT(*) OVER () column (messages from the cursor onwards), which
+        reads every matching row, so leave it off for plain scrolling.
+        """
         try:
-            # Get messages
-            query = """
+            before_created, before_id = self.decode_cursor(cursor)
+            count_column = ", COUNT(*) OVER () AS total_count" if include_count else ""
+            query = f"""
                 SELECT 
                     id, session_id, message_type, content, 
-                    created_at, pdf_context, metadata
+                    created_at, pdf_context, metadata{count_column}
                 FROM telecom.chat_messages
                 WHERE session_id = $1
-                ORDER BY created_at DESC
-                LIMIT $2 OFFSET $3
+                AND ($2::timestamptz IS NULL OR (created_at, id) < ($2::timestamptz, $3::uuid))
+                ORDER BY created_at DESC, id DESC
+                LIMIT $4
             """
-            messages = await db.fetch_all(query, str(session_id), limit, offset)
-            
-            # Get total count
-            count_query = "SELECT COUNT(*) FROM telecom.chat_messages WHERE session_id = $1"
-            total = await db.fetch_val(count_query, str(session_id))
-            
-            return ChatHistoryResponse(
-                messages=[ChatMessage(**msg) for msg in messages],
-                total_count=total,
-                has_more=total > (offset + limit)
-            )
+            rows = await db.fetch_all(query, str(session_id), before_created, before_id, limit + 1, replica=True)
+            return self._build_page(rows, limit, include_count)
         except Exception as e:
             logger.error(f"Error getting session history: {e}")
             raise
@@ -179,50 +271,53 @@ class ChatHistoryService:
         customer_id: str,
         days: int = 30,
         limit: int = 100,
-        offset: int = 0
+        cursor: Optional[str] = None,
+        include_count: bool = False
     ) -> ChatHistoryResponse:
-        """Get chat history for a customer across all sessions"""
+        """Get chat history for a customer across all sessions, newest first"""
         try:
-            query = """
+            before_created, before_id = self.decode_cursor(cursor)
+            count_column = ", COUNT(*) OVER () AS total_count" if include_count else ""
+            query = f"""
                 SELECT 
                     cm.id, cm.session_id, cm.message_type, cm.content,
-                    cm.created_at, cm.pdf_context, cm.metadata
-                FROM telecom.chat_messages cm
-                JOIN telecom.sessions s ON cm.session_id = s.id
-                WHERE s.customer_id = $1
-                AND cm.created_at > NOW() - INTERVAL '$2 days'
-                ORDER BY cm.created_at DESC
-                LIMIT $3 OFFSET $4
-            """
-            messages = await db.fetch_all(query, customer_id, days, limit, offset)
-            
-            # Get total count
-            count_query = """
-                SELECT COUNT(*)
+                    cm.created_at, cm.pdf_context, cm.metadata{count_column}
                 FROM telecom.chat_messages cm
                 JOIN telecom.sessions s ON cm.session_id = s.id
                 WHERE s.customer_id = $1
-                AND cm.created_at > NOW() - INTERVAL '$2 days'
+                AND cm.created_at > NOW() - make_interval(days => $2)
+                AND ($3::timestamptz IS NULL OR (cm.created_at, cm.id) < ($3::timestamptz, $4::uuid))
+                ORDER BY cm.created_at DESC, cm.id DESC
+                LIMIT $5
             """
-            total = await db.fetch_val(count_query, customer_id, days)
-            
-            return ChatHistoryResponse(
-                messages=[ChatMessage(**msg) for msg in messages],
-                total_count=total,
-                has_more=total > (offset + limit)
-            )
+            rows = await db.fetch_all(query, customer_id, days, before_created, before_id, limit + 1, replica=True)
+            return self._build_page(rows, limit, include_count)
         except Exception as e:
             logger.error(f"Error getting customer history: {e}")
             raise
 
-    async def cleanup_old_history(self, days: int = 90):
-        """Cleanup chat history older than specified days"""
+    async def cleanup_old_history(self, days: int = 90) -> int:
+        """Detach and drop chat_messages partitions older than specified days"""
         try:
-            await db.execute(
-                "SELECT telecom.cleanup_old_chat_messages()"
+            dropped = await db.fetch_val(
+                "SELECT telecom.drop_expired_chat_message_partitions(make_interval(days => $1))",
+                days
             )
+            logger.info(f"Dropped {dropped} expired chat history partitions")
+            return dropped
         except Exception as e:
             logger.error(f"Error cleaning up chat history: {e}")
             raise
 
+    async def ensure_future_partitions(self, months_ahead: int = 3) -> None:
+        """Create chat_messages partitions for the coming months"""
+        try:
+            await db.execute(
+                "SELECT telecom.ensure_chat_message_partitions($1)",
+                months_ahead
+            )
+        except Exception as e:
+            logger.error(f"Error creating chat history partitions: {e}")
+            raise
+
 chat_history_service = ChatHistoryService()
\ No newline at end of file
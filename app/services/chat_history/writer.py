@@ -0,0 +1,227 @@
+from typing import List, Optional
+from pathlib import Path
+from uuid import UUID, uuid4
+import asyncio
+import json
+import logging
+from app.core.config import settings
+from app.core.database import db
+from .models import ChatMessage
+from .service import ChatHistoryService, CUSTOMER_INSERT, SESSION_UPSERT
+from .known_ids import known_customers, known_sessions
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE classes for errors caused by a row's own data: 22 data exception
+# (e.g. value too long), 23 integrity constraint violation (e.g. FK)
+ROW_ERROR_CLASSES = ("22", "23")
+
+def _is_row_error(error: Exception) -> bool:
+    sqlstate = getattr(error, "sqlstate", None) or ""
+    return sqlstate[:2] in ROW_ERROR_CLASSES
+
+class ChatHistoryWriter:
+    """
+    Write-behind buffer for chat messages.
+
+    Messages are collected in memory and flushed every flush_ms milliseconds
+    or once batch_size messages are waiting, in a single transaction.
+    Batches that cannot be written are appended to a local JSONL spool and
+    replayed after the next successful flush or on startup. When Postgres
+    rejects a batch because of its data, the batch is bisected so the
+    good rows are written and each row that fails on its own goes to the
+    dead-letter file instead of poisoning the spool.
+    """
+
+    def __init__(
+        self,
+        flush_ms: int = settings.CHAT_HISTORY_FLUSH_MS,
+        batch_size: int = settings.CHAT_HISTORY_BATCH_SIZE,
+        spool_path: str = settings.CHAT_HISTORY_SPOOL_PATH,
+        dead_letter_path: str = settings.CHAT_HISTORY_DEAD_LETTER_PATH
+    ):
+        self.flush_interval = flush_ms / 1000
+        self.batch_size = batch_size
+        self.spool_path = Path(spool_path)
+        self.dead_letter_path = Path(dead_letter_path)
+        self._buffer: List[ChatMessage] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, message: ChatMessage) -> UUID:
+        """Buffer a message for writing and return its id immediately"""
+        if not message.metadata.get('customer_id'):
+            raise ValueError("customer_id not found in message metadata")
+        if message.id is None:
+            message.id = uuid4()
+
+        self._buffer.append(message)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return message.id
+
+    async def flush(self) -> int:
+        """Write all buffered messages, spooling them to disk on failure"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            batch, self._buffer = self._buffer, []
+            try:
+                await self._write_isolating(batch)
+            except Exception as e:
+                logger.error(f"Error flushing {len(batch)} chat messages, spooling: {e}")
+                await asyncio.to_thread(self._spool, batch)
+                return 0
+
+        if self.spool_path.exists():
+            await self._replay_spool()
+        return len(batch)
+
+    async def _write_isolating(self, batch: List[ChatMessage]) -> None:
+        """
+        Write a batch, bisecting it on row errors until bad rows stand alone.
+
+        Other errors (connection loss, timeouts) propagate so the caller
+        spools the whole batch; halves already written are skipped on
+        replay by ON CONFLICT DO NOTHING.
+        """
+        try:
+            await self._write_batch(batch)
+            return
+        except Exception as e:
+            if not _is_row_error(e):
+                raise
+            if len(batch) == 1:
+                logger.error(f"Dead-lettering chat message {batch[0].id}: {e}")
+                await asyncio.to_thread(self._append_jsonl, self.dead_letter_path, batch)
+                return
+        middle = len(batch) // 2
+        await self._write_isolating(batch[:middle])
+        await self._write_isolating(batch[middle:])
+
+    async def _write_batch(self, batch: List[ChatMessage]) -> None:
+        sessions = {}
+        for message in batch:
+            sessions[str(message.session_id)] = message.metadata['customer_id']
+        customers = set()
+        for customer_id in set(sessions.values()):
+            if not await known_customers.contains(customer_id):
+                customers.add(customer_id)
+
+        expires_at = ChatHistoryService.calculate_expiry()
+
+        async with db.transaction() as tx:
+            if customers:
+                await tx.executemany(
+                    CUSTOMER_INSERT,
+                    [
+                        (customer_id, ChatHistoryService.customer_metadata())
+                        for customer_id in customers
+                    ]
+                )
+            await tx.executemany(
+                SESSION_UPSERT,
+                [
+                    (
+                        session_id,
+                        customer_id,
+                        ChatHistoryService.generate_session_token(),
+                        expires_at,
+                        ChatHistoryService.session_metadata(customer_id, expires_at)
+                    )
+                    for session_id, customer_id in sessions.items()
+                ]
+            )
+            await tx.executemany(
+                """
+                INSERT INTO telecom.chat_messages
+                (id, session_id, message_type, content, created_at, pdf_context, metadata)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                ON CONFLICT (id, created_at) DO NOTHING
+                """,
+                [
+                    (
+                        str(message.id),
+                        str(message.session_id),
+                        message.message_type,
+                        message.content,
+                        message.created_at,
+                        str(message.pdf_context) if message.pdf_context else None,
+                        json.dumps(message.metadata)
+                    )
+                    for message in batch
+                ]
+            )
+
+        await known_customers.add(customers)
+        await known_sessions.add(sessions)
+
+    def _spool(self, batch: List[ChatMessage]) -> None:
+        self._append_jsonl(self.spool_path, batch)
+
+    @staticmethod
+    def _append_jsonl(path: Path, batch: List[ChatMessage]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for message in batch:
+                f.write(message.model_dump_json() + '\n')
+            f.flush()
+
+    async def _replay_spool(self) -> None:
+        """Load spooled messages back into the buffer and write them"""
+        async with self._flush_lock:
+            try:
+                with open(self.spool_path, encoding='utf-8') as f:
+                    spooled = [ChatMessage.model_validate_json(line) for line in f if line.strip()]
+                self.spool_path.unlink()
+            except FileNotFoundError:
+                return
+            except Exception as e:
+                logger.error(f"Error reading chat history spool {self.spool_path}: {e}")
+                return
+
+            logger.info(f"Replaying {len(spooled)} spooled chat messages")
+            self._buffer = spooled + self._buffer
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Chat history writer error: {e}")
+
+    async def start(self) -> None:
+        """Replay any spool left by a previous run and start flushing"""
+        if self.spool_path.exists():
+            await self._replay_spool()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out or spool everything buffered"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            try:
+                await self._write_isolating(batch)
+            except Exception as e:
+                logger.error(f"Error writing chat history on shutdown, spooling {len(batch)} messages: {e}")
+                self._spool(batch)
+
+chat_history_writer = ChatHistoryWriter()
@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict
-import aiohttp
+from contextlib import asynccontextmanager
 import json
 import re
 import os
@@ -8,14 +8,14 @@ import logging
 from dotenv import load_dotenv
 from pathlib import Path
 from datetime import datetime
-from app.services.rate_limiting.service import RateLimitService, rate_limit_service
+from app.core.logging import SAMPLED, LazyJson
+from app.services.rate_limiting.service import RateLimitService
 
 logger = logging.getLogger(__name__)
 
 class ClaudeService:
     def __init__(self, rate_limit_service: RateLimitService):
         """Initialize Claude service with rate limiting"""
-        self.debug = True
         self._load_environment()
         self.api_url = "https://api.anthropic.com/v1/messages"
         self.model = "claude-3-sonnet-20240229"
@@ -25,9 +25,37 @@ class ClaudeService:
             "content-type": "application/json"
         }
         self.rate_limiter = rate_limit_service
+        # Shared aiohttp session, opened by start() so connections are reused
+        self._session = None
         
-        if self.debug:
-            print("Claude service initialized with rate limiting")
+        logger.info("Claude service initialized with rate limiting")
+
+    async def start(self) -> None:
+        """Open the shared HTTP session"""
+        # aiohttp is imported here to keep it off the import path
+        import aiohttp
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @asynccontextmanager
+    async def _http_session(self):
+        """The shared session, or a one-off session before start()"""
+        if self._session is not None and not self._session.closed:
+            yield self._session
+            return
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            yield session
+
+    @property
+    def debug(self) -> bool:
+        """Verbose tracing follows this module's logger level"""
+        return logger.isEnabledFor(logging.DEBUG)
 
     def _load_environment(self):
         """Load and validate environment variables"""
@@ -37,10 +65,9 @@ class ClaudeService:
             
             if env_path.exists():
                 load_dotenv(str(env_path))
-                if self.debug:
-                    print(f"Loaded environment from {env_path}")
+                logger.debug("Loaded environment from %s", env_path)
             else:
-                print(f"Warning: No .env file found at {env_path}")
+                logger.warning("No .env file found at %s", env_path)
                 
             self.api_key = os.getenv("ANTHROPIC_API_KEY", "").strip().strip('\"\'')
             
@@ -50,8 +77,7 @@ class ClaudeService:
                     f"Checked location: {env_path}"
                 )
             
-            if self.debug:
-                print("API key loaded successfully")
+            logger.debug("API key loaded successfully")
                 
         except Exception as e:
             raise Exception(f"Environment loading failed: {str(e)}")
@@ -66,50 +92,47 @@ class ClaudeService:
     ) -> str:
         """Get response from Claude using rate-limited access"""
         try:
-            print("\n=== Starting Claude Request ===")
-            print(f"Customer ID: {customer_id}")
-            print(f"Message: {message}")
+            logger.debug("Starting Claude request for %s: %s", customer_id, message)
             
             # Check if this is a JSON request for customer info
             is_json_request = any(term in message.lower() for term in ['json', 'format', 'name', 'plan'])
-            print(f"Is JSON request: {is_json_request}")
+            logger.debug("Is JSON request: %s", is_json_request)
 
             # Build prompt based on request type
             if is_json_request:
                 prompt = """Extract and return a JSON object with this exact format:
     {{
-        "name": "[שם הלקוח המלא]{{dir=\"rtl\"}}",
-        "plan": "[שם תכנית/מסלול]{{dir=\"rtl\"}}"
+        "name": "שם הלקוח המלא",
+        "plan": "שם תכנית/מסלול"
     }}
 
-    [החשבונית]{{dir=\"rtl\"}}:
+    החשבונית:
     {content}"""
             else:
-                prompt = """[אתה נציג שירות לקוחות של פלאפון המנתח חשבונית]{{dir=\"rtl\"}}.
+                prompt = """אתה נציג שירות לקוחות של פלאפון המנתח חשבונית.
 
-    === [תוכן החשבונית]{{dir=\"rtl\"}} ===
+    === תוכן החשבונית ===
     {content}
     =====================
 
-    [הנחיות]{{dir=\"rtl\"}}:
-    1. [התייחס אך ורק למידע שמופיע בחשבונית למעלה]{{dir=\"rtl\"}}
-    2. [כשמדובר בסכומים, השתמש תמיד בסימן ₪]{{dir=\"rtl\"}}
-    3. [אם המידע המבוקש לא נמצא בחשבונית, ציין זאת בבירור]{{dir=\"rtl\"}}
-    4. [בתשובתך התייחס לתקופת החיוב הרלוונטית]{{dir=\"rtl\"}}
+    הנחיות:
+    1. התייחס אך ורק למידע שמופיע בחשבונית למעלה
+    2. כשמדובר בסכומים, השתמש תמיד בסימן ₪
+    3. אם המידע המבוקש לא נמצא בחשבונית, ציין זאת בבירור
+    4. בתשובתך התייחס לתקופת החיוב הרלוונטית
 
-    [שאלת הלקוח]{{dir=\"rtl\"}}: {question}"""
+    שאלת הלקוח: {question}"""
 
             # Format prompt
             formatted_prompt = prompt.format(
                 content=pdf_content,
                 question=message
             )
-            print(f"Formatted prompt length: {len(formatted_prompt)}")
+            logger.debug("Formatted prompt length: %d", len(formatted_prompt))
 
             # Make API call
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session() as session:
                 try:
-                    print("Making API call to Claude...")
                     
                     body = {
                         "model": self.model,
@@ -128,9 +151,8 @@ class ClaudeService:
                         json=body,
                         timeout=30
                     ) as response:
-                        print(f"Response status: {response.status}")
                         response_text = await response.text()
-                        print(f"Raw response start: {response_text[:200]}...")
+                        logger.debug("Claude response %s: %.200s", response.status, response_text)
                         
                         if response.status == 200:
                             try:
@@ -150,29 +172,28 @@ class ClaudeService:
                                     except:
                                         result = '{"name": "לקוח", "plan": "תכנית סטנדרטית"}'
                                 
-                                print(f"Final response: {result[:100]}...")
                                 return result
                             except json.JSONDecodeError:
                                 return "מצטער, קיבלתי תשובה לא תקינה מהשרת. אנא נסה שוב."
                         else:
-                            print(f"API Error: {response.status} - {response_text}")
+                            logger.error(f"Claude API error: {response.status} - {response_text}")
                             if is_json_request:
                                 return '{"name": "לקוח", "plan": "תכנית סטנדרטית"}'
                             return "מצטער, נתקלתי בבעיה בתקשורת עם השרת. אנא נסה שוב."
                             
                 except asyncio.TimeoutError:
-                    print("API request timed out")
+                    logger.warning("Claude API request timed out")
                     if is_json_request:
                         return '{"name": "לקוח", "plan": "תכנית סטנדרטית"}'
                     return "מצטער, התשובה לוקחת יותר מדי זמן. אנא נסה שוב."
                 except Exception as e:
-                    print(f"API request error: {str(e)}")
+                    logger.error(f"Claude API request error: {str(e)}")
                     if is_json_request:
                         return '{"name": "לקוח", "plan": "תכנית סטנדרטית"}'
                     return "מצטער, נתקלתי בבעיה בתקשורת עם השרת. אנא נסה שוב."
 
         except Exception as e:
-            print(f"Error in get_response: {str(e)}")
+            logger.error(f"Error in get_response: {str(e)}")
             if is_json_request:
                 return '{"name": "לקוח", "plan": "תכנית סטנדרטית"}'
             return "מצטער, נתקלתי בבעיה בעיבוד הבקשה. אנא נסה שוב."
@@ -223,7 +244,7 @@ Always answer in Hebrew and be specific about what information you find or don't
         """Process Claude's response data with better handling"""
         try:
             if self.debug:
-                print(f"Processing response data: {json.dumps(response_data, ensure_ascii=False)}")
+                logger.debug("Processing response data: %s", LazyJson(response_data), extra=SAMPLED)
 
             if isinstance(response_data, dict):
                 if 'content' in response_data and isinstance(response_data['content'], list):
@@ -242,12 +263,12 @@ Always answer in Hebrew and be specific about what information you find or don't
             return "מצטער, לא הצלחתי לנתח את החשבונית כראוי. אנא נסה שוב."
 
         except Exception as e:
-            print(f"Error processing Claude response: {str(e)}")
+            logger.error(f"Error processing Claude response: {str(e)}")
             return "מצטער, נתקלתי בבעיה בעיבוד התשובה. אנא נסה שוב."
 
     def _handle_error(self, error_msg: str) -> str:
         """Handle errors with user-friendly messages"""
-        print(f"Handling error: {error_msg}")
+        logger.warning("Handling error: %s", error_msg)
         
         if "API key" in error_msg:
             return "מצטער, יש בעיה בגישה למערכת. אנא פנה לתמיכה."
@@ -264,5 +285,12 @@ Always answer in Hebrew and be specific about what information you find or don't
 def create_claude_service(rate_limit_service: RateLimitService) -> ClaudeService:
     return ClaudeService(rate_limit_service)
 
-claude_service = create_claude_service(rate_limit_service)
+
+def __getattr__(name: str):
+    # Module-level singletons are built on first use by app.core.container
+    if name in ("claude_service",):
+        from app.core.container import container
+        return container.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = ['claude_service']
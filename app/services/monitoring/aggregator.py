@@ -0,0 +1,207 @@
+# app/services/monitoring/aggregator.py
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+from app.core.config import settings
+from app.core.database import db
+from app.services.monitoring.registry import metrics
+
+logger = logging.getLogger(__name__)
+
+METRICS_BUCKETS_DROPPED = metrics.counter(
+    "metrics_buckets_dropped_total",
+    "Rollup buckets discarded unwritten because METRICS_MAX_BUCKETS was reached"
+)
+
+@dataclass
+class MetricsBucket:
+    """Rolled-up rate limit metrics for one customer over one bucket"""
+    request_count: int = 0
+    error_count: int = 0
+    rate_limited_requests: int = 0
+    token_usage: int = 0
+    max_queue_length: int = 0
+    response_times: List[float] = field(default_factory=list)
+
+    def add(self, queue_length: int, rate_limited_requests: int, token_usage: int, response_time: float) -> None:
+        self.request_count += 1
+        self.max_queue_length = max(self.max_queue_length, queue_length)
+        # Callers pass the customer's running total, not a delta
+        self.rate_limited_requests = max(self.rate_limited_requests, rate_limited_requests)
+        self.token_usage += token_usage
+        if response_time < 0:
+            # -1 marks a failed request
+            self.error_count += 1
+        else:
+            self.response_times.append(response_time)
+
+    def merge(self, other: "MetricsBucket") -> None:
+        self.request_count += other.request_count
+        self.error_count += other.error_count
+        self.rate_limited_requests = max(self.rate_limited_requests, other.rate_limited_requests)
+        self.token_usage += other.token_usage
+        self.max_queue_length = max(self.max_queue_length, other.max_queue_length)
+        self.response_times.extend(other.response_times)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.response_times:
+            return None
+        ordered = sorted(self.response_times)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class MetricsAggregator:
+    """
+    Rolls rate limit metrics up per customer per bucket_seconds.
+
+    record() only touches memory. Closed buckets are written in the
+    background with a single multi-row INSERT every flush_seconds.
+    Buckets that fail to write are retried on the next flush, up to
+    max_buckets in memory; past that the oldest are dropped.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = settings.METRICS_BUCKET_SECONDS,
+        flush_seconds: float = settings.METRICS_FLUSH_SECONDS,
+        max_buckets: int = settings.METRICS_MAX_BUCKETS
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.flush_seconds = flush_seconds
+        self.max_buckets = max_buckets
+        self._buckets: Dict[Tuple[str, int], MetricsBucket] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        customer_id: str,
+        queue_length: int,
+        rate_limited_requests: int,
+        token_usage: int,
+        response_time: float
+    ) -> None:
+        bucket_start = int(time.time()) // self.bucket_seconds * self.bucket_seconds
+        key = (customer_id, bucket_start)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = MetricsBucket()
+        bucket.add(queue_length, rate_limited_requests, token_usage, response_time)
+
+    def _take_closed(self, include_open: bool = False) -> Dict[Tuple[str, int], MetricsBucket]:
+        """Remove and return buckets that can no longer receive records"""
+        current = int(time.time()) // self.bucket_seconds * self.bucket_seconds
+        closed = {
+            key: bucket for key, bucket in self._buckets.items()
+            if include_open or key[1] < current
+        }
+        for key in closed:
+            del self._buckets[key]
+        return closed
+
+    async def flush(self, include_open: bool = False) -> int:
+        """Write closed buckets (all buckets if include_open) in one INSERT"""
+        buckets = self._take_closed(include_open)
+        if not buckets:
+            return 0
+        try:
+            await self._write(buckets)
+        except Exception as e:
+            logger.error(f"Error writing {len(buckets)} metrics buckets: {str(e)}")
+            # Keep them for the next flush, merging with anything recorded since
+            for key, bucket in buckets.items():
+                existing = self._buckets.get(key)
+                if existing is None:
+                    self._buckets[key] = bucket
+                else:
+                    existing.merge(bucket)
+            self._drop_oldest()
+            return 0
+        return len(buckets)
+
+    def _drop_oldest(self) -> None:
+        """Trim retained buckets to max_buckets, oldest bucket_start first"""
+        excess = len(self._buckets) - self.max_buckets
+        if excess <= 0:
+            return
+        for key in sorted(self._buckets, key=lambda key: key[1])[:excess]:
+            del self._buckets[key]
+        METRICS_BUCKETS_DROPPED.inc(excess)
+        logger.warning(f"Dropped {excess} unwritten metrics buckets, over the limit of {self.max_buckets}")
+
+    async def _write(self, buckets: Dict[Tuple[str, int], MetricsBucket]) -> None:
+        rows = []
+        for (customer_id, bucket_start), bucket in buckets.items():
+            times = bucket.response_times
+            rows.append((
+                customer_id,
+                datetime.fromtimestamp(bucket_start, tz=timezone.utc),
+                self.bucket_seconds,
+                bucket.request_count,
+                bucket.error_count,
+                bucket.rate_limited_requests,
+                bucket.token_usage,
+                bucket.max_queue_length,
+                sum(times),
+                min(times) if times else None,
+                max(times) if times else None,
+                bucket.percentile(0.5),
+                bucket.percentile(0.95),
+                bucket.percentile(0.99),
+            ))
+
+        # One statement for the whole flush: columns go in as arrays
+        await db.execute(
+            """
+            INSERT INTO telecom.rate_limit_metrics_rollup
+            (customer_id, bucket_start, bucket_seconds, request_count, error_count,
+             rate_limited_requests, token_usage, max_queue_length, response_time_sum,
+             response_time_min, response_time_max, response_time_p50, response_time_p95,
+             response_time_p99)
+            SELECT * FROM unnest(
+                $1::varchar[], $2::timestamptz[], $3::int[], $4::int[], $5::int[],
+                $6::int[], $7::bigint[], $8::int[], $9::float8[],
+                $10::float8[], $11::float8[], $12::float8[], $13::float8[], $14::float8[]
+            )
+            ON CONFLICT (customer_id, bucket_start) DO UPDATE SET
+                request_count = rate_limit_metrics_rollup.request_count + EXCLUDED.request_count,
+                error_count = rate_limit_metrics_rollup.error_count + EXCLUDED.error_count,
+                rate_limited_requests = GREATEST(rate_limit_metrics_rollup.rate_limited_requests, EXCLUDED.rate_limited_requests),
+                token_usage = rate_limit_metrics_rollup.token_usage + EXCLUDED.token_usage,
+                max_queue_length = GREATEST(rate_limit_metrics_rollup.max_queue_length, EXCLUDED.max_queue_length),
+                response_time_sum = rate_limit_metrics_rollup.response_time_sum + EXCLUDED.response_time_sum,
+                response_time_min = LEAST(rate_limit_metrics_rollup.response_time_min, EXCLUDED.response_time_min),
+                response_time_max = GREATEST(rate_limit_metrics_rollup.response_time_max, EXCLUDED.response_time_max),
+                -- Late rows for an already written bucket: keep the worse percentile
+                response_time_p50 = GREATEST(rate_limit_metrics_rollup.response_time_p50, EXCLUDED.response_time_p50),
+                response_time_p95 = GREATEST(rate_limit_metrics_rollup.response_time_p95, EXCLUDED.response_time_p95),
+                response_time_p99 = GREATEST(rate_limit_metrics_rollup.response_time_p99, EXCLUDED.response_time_p99)
+            """,
+            *[list(column) for column in zip(*rows)]
+        )
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Metrics aggregator error: {str(e)}")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write every bucket, including open ones"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(include_open=True)
+
+metrics_aggregator = MetricsAggregator()
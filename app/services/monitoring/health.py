@@ -0,0 +1,115 @@
+# app/services/monitoring/health.py
+from typing import Awaitable, Callable, Dict, Optional
+from dataclasses import dataclass
+import asyncio
+import logging
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[bool]]
+
+@dataclass
+class ProbeResult:
+    healthy: bool
+    checked_at: float
+    latency_ms: float
+    error: Optional[str] = None
+
+class HealthMonitor:
+    """
+    Probes dependencies from one background task and caches the results.
+
+    /readyz and /health only read the cache, so a probe never waits on
+    Postgres or Redis. A result older than three intervals counts as down,
+    which covers a wedged probe loop.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.HEALTH_CHECK_INTERVAL,
+        timeout: float = settings.HEALTH_CHECK_TIMEOUT
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self._probes: Dict[str, Probe] = {}
+        self.results: Dict[str, ProbeResult] = {}
+        # Set once startup finishes, cleared first thing on shutdown
+        self.accepting = False
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Probe) -> None:
+        self._probes[name] = probe
+
+    async def _run_probe(self, name: str, probe: Probe) -> None:
+        start = time.perf_counter()
+        error = None
+        try:
+            healthy = bool(await asyncio.wait_for(probe(), self.timeout))
+        except asyncio.TimeoutError:
+            healthy, error = False, f"timed out after {self.timeout}s"
+        except Exception as e:
+            healthy, error = False, str(e)
+        previous = self.results.get(name)
+        if previous is not None and previous.healthy != healthy:
+            logger.warning(f"Health of {name} changed: {'up' if healthy else 'down'}{f' ({error})' if error else ''}")
+        self.results[name] = ProbeResult(
+            healthy=healthy,
+            checked_at=time.monotonic(),
+            latency_ms=(time.perf_counter() - start) * 1000,
+            error=error
+        )
+
+    async def check_once(self) -> None:
+        """Run every probe concurrently and store the results"""
+        await asyncio.gather(*(self._run_probe(name, probe) for name, probe in self._probes.items()))
+
+    def is_up(self, name: str) -> bool:
+        result = self.results.get(name)
+        if result is None or not result.healthy:
+            return False
+        return time.monotonic() - result.checked_at <= 3 * self.interval
+
+    def is_ready(self) -> bool:
+        return self.accepting and all(self.is_up(name) for name in self._probes)
+
+    def snapshot(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        snapshot = {}
+        for name in self._probes:
+            entry = {"status": "up" if self.is_up(name) else "down"}
+            result = self.results.get(name)
+            if result is not None:
+                entry["age_seconds"] = round(now - result.checked_at, 2)
+                entry["latency_ms"] = round(result.latency_ms, 2)
+                if result.error:
+                    entry["error"] = result.error
+            snapshot[name] = entry
+        return snapshot
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_once()
+            except Exception as e:
+                logger.error(f"Health monitor error: {str(e)}")
+
+    async def start(self) -> None:
+        """Probe once, then keep probing in the background"""
+        if self._task is None:
+            await self.check_once()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self.accepting = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+health_monitor = HealthMonitor()
@@ -1,10 +1,11 @@
 # app/services/monitoring/metrics_service.py
 
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 import logging
-from app.core.redis import redis_client
-from app.core.database import db
+from app.core.container import container
+from app.services.rate_limiting.service import QUEUE_STATS_KEY
+from .aggregator import metrics_aggregator
 from dataclasses import dataclass
 
 
@@ -35,8 +36,12 @@ class MetricsService:
     def __init__(self):
         self.update_interval = 5  # 5 seconds
         self.token_limit = 40000  # Claude's rate limit per minute
-        
-        
+
+    @property
+    def redis(self):
+        # Resolved on use, so importing this module does not build the client
+        return container.get("redis_client")
+
     async def get_rate_limit_metrics(self, customer_id: str) -> RateLimitMetrics:
         """Get current rate limiting metrics for a customer."""
         try:
@@ -48,8 +53,8 @@ class MetricsService:
                 f"avg_response_time:{customer_id}"
             ]
             
-            results = await redis_client.multi_get(keys)
-            queue_length = await redis_client.zcard(f"claude_queue:{customer_id}")
+            results = await self.redis.multi_get(keys)
+            queue_length = await self.redis.zcard(f"claude_queue:{customer_id}")
             
             return RateLimitMetrics(
                 queue_length=queue_length or 0,
@@ -61,21 +66,59 @@ class MetricsService:
             logger.error(f"Error fetching rate limit metrics: {str(e)}")
             return RateLimitMetrics(0, 0, 0, 0.0)
             
+    async def get_customer_metrics_batch(
+        self, customer_ids: List[str]
+    ) -> Dict[str, Tuple[RateLimitMetrics, TokenUsage]]:
+        """Rate limit and token metrics for many customers in one pipeline round trip."""
+        if not customer_ids:
+            return {}
+        try:
+            pipe = await self.redis.pipeline()
+            for customer_id in customer_ids:
+                pipe.zcard(f"claude_queue:{customer_id}")
+                pipe.get(f"rate_limit:{customer_id}")
+                pipe.get(f"token_usage:{customer_id}")
+                pipe.get(f"avg_response_time:{customer_id}")
+                pipe.ttl(f"token_usage:{customer_id}")
+            results = pipe.execute()
+        except Exception as e:
+            logger.error(f"Error fetching batched customer metrics: {str(e)}")
+            return {}
+
+        now = datetime.now().timestamp()
+        batch = {}
+        for i, customer_id in enumerate(customer_ids):
+            queue_length, rate_limited, usage, avg_response, ttl = results[i * 5:(i + 1) * 5]
+            used = int(usage or 0)
+            batch[customer_id] = (
+                RateLimitMetrics(
+                    queue_length=int(queue_length or 0),
+                    rate_limited_requests=int(rate_limited or 0),
+                    token_usage=used,
+                    avg_response_time=float(avg_response or 0)
+                ),
+                TokenUsage(
+                    used=used,
+                    remaining=max(0, self.token_limit - used),
+                    reset_time=datetime.fromtimestamp(now + (ttl if ttl and ttl > 0 else 60))
+                )
+            )
+        return batch
+
     async def get_queue_metrics(self) -> QueueMetrics:
         """Get current queue metrics."""
         try:
-            total_queued = await redis_client.zcard("claude_queue")
-            pending = await redis_client.zcount(
-                "claude_queue", 
-                "-inf", 
-                str(datetime.now().timestamp())
-            )
-            avg_wait = await self._calculate_average_wait_time()
+            now = datetime.now().timestamp()
+            pipe = await self.redis.pipeline()
+            pipe.zcard("claude_queue")
+            pipe.zcount("claude_queue", "-inf", str(now))
+            pipe.hmget(QUEUE_STATS_KEY, "count", "enqueue_sum")
+            total_queued, pending, (count, enqueue_sum) = pipe.execute()
 
             return QueueMetrics(
                 total_queued=int(total_queued or 0),
                 pending_requests=int(pending or 0),
-                avg_wait_time=float(avg_wait)
+                avg_wait_time=self._average_wait_time(count, enqueue_sum, now)
             )
         except Exception as e:
             logger.error(f"Error fetching queue metrics: {str(e)}")
@@ -87,13 +130,13 @@ class MetricsService:
             token_key = f"token_usage:{customer_id}"
             
             # Get multiple values at once
-            usage, ttl = await redis_client.multi_get([
+            usage, ttl = await self.redis.multi_get([
                 token_key,
                 f"rate_limit:{customer_id}"
             ])
             
             usage_int = int(usage) if usage else 0
-            ttl_int = await redis_client.ttl(token_key)
+            ttl_int = await self.redis.ttl(token_key)
             reset_time = datetime.now().timestamp() + (ttl_int if ttl_int > 0 else 60)
 
             return TokenUsage(
@@ -108,36 +151,19 @@ class MetricsService:
                 remaining=self.token_limit,
                 reset_time=datetime.fromtimestamp(datetime.now().timestamp() + 60)
             )
-    async def _calculate_average_wait_time(self) -> float:
-        """Calculate average wait time for requests in queue."""
-        try:
-            recent_requests = await redis_client.zrange(
-                "claude_queue", 
-                0, 
-                -1, 
-                withscores=True
-            )
-            
-            if not recent_requests:
-                return 0.0
 
-            total_wait = sum(float(score) for _, score in recent_requests)
-            return total_wait / len(recent_requests)
-        except Exception as e:
-            logger.error(f"Error calculating average wait time: {str(e)}")
+    @staticmethod
+    def _average_wait_time(count: Optional[str], enqueue_sum: Optional[str], now: float) -> float:
+        """Mean age in seconds of queued requests from the running stats"""
+        count = int(count or 0)
+        if count <= 0:
             return 0.0
+        return max(0.0, now - float(enqueue_sum or 0) / count)
 
     async def store_metrics_in_db(self, customer_id: str, metrics: RateLimitMetrics):
-        """Store metrics in PostgreSQL for historical analysis."""
+        """Record metrics for historical analysis; persisted in the background by metrics_aggregator"""
         try:
-            query = """
-                INSERT INTO telecom.rate_limit_metrics
-                (customer_id, queue_length, rate_limited_requests, 
-                 token_usage, avg_response_time, created_at)
-                VALUES ($1, $2, $3, $4, $5, NOW())
-            """
-            await db.execute(
-                query,
+            metrics_aggregator.record(
                 customer_id,
                 metrics.queue_length,
                 metrics.rate_limited_requests,
@@ -145,7 +171,7 @@ class MetricsService:
                 metrics.avg_response_time
             )
         except Exception as e:
-            logger.error(f"Error storing metrics in database: {str(e)}")
+            logger.error(f"Error recording metrics: {str(e)}")
 
 # Create singleton instance
 metrics_service = MetricsService()
\ No newline at end of file
@@ -4,7 +4,7 @@ from .rate_limiting.service import RateLimitService
 from .pdf_content.service import PDFContentService
 from .response_cache.service import ResponseCacheService
 from .message_queue.service import MessageQueueService
-from .claude_service import claude_service
+from app.core.container import container
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +47,7 @@ class ChatOrchestrator:
                 }
 
             # 6. Process request
-            response = await claude_service.get_response(
+            response = await container.get("claude_service").get_response(
                 message=message,
                 pdf_content=relevant_content
             )
@@ -0,0 +1,55 @@
+import re
+
+# Stored next to normalized text in pdf_content_cache. Bump on any change
+# to the output below so cached pages are re-extracted instead of served stale.
+# 2: no RTL markup in stored text; see render_rtl
+NORMALIZER_VERSION = 2
+
+_HEBREW = '\u0590-\u05FF'
+
+# Whitespace that PDF extraction inserts inside Hebrew words
+_INNER_HEBREW_SPACE = re.compile(rf'(?<=[{_HEBREW}])\s+(?=[{_HEBREW}])')
+_HEBREW_RUN = re.compile(rf'([{_HEBREW}]+)')
+
+# Hebrew letters mis-decoded as Latin-1 by some PDF encodings
+_MISDECODED = '×÷ñíóúö'
+_LETTER_FIXES = str.maketrans(_MISDECODED, 'אחםןסץצ')
+_HAS_MISDECODED = re.compile(f'[{_MISDECODED}]')
+
+# Directional marks/embeddings, soft hyphen and nikkud, dropped in one pass
+_DROPPED = re.compile('[\u200e\u200f\u202a-\u202c¬\u0591-\u05C7]')
+
+
+def normalize_hebrew(text: str) -> str:
+    """
+    Clean up Hebrew text extracted from a PDF.
+
+    Joins Hebrew letters split by whitespace, fixes mis-decoded letters,
+    drops directional marks and nikkud and collapses whitespace. The
+    result is plain logical-order text, which is what prompts should
+    carry; use render_rtl for display.
+    """
+    if not text:
+        return ""
+    text = _INNER_HEBREW_SPACE.sub('', text)
+    text = _DROPPED.sub('', text)
+    # A translate pass costs a table lookup per character; skip it when
+    # none of the mis-decoded letters occur, which is the common case
+    if _HAS_MISDECODED.search(text):
+        text = text.translate(_LETTER_FIXES)
+    return ' '.join(text.split())
+
+
+def _wrap_rtl(match: re.Match) -> str:
+    return f'[{match.group(1)}]{{dir="rtl"}}'
+
+
+def render_rtl(text: str) -> str:
+    """
+    Wrap each Hebrew run as [run]{dir="rtl"} for clients that render
+    bracketed spans. Display only: this roughly doubles the size of
+    Hebrew-heavy text, so never send it to the model.
+    """
+    if not text:
+        return ""
+    return _HEBREW_RUN.sub(_wrap_rtl, text)
@@ -0,0 +1,162 @@
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+import math
+import re
+
+# Bump when tokenization, chunking or the stored text (NORMALIZER_VERSION)
+# changes so persisted indexes get rebuilt
+INDEX_VERSION = 2
+
+# RTL markup, as produced by hebrew.render_rtl: [text]{dir="rtl"}
+_RTL_MARKUP = re.compile(r'\{dir="rtl"\}|[\[\]]')
+_HEBREW_RUN = re.compile(r'[א-ת]+')
+_TOKEN = re.compile(r'[א-ת]+|[a-z]+|\d+(?:\.\d+)?')
+_FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+
+# Headings that open a new section in Pelephone bills
+SECTION_HEADINGS = [
+    'סיכום החשבון',
+    'פירוט חשבון',
+    'חיובים קבועים',
+    'תשלום חודשי קבוע',
+    'חיובים משתנים',
+    'חיובים חד פעמיים',
+    'פירוט שיחות',
+    'צריכת דקות',
+    'שיעור שימוש',
+    'פירוט חבילות',
+    'סיכום חיובים',
+    'תיבת ההודעות',
+    '=== חשבונית',
+]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize bill text for BM25 scoring.
+
+    Hebrew runs are indexed as character trigrams (with final letters folded)
+    because the normalizer glues adjacent Hebrew words together and prefixes
+    like ו/ה/ב/ל are attached to the word. Latin words and numbers are kept whole.
+    """
+    text = _RTL_MARKUP.sub(' ', text).lower().translate(_FINAL_LETTERS)
+    tokens = []
+    for token in _TOKEN.findall(text):
+        if _HEBREW_RUN.fullmatch(token) and len(token) > 3:
+            tokens.extend(token[i:i + 3] for i in range(len(token) - 2))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def split_sections(text: str, max_chars: int = 600) -> List[str]:
+    """Split a page into sections at known headings, then into bounded chunks"""
+    heading_pattern = '|'.join(re.escape(h) for h in SECTION_HEADINGS)
+    starts = sorted({0, *(m.start() for m in re.finditer(heading_pattern, text))})
+    sections = [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)])]
+
+    chunks = []
+    for section in sections:
+        section = section.strip()
+        while len(section) > max_chars:
+            cut = section.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(section[:cut].strip())
+            section = section[cut:].strip()
+        if section:
+            chunks.append(section)
+    return chunks
+
+
+@dataclass
+class SectionHit:
+    text: str
+    page_number: Optional[int]
+    score: float
+
+
+class SectionIndex:
+    """In-memory BM25 inverted index over the sections of a single bill"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.sections: List[Tuple[Optional[int], str]] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.avg_length = 0.0
+
+    @classmethod
+    def build(cls, pages: List[Tuple[Optional[int], str]], max_chars: int = 600) -> 'SectionIndex':
+        """Build index from (page_number, content) rows"""
+        index = cls()
+        for page_number, content in pages:
+            for chunk in split_sections(content or "", max_chars):
+                index._add(page_number, chunk)
+        index._finalize()
+        return index
+
+    def _add(self, page_number: Optional[int], text: str):
+        doc_id = len(self.sections)
+        tokens = tokenize(text)
+        self.sections.append((page_number, text))
+        self.lengths.append(len(tokens))
+        for token in tokens:
+            postings = self.postings.setdefault(token, {})
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+
+    def _finalize(self):
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def search(self, query: str, top_k: int = 3) -> List[SectionHit]:
+        """Return the top_k sections for query ordered by BM25 score"""
+        if not self.sections:
+            return []
+
+        total = len(self.sections)
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [
+            SectionHit(text=self.sections[doc_id][1], page_number=self.sections[doc_id][0], score=score)
+            for doc_id, score in ranked
+        ]
+
+    def to_dict(self) -> Dict:
+        """Serialize for storage in telecom.pdf_section_index"""
+        return {
+            'version': INDEX_VERSION,
+            'k1': self.k1,
+            'b': self.b,
+            'sections': [[page, text] for page, text in self.sections],
+            'lengths': self.lengths,
+            'postings': {
+                token: [[doc_id, tf] for doc_id, tf in postings.items()]
+                for token, postings in self.postings.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> Optional['SectionIndex']:
+        """Load a serialized index, returning None if it was built by another version"""
+        if data.get('version') != INDEX_VERSION:
+            return None
+        index = cls(k1=data['k1'], b=data['b'])
+        index.sections = [(page, text) for page, text in data['sections']]
+        index.lengths = data['lengths']
+        index.postings = {
+            token: {doc_id: tf for doc_id, tf in postings}
+            for token, postings in data['postings'].items()
+        }
+        index._finalize()
+        return index
@@ -1,69 +1,127 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
+from collections import OrderedDict
 from datetime import datetime
 import hashlib
 import json
+import logging
+from .section_index import SectionIndex
+
+logger = logging.getLogger(__name__)
 
 class PDFContentService:
-    def __init__(self, db, redis_client):
+    def __init__(self, db, redis_client, top_k: int = 3, max_indexes: int = 128):
         self.db = db
         self.redis = redis_client
         self.cache_ttl = 3600  # 1 hour
+        self.top_k = top_k
+        self.max_indexes = max_indexes
+        # Section indexes keyed by bill content hash, most recently used last
+        self._indexes: "OrderedDict[str, SectionIndex]" = OrderedDict()
 
-    async def get_relevant_content(self, message: str, pdf_paths: List[str]) -> str:
+    async def get_relevant_content(self, message: str, pdf_paths: List[str], top_k: Optional[int] = None) -> str:
         """Get relevant PDF content based on user query"""
         try:
             # Generate content hash for the combination
             content_hash = self._generate_content_hash(message, pdf_paths)
-            
+
             # Try Redis first
             cached_content = await self.redis.get(f"pdf_content:{content_hash}")
             if cached_content:
                 return json.loads(cached_content)
 
-            # Get from database
+            # Get cached bill text from database
             query = """
-                SELECT content 
-                FROM telecom.pdf_content_cache 
-                WHERE content_hash = ANY($1)
-                ORDER BY created_at DESC
+                SELECT c.content_hash, c.page_number, c.content
+                FROM telecom.pdf_content_cache c
+                JOIN telecom.pdf_documents d ON d.content_hash = c.content_hash
+                WHERE d.path = ANY($1)
+                ORDER BY d.date DESC, c.page_number NULLS FIRST
             """
-            
-            results = await self.db.fetch_all(query, pdf_paths)
-            
-            # Combine and process content
-            combined_content = ""
+
+            results = await self.db.fetch_all(query, pdf_paths, replica=True)
+
+            pages_by_bill: Dict[str, List[Tuple[Optional[int], str]]] = {}
             for result in results:
-                content = result['content']
-                # Add only relevant sections based on message keywords
-                if self._is_content_relevant(message, content):
-                    combined_content += f"\n{content}"
+                pages_by_bill.setdefault(result['content_hash'], []).append(
+                    (result['page_number'], result['content'])
+                )
+
+            # Combine only the best matching sections of each bill
+            combined_content = ""
+            for bill_hash, pages in pages_by_bill.items():
+                index = await self.get_section_index(bill_hash, pages)
+                for hit in index.search(message, top_k or self.top_k):
+                    combined_content += f"\n{hit.text}"
 
             # Cache the processed content
             await self.redis.set(
                 f"pdf_content:{content_hash}",
                 json.dumps(combined_content),
-                expire=self.cache_ttl
+                ttl=self.cache_ttl
             )
 
             return combined_content
 
+        except Exception as e:
+            logger.error(f"Error getting relevant PDF content: {e}")
+            raise
+
+    async def get_section_index(self, content_hash: str, pages: List[Tuple[Optional[int], str]]) -> SectionIndex:
+        """Get section index for a bill, building and persisting it on first use"""
+        index = self._indexes.get(content_hash)
+        if index is not None:
+            self._indexes.move_to_end(content_hash)
+            return index
+
+        index = await self._load_section_index(content_hash)
+        if index is None:
+            # Prefer per-page rows, fall back to the whole-document row
+            paged = [page for page in pages if page[0] is not None]
+            index = SectionIndex.build(paged or pages)
+            await self._store_section_index(content_hash, index)
+
+        self._indexes[content_hash] = index
+        if len(self._indexes) > self.max_indexes:
+            self._indexes.popitem(last=False)
+        return index
+
+    async def _load_section_index(self, content_hash: str) -> Optional[SectionIndex]:
+        try:
+            row = await self.db.fetch_one(
+                "SELECT index_data FROM telecom.pdf_section_index WHERE content_hash = $1",
+                content_hash,
+                replica=True
+            )
+            if not row:
+                return None
+            data = row['index_data']
+            return SectionIndex.from_dict(json.loads(data) if isinstance(data, str) else data)
+        except Exception as e:
+            logger.warning(f"Could not load section index for {content_hash}: {e}")
+            return None
+
+    async def _store_section_index(self, content_hash: str, index: SectionIndex) -> None:
+        try:
+            data = index.to_dict()
+            await self.db.execute(
+                """
+                INSERT INTO telecom.pdf_section_index
+                (content_hash, index_version, index_data, created_at)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (content_hash)
+                DO UPDATE SET index_version = EXCLUDED.index_version,
+                              index_data = EXCLUDED.index_data,
+                              created_at = EXCLUDED.created_at
+                """,
+                content_hash,
+                data['version'],
+                json.dumps(data, ensure_ascii=False),
+                datetime.utcnow()
+            )
+        except Exception as e:
+            logger.warning(f"Could not store section index for {content_hash}: {e}")
+
     def _generate_content_hash(self, message: str, pdf_paths: List[str]) -> str:
         """Generate hash for content caching"""
         content = f"{message}{''.join(sorted(pdf_paths))}"
         return hashlib.sha256(content.encode()).hexdigest()
-
-    def _is_content_relevant(self, message: str, content: str) -> bool:
-        """Check if content section is relevant to query"""
-        # Extract keywords from message
-        keywords = self._extract_keywords(message.lower())
-        
-        # Check content relevance
-        content_lower = content.lower()
-        return any(keyword in content_lower for keyword in keywords)
-
-    def _extract_keywords(self, message: str) -> List[str]:
-        """Extract keywords from message"""
-        # Add common billing keywords
-        billing_keywords = ['חשבון', 'תשלום', 'חיוב', 'סכום', 'עלות', 'תעריף']
-        message_words = message.split()
-        return list(set(message_words + billing_keywords))
\ No newline at end of file
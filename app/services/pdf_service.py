@@ -1,3 +1,4 @@
+import asyncio
 import json
 
 import os
@@ -12,8 +13,57 @@ import logging
 from dataclasses import dataclass
 import hashlib
 from app.core.database import db 
+from app.services.pdf_content.hebrew import NORMALIZER_VERSION, normalize_hebrew
 from datetime import datetime
 
+# Hot statements, named for per-statement latency metrics
+PDF_CONTENT_BY_HASH = db.named_query(
+    "pdf_content_by_hash",
+    """
+    SELECT content, normalizer_version FROM telecom.pdf_content_cache 
+    WHERE content_hash = $1 AND page_number IS NOT DISTINCT FROM $2
+    """
+)
+PDF_CONTENT_UPSERT = db.named_query(
+    "pdf_content_upsert",
+    """
+    INSERT INTO telecom.pdf_content_cache 
+    (content_hash, page_number, content, normalizer_version)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (content_hash, page_number) 
+    DO UPDATE SET content = EXCLUDED.content,
+        normalizer_version = EXCLUDED.normalizer_version
+    """
+)
+# Whole-document rows have a NULL page_number, which the unique
+# constraint above never matches; they have their own partial index
+PDF_DOCUMENT_CONTENT_UPSERT = db.named_query(
+    "pdf_document_content_upsert",
+    """
+    INSERT INTO telecom.pdf_content_cache 
+    (content_hash, page_number, content, normalizer_version)
+    VALUES ($1, NULL, $2, $3)
+    ON CONFLICT (content_hash) WHERE page_number IS NULL
+    DO UPDATE SET content = EXCLUDED.content,
+        normalizer_version = EXCLUDED.normalizer_version
+    """
+)
+PDF_DOCUMENT_UPSERT = db.named_query(
+    "pdf_document_upsert",
+    """
+    INSERT INTO telecom.pdf_documents 
+    (customer_id, filename, path, date, pages, size, preview, content_hash, is_valid, metadata, url)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+    ON CONFLICT (content_hash) 
+    DO UPDATE SET 
+        date = EXCLUDED.date,
+        preview = EXCLUDED.preview,
+        is_valid = EXCLUDED.is_valid,
+        metadata = EXCLUDED.metadata
+    RETURNING id, path, filename, date, pages, size, preview, is_valid, customer_id, url
+    """
+)
+
 
 @dataclass
 class PDFMetadata:
@@ -35,7 +85,6 @@ class PDFService:
         """Initialize with base directory for PDFs"""
         
         self.base_directory = base_directory
-        self.debug = True
         
         # Set up logging first
         self._setup_logging()
@@ -44,32 +93,8 @@ class PDFService:
         self._ensure_directory_exists()
 
     def _setup_logging(self):
-        """Configure logging for PDF operations"""
-        # Create logger
+        """Use the 'pdf_service' logger; handlers come from app.core.logging"""
         self.logger = logging.getLogger('pdf_service')
-        self.logger.setLevel(logging.DEBUG if self.debug else logging.INFO)
-        
-        # Prevent duplicate handlers
-        if not self.logger.handlers:
-            # Add file handler
-            log_dir = Path(self.base_directory).parent / 'logs'
-            log_dir.mkdir(exist_ok=True)
-            log_path = log_dir / 'pdf_operations.log'
-            
-            file_handler = logging.FileHandler(str(log_path))
-            file_handler.setFormatter(
-                logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-            )
-            self.logger.addHandler(file_handler)
-
-            # Add console handler
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(
-                logging.Formatter('%(levelname)s - %(message)s')
-            )
-            self.logger.addHandler(console_handler)
-            
-            self.logger.info("Logging initialized")
 
     def _ensure_directory_exists(self):
         """Ensure the PDF directory exists"""
@@ -240,14 +265,14 @@ class PDFService:
             content_hash = self._calculate_file_hash(file_path)
             
             # Try cache first
-            cache_query = """
-                SELECT content FROM telecom.pdf_content_cache 
-                WHERE content_hash = $1 AND page_number = $2
-            """
-            cached_content = await db.fetch_one(cache_query, content_hash, page_number)
+            cached_content = await db.fetch_one(
+                PDF_CONTENT_BY_HASH, content_hash, page_number, record=True, replica=True
+            )
             
-            if cached_content:
-                return self._fix_hebrew_text(cached_content['content'])
+            # Cached text is stored normalized; only a different normalizer
+            # version means it has to be extracted again
+            if cached_content and cached_content['normalizer_version'] == NORMALIZER_VERSION:
+                return cached_content['content']
 
             # Direct file reading if cache miss
             with open(file_path, 'rb') as file:
@@ -264,17 +289,10 @@ class PDFService:
 
                 text = self._fix_hebrew_text(text)
                 
-                # Cache in background
-                await db.execute(
-                    """
-                    INSERT INTO telecom.pdf_content_cache 
-                    (content_hash, page_number, content)
-                    VALUES ($1, $2, $3)
-                    ON CONFLICT (content_hash, page_number) 
-                    DO UPDATE SET content = EXCLUDED.content
-                    """,
-                    content_hash, page_number, text
-                )
+                if page_number is None:
+                    await db.execute(PDF_DOCUMENT_CONTENT_UPSERT, content_hash, text, NORMALIZER_VERSION)
+                else:
+                    await db.execute(PDF_CONTENT_UPSERT, content_hash, page_number, text, NORMALIZER_VERSION)
                 
                 return text
 
@@ -283,51 +301,9 @@ class PDFService:
             raise HTTPException(status_code=500, detail=str(e))
 
     def _fix_hebrew_text(self, text: str) -> str:
-        """Enhanced Hebrew text cleanup with improved handling"""
+        """Normalize raw extracted text; see pdf_content.hebrew"""
         try:
-            if not text:
-                return ""
-                
-            # Remove extra spaces between Hebrew characters
-            text = re.sub(r'(?<=[\u0590-\u05FF])\s+(?=[\u0590-\u05FF])', '', text)
-            
-            # Fix common Hebrew letter substitutions
-            hebrew_replacements = {
-                '×': 'א',
-                '÷': 'ח',
-                'ñ': 'ם',
-                'í': 'ן',
-                'ó': 'ס',
-                'ú': 'ץ',
-                'ö': 'צ',
-                # Common PDF encoding issues
-                '\u200e': '',  # Left-to-Right Mark
-                '\u200f': '',  # Right-to-Left Mark
-                '\u202a': '',  # Left-to-Right Embedding
-                '\u202b': '',  # Right-to-Left Embedding
-                '\u202c': '',  # Pop Directional Formatting
-                '¬': '',       # Soft hyphen
-            }
-            
-            for old, new in hebrew_replacements.items():
-                text = text.replace(old, new)
-            
-            # Remove Hebrew vowel points (nikkud)
-            text = re.sub(r'[\u0591-\u05C7]', '', text)
-            
-            # Normalize spaces and line endings
-            text = re.sub(r'\s+', ' ', text)
-            text = text.strip()
-            
-            # Add RTL marker for Hebrew text blocks
-            text = re.sub(
-                r'([\u0590-\u05FF]+)',
-                lambda m: f'[{m.group(1)}]{{dir="rtl"}}',
-                text
-            )
-            
-            return text
-            
+            return normalize_hebrew(text)
         except Exception as e:
             self.logger.error(f"Error in Hebrew text cleanup: {str(e)}")
             return text  # Return original text if cleanup fails
@@ -359,19 +335,22 @@ class PDFService:
                 LIMIT 5
             """
             
+            paths = [
+                os.path.join(self.base_directory, file)
+                for file in os.listdir(self.base_directory)
+                if file.startswith(customer_base) and file.endswith('.pdf')
+            ]
+            # Parsing and hashing are CPU and disk bound: do them in a worker
+            # thread before taking a connection, then write the rows at once
+            rows = await asyncio.to_thread(self._inspect_pdfs, paths, customer_base)
+
             pdf_files = []
-            for file in os.listdir(self.base_directory):
-                if not (file.startswith(customer_base) and file.endswith('.pdf')):
-                    continue
-                
-                full_path = os.path.join(self.base_directory, file)
-                try:
-                    metadata = await self._process_and_store_pdf(full_path, customer_base)
-                    if metadata:
-                        pdf_files.append(metadata)
-                except Exception as e:
-                    self.logger.error(f"Error processing PDF {file}: {str(e)}")
-                    continue
+            if rows:
+                async with db.batch() as tx:
+                    for row in rows:
+                        metadata = await self._store_pdf(row, tx)
+                        if metadata:
+                            pdf_files.append(metadata)
 
             if not pdf_files:
                 self.logger.warning(f"No valid PDFs found for customer {customer_id}")
@@ -384,51 +363,48 @@ class PDFService:
             self.logger.error(error_msg)
             raise HTTPException(status_code=500, detail=error_msg)
 
-    async def _process_and_store_pdf(self, file_path: str, customer_id: str) -> Optional[PDFMetadata]:
-        try:
-            file_name = os.path.basename(file_path)
-            file_date = self._parse_date_from_filename(file_name)
-            is_valid, preview_text, total_pages = self._validate_pdf(file_path)
-            content_hash = self._calculate_file_hash(file_path)
-            
-            if not is_valid:
-                return None
-
-            query = """
-                INSERT INTO telecom.pdf_documents 
-                (customer_id, filename, path, date, pages, size, preview, content_hash, is_valid, metadata, url)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                ON CONFLICT (content_hash) 
-                DO UPDATE SET 
-                    date = EXCLUDED.date,
-                    preview = EXCLUDED.preview,
-                    is_valid = EXCLUDED.is_valid,
-                    metadata = EXCLUDED.metadata
-                RETURNING id, path, filename, date, pages, size, preview, is_valid, customer_id, url
-            """
-            
-            metadata = json.dumps({
-                'last_validated': datetime.now().isoformat(),
-                'file_size': os.path.getsize(file_path)
-            })
-
-            url = f"/api/pdf/view/{file_name}"
-            
-            result = await db.fetch_one(
-                query,
-                customer_id,
-                file_name,
-                str(file_path),
-                file_date,
-                total_pages,
-                os.path.getsize(file_path),
-                preview_text,
-                content_hash,
-                is_valid,
-                metadata,
-                url
-            )
+    def _inspect_pdfs(self, paths: List[str], customer_id: str) -> List[tuple]:
+        """Upsert arguments for each valid PDF; runs in a worker thread"""
+        rows = []
+        for file_path in paths:
+            try:
+                row = self._inspect_pdf(file_path, customer_id)
+                if row:
+                    rows.append(row)
+            except Exception as e:
+                self.logger.error(f"Error processing PDF {file_path}: {str(e)}")
+        return rows
+
+    def _inspect_pdf(self, file_path: str, customer_id: str) -> Optional[tuple]:
+        file_name = os.path.basename(file_path)
+        file_date = self._parse_date_from_filename(file_name)
+        is_valid, preview_text, total_pages = self._validate_pdf(file_path)
+        if not is_valid:
+            return None
 
+        file_size = os.path.getsize(file_path)
+        metadata = json.dumps({
+            'last_validated': datetime.now().isoformat(),
+            'file_size': file_size
+        })
+
+        return (
+            customer_id,
+            file_name,
+            str(file_path),
+            file_date,
+            total_pages,
+            file_size,
+            preview_text,
+            self._calculate_file_hash(file_path),
+            is_valid,
+            metadata,
+            f"/api/pdf/view/{file_name}"
+        )
+
+    async def _store_pdf(self, row: tuple, executor=db) -> Optional[PDFMetadata]:
+        try:
+            result = await executor.fetch_one(PDF_DOCUMENT_UPSERT, *row, record=True)
             if result:
                 return PDFMetadata(
                     path=result['path'],
@@ -441,11 +417,9 @@ class PDFService:
                     is_valid=result['is_valid'],
                     customer_id=result['customer_id']
                 )
-
         except Exception as e:
-            self.logger.error(f"Error processing PDF {file_path}: {str(e)}")
-            return None
-
+            self.logger.error(f"Error storing PDF {row[2]}: {str(e)}")
+        return None
 
     async def _calculate_file_hash(self, file_path: str) -> str:
         sha256_hash = hashlib.sha256()
@@ -455,34 +429,6 @@ class PDFService:
         return sha256_hash.hexdigest()
             
 
-    async def _extract_and_cache_text(self, file_path: str, content_hash: str, page_number: Optional[int]) -> str:
-        """Extract text and store in cache"""
-        with open(file_path, 'rb') as file:
-            pdf = PyPDF2.PdfReader(file)
-            
-            if page_number is not None:
-                if 0 <= page_number < len(pdf.pages):
-                    text = pdf.pages[page_number].extract_text()
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Invalid page number. PDF has {len(pdf.pages)} pages"
-                    )
-            else:
-                text = '\n'.join(page.extract_text() for page in pdf.pages)
-
-            # Store in cache
-            cache_query = """
-                INSERT INTO telecom.pdf_content_cache 
-                (content_hash, page_number, content)
-                VALUES ($1, $2, $3)
-                ON CONFLICT (content_hash, page_number) 
-                DO UPDATE SET content = EXCLUDED.content
-            """
-            await db.execute(cache_query, content_hash, page_number, text)
-            
-            return text
-
     def _calculate_file_hash(self, file_path: str) -> str:
         """Calculate SHA-256 hash of file"""
         sha256_hash = hashlib.sha256()
@@ -517,6 +463,11 @@ class PDFService:
             self.logger.error(error_msg)
             raise HTTPException(status_code=500, detail=error_msg)
 
-# Create PDF service instance
-pdf_service = PDFService("/root/telecom-customer-service/pdf-test")
+
+def __getattr__(name: str):
+    # Module-level singletons are built on first use by app.core.container
+    if name in ("pdf_service",):
+        from app.core.container import container
+        return container.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -4,11 +4,39 @@ from typing import Optional, Dict, List
 import asyncio
 import uuid
 import logging
-from app.core.redis import redis_client 
 import json
 
 logger = logging.getLogger(__name__)
 
+# Running count and sum of enqueue timestamps for claude_queue, so the
+# average wait is one HMGET instead of a scan of the whole sorted set
+QUEUE_STATS_KEY = "claude_queue_stats"
+
+# KEYS: queue, stats  ARGV: member, enqueue timestamp
+ENQUEUE_SCRIPT = """
+if redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ARGV[1]) == 1 then
+    redis.call('HINCRBY', KEYS[2], 'count', 1)
+    redis.call('HINCRBYFLOAT', KEYS[2], 'enqueue_sum', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# KEYS: queue, stats  ARGV: member; returns the enqueue timestamp if removed
+DEQUEUE_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score or redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return false
+end
+if redis.call('HINCRBY', KEYS[2], 'count', -1) <= 0 then
+    -- Drop accumulated float error whenever the queue drains
+    redis.call('HSET', KEYS[2], 'count', 0, 'enqueue_sum', 0)
+else
+    redis.call('HINCRBYFLOAT', KEYS[2], 'enqueue_sum', -tonumber(score))
+end
+return score
+"""
+
 class MessageEncoder(json.JSONEncoder):
     def default(self, obj):
         if hasattr(obj, '__dict__'):
@@ -33,7 +61,10 @@ class RateLimitService:
         self.max_requests = 5
         self.token_limit = 40000
         self.queue_key = "claude_queue"
+        self.stats_key = QUEUE_STATS_KEY
         self.usage_key = "claude_token_usage"
+        self._enqueue_script = redis_client.register_script(ENQUEUE_SCRIPT)
+        self._dequeue_script = redis_client.register_script(DEQUEUE_SCRIPT)
 
     async def queue_claude_request(
         self, 
@@ -62,15 +93,17 @@ class RateLimitService:
                 "timestamp": datetime.now().isoformat()
             }
             
-            await self.redis.zadd(
-                self.queue_key,
-                {request_id: datetime.now().timestamp()}
-            )
-            
+            # Store the payload before the id becomes visible in the queue
             await self.redis.hset(
                 f"claude_request:{request_id}",
                 mapping=request_data
             )
+
+            await self.redis.run_script(
+                self._enqueue_script,
+                [self.queue_key, self.stats_key],
+                [request_id, datetime.now().timestamp()]
+            )
             
             logger.debug(f"Queued request {request_id} for customer {customer_id}")
             return request_id
@@ -125,7 +158,8 @@ class RateLimitService:
     @classmethod
     def create(cls):
         """Factory method to create service instance with redis client"""
-        return cls(redis_client)
+        from app.core.container import container
+        return cls(container.get("redis_client"))
 
     async def check_rate_limit(self, customer_id: str) -> bool:
         key = f"rate_limit:{customer_id}"
@@ -164,46 +198,61 @@ class RateLimitService:
         )
         return count if count is not None else 0
 
-async def process_claude_queue(self):
-    """Process queued requests"""
-    while True:
+    async def dequeue_request(self, request_id: str) -> Optional[float]:
+        """Remove a request from the queue, returning its enqueue time if it was queued"""
+        score = await self.redis.run_script(
+            self._dequeue_script,
+            [self.queue_key, self.stats_key],
+            [request_id]
+        )
+        return float(score) if score is not None else None
+
+    async def rebuild_queue_stats(self) -> None:
+        """Recompute the queue stats from the sorted set (startup / repair only)"""
+        entries = await self.redis.zrange(self.queue_key, 0, -1, withscores=True)
+        pipe = await self.redis.pipeline()
+        pipe.hset(self.stats_key, mapping={
+            "count": len(entries),
+            "enqueue_sum": sum(score for _, score in entries)
+        })
+        pipe.execute()
+
+    async def process_claude_queue(self):
+        """Process queued requests"""
         try:
-            # Get next request in queue
-            next_request = await self.redis.zrange(
-                self.queue_key,
-                0, 0,
-                withscores=True
-            )
+            await self.rebuild_queue_stats()
+        except Exception as e:
+            logger.error(f"Error rebuilding queue stats: {e}")
 
-            if not next_request:
-                await asyncio.sleep(0.1)
-                continue
+        while True:
+            try:
+                # Get next request in queue
+                next_request = await self.redis.zrange(
+                    self.queue_key,
+                    0, 0,
+                    withscores=True
+                )
 
-            request_id = next_request[0][0]
-            request_data = await self.redis.hgetall(f"claude_request:{request_id}")
+                if not next_request:
+                    await asyncio.sleep(0.1)
+                    continue
 
-            if not request_data:
-                # Remove invalid request
-                await self.redis.zrem(self.queue_key, request_id)
-                continue
+                request_id = next_request[0][0]
+                request_data = await self.redis.hgetall(f"claude_request:{request_id}")
 
-            # Remove from queue immediately to prevent duplicates
-            await self.redis.zrem(self.queue_key, request_id)
-            await self.redis.delete(f"claude_request:{request_id}")
+                # Remove from queue immediately to prevent duplicates
+                await self.dequeue_request(request_id)
+                if not request_data:
+                    # Invalid request, nothing to process
+                    continue
 
-            logger.info(f"Processed request {request_id} from queue")
+                await self.redis.delete(f"claude_request:{request_id}")
 
-        except Exception as e:
-            logger.error(f"Error processing queue: {e}")
-            await asyncio.sleep(1)
+                logger.info(f"Processed request {request_id} from queue")
 
-    async def _get_token_usage(self) -> int:
-        window_start = datetime.now().timestamp() - self.rate_limit_window
-        return await self.redis.zcount(
-            self.usage_key,
-            min=window_start,
-            max="+inf"
-        )
+            except Exception as e:
+                logger.error(f"Error processing queue: {e}")
+                await asyncio.sleep(1)
 
     async def _update_token_usage(self, tokens: int):
         now = datetime.now().timestamp()
@@ -215,10 +264,12 @@ async def process_claude_queue(self):
         await self.redis.zremrangebyscore(self.usage_key, "-inf", window_start)
 
 
-
-
-rate_limit_service = RateLimitService.create()
-
+def __getattr__(name: str):
+    # Module-level singletons are built on first use by app.core.container
+    if name in ("rate_limit_service",):
+        from app.core.container import container
+        return container.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Export the instance
 __all__ = ['rate_limit_service']
\ No newline at end of file
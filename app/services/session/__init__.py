@@ -1,4 +1,5 @@
 from .manager import SessionManager
-from .middleware import SessionMiddleware
+from .middleware import SessionMiddleware, LazySession
+from .activity import SessionActivityBatcher
 
-__all__ = ['SessionManager', 'SessionMiddleware']
\ No newline at end of file
+__all__ = ['SessionManager', 'SessionMiddleware', 'LazySession', 'SessionActivityBatcher']
\ No newline at end of file
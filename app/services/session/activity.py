@@ -0,0 +1,48 @@
+# app/services/session/activity.py
+from typing import Optional, Set
+import asyncio
+import logging
+from .manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+class SessionActivityBatcher:
+    """Collects session activity touches and writes them behind in batches"""
+
+    def __init__(self, session_manager: SessionManager, flush_interval: float = 1.0):
+        self.session_manager = session_manager
+        self.flush_interval = flush_interval
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def touch(self, session_id: str) -> None:
+        """Mark session as active; written on the next flush"""
+        self._pending.add(str(session_id))
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        session_ids, self._pending = list(self._pending), set()
+        return await self.session_manager.touch_sessions(session_ids)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing session activity: {str(e)}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
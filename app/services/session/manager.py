@@ -1,21 +1,33 @@
 # app/services/session/manager.py
 import uuid
 from datetime import datetime
+from typing import List
 import redis
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+SESSION_TTL = 300  # 5 minutes
+
 class SessionManager:
-    def __init__(self):
+    def __init__(self, host: str = "localhost", port: int = 6380, db: int = 1):
         self.redis = redis.Redis(
-            host="localhost",
-            port=6380,
-            db=1,
+            host=host,
+            port=port,
+            db=db,
             decode_responses=True
         )
 
+    @staticmethod
+    def _session_key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def _customer_key(customer_id: str) -> str:
+        """Pointer from a customer to their active session id"""
+        return f"customer_session:{customer_id}"
+
 
     async def check_health(self) -> bool:
         try:
@@ -41,12 +53,11 @@ class SessionManager:
                 "last_active": datetime.utcnow().isoformat()
             }
             
-            # Store in Redis with 5-minute timeout
-            self.redis.setex(
-                f"session:{session_id}",
-                300,  # 5 minutes
-                json.dumps(session_data)
-            )
+            # Store session and customer pointer with the same 5-minute timeout
+            pipe = self.redis.pipeline()
+            pipe.setex(self._session_key(session_id), SESSION_TTL, json.dumps(session_data))
+            pipe.setex(self._customer_key(customer_id), SESSION_TTL, session_id)
+            pipe.execute()
             
             logger.info(f"Created session: {session_data}")
             return session_data
@@ -58,7 +69,7 @@ class SessionManager:
     async def get_session(self, session_id: str) -> dict:
         """Get session data by ID"""
         try:
-            data = self.redis.get(f"session:{session_id}")
+            data = self.redis.get(self._session_key(session_id))
             if data:
                 return json.loads(data)
             return None
@@ -69,16 +80,16 @@ class SessionManager:
     async def get_active_session(self, customer_id: str) -> dict:
         """Get active session for customer"""
         try:
-            # Get all session keys
-            session_keys = self.redis.keys("session:*")
-            
-            for key in session_keys:
-                session_data = self.redis.get(key)
-                if session_data:
-                    session = json.loads(session_data)
-                    if session["customer_id"] == customer_id:
-                        return session
-            return None
+            session_id = self.redis.get(self._customer_key(customer_id))
+            if not session_id:
+                return None
+
+            session = await self.get_session(session_id)
+            if not session or session.get("customer_id") != customer_id:
+                # Pointer outlived its session
+                self.redis.delete(self._customer_key(customer_id))
+                return None
+            return session
         except Exception as e:
             logger.error(f"Error getting active session: {str(e)}")
             return None
@@ -89,21 +100,53 @@ class SessionManager:
             session_data = await self.get_session(session_id)
             if session_data:
                 session_data["last_active"] = datetime.utcnow().isoformat()
-                self.redis.setex(
-                    f"session:{session_id}",
-                    300,  # Reset 5-minute timeout
-                    json.dumps(session_data)
-                )
+                # Reset 5-minute timeout on both session and pointer
+                pipe = self.redis.pipeline()
+                pipe.setex(self._session_key(session_id), SESSION_TTL, json.dumps(session_data))
+                pipe.setex(self._customer_key(session_data["customer_id"]), SESSION_TTL, session_id)
+                pipe.execute()
                 return True
             return False
         except Exception as e:
             logger.error(f"Error updating session activity: {str(e)}")
             return False
 
+    async def touch_sessions(self, session_ids: List[str]) -> int:
+        """Update last activity for many sessions in two pipelined round trips"""
+        if not session_ids:
+            return 0
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for session_id in session_ids:
+                pipe.get(self._session_key(session_id))
+            sessions = pipe.execute()
+
+            now = datetime.utcnow().isoformat()
+            touched = 0
+            pipe = self.redis.pipeline(transaction=False)
+            for session_id, data in zip(session_ids, sessions):
+                if not data:
+                    continue
+                session_data = json.loads(data)
+                session_data["last_active"] = now
+                pipe.setex(self._session_key(session_id), SESSION_TTL, json.dumps(session_data))
+                pipe.setex(self._customer_key(session_data["customer_id"]), SESSION_TTL, session_id)
+                touched += 1
+            pipe.execute()
+            return touched
+        except Exception as e:
+            logger.error(f"Error touching sessions: {str(e)}")
+            return 0
+
     async def delete_session(self, session_id: str):
         """Delete a session"""
         try:
-            return self.redis.delete(f"session:{session_id}")
+            session_data = await self.get_session(session_id)
+            if session_data:
+                customer_key = self._customer_key(session_data["customer_id"])
+                if self.redis.get(customer_key) == session_id:
+                    self.redis.delete(customer_key)
+            return self.redis.delete(self._session_key(session_id))
         except Exception as e:
             logger.error(f"Error deleting session: {str(e)}")
             return False
@@ -1,3 +1,3 @@
-from .session_middleware import SessionMiddleware
+from .session_middleware import SessionMiddleware, LazySession
 
-__all__ = ['SessionMiddleware']
\ No newline at end of file
+__all__ = ['SessionMiddleware', 'LazySession']
\ No newline at end of file
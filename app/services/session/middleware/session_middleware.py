@@ -1,83 +1,83 @@
 from typing import Optional
-from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.datastructures import Headers, QueryParams
 from ..manager import SessionManager
+from ..activity import SessionActivityBatcher
 import redis
-import json
 import logging
 
 logger = logging.getLogger(__name__)
 
-class SessionMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, session_manager: SessionManager):
-        """Initialize middleware with session manager."""
-        super().__init__(app)
-        self.session_manager = session_manager
-        
-    async def dispatch(self, request: Request, call_next):
-        """Process each request to validate and manage session."""
-        try:
-            # Extract customer_id from request path or query params
-            customer_id = await self._extract_customer_id(request)
-            if not customer_id:
-                return await call_next(request)
-
-            # Get or create session
-            session = await self.session_manager.get_active_session(customer_id)
-            if not session:
-                session = await self.session_manager.create_session(customer_id)
-
-            # Attach session to request state
-            request.state.session = session
-            request.state.customer_id = customer_id
-
-            # Process request
-            response = await call_next(request)
+class LazySession:
+    """
+    Session handle stored on request.state.session.
 
-            # Update session activity
-            if session and 'id' in session:
-                await self.session_manager.update_session_activity(session['id'])
-
-            return response
+    Nothing touches Redis until a route awaits get(), so routes that never
+    use the session pay no session cost.
+    """
 
-        except redis.ConnectionError:
-            logger.error("Redis connection failed")
-            return JSONResponse(
-                status_code=503,
-                content={"detail": "Session service unavailable"}
-            )
-        except Exception as e:
-            logger.error(f"Session middleware error: {str(e)}")
-            return JSONResponse(
-                status_code=500,
-                content={"detail": "Internal server error"}
-            )
+    def __init__(self, scope: Scope, session_manager: SessionManager):
+        self._scope = scope
+        self._session_manager = session_manager
+        self._session: Optional[dict] = None
+        self._loaded = False
 
-    async def _extract_customer_id(self, request: Request) -> Optional[str]:
-        """Extract customer_id from request."""
-        # Try path parameters first
-        customer_id = request.path_params.get('customer_id')
+    @property
+    def customer_id(self) -> Optional[str]:
+        """Extract customer_id from path, query or header (never the body)"""
+        # Path params are filled in by the router before the endpoint runs
+        customer_id = self._scope.get('path_params', {}).get('customer_id')
         if customer_id:
             return customer_id
 
-        # Try query parameters
-        customer_id = request.query_params.get('customer_id')
+        customer_id = QueryParams(self._scope.get('query_string', b'')).get('customer_id')
         if customer_id:
             return customer_id
 
-        # Try headers
-        customer_id = request.headers.get('X-Customer-ID')
-        if customer_id:
-            return customer_id
+        return Headers(scope=self._scope).get('X-Customer-ID')
 
-        # Try body for POST requests
-        if request.method == "POST":
-            try:
-                body = await request.json()
-                if isinstance(body, dict):
-                    return body.get('customer_id')
-            except:
-                pass
+    @property
+    def session(self) -> Optional[dict]:
+        """Loaded session, or None if get() was never awaited"""
+        return self._session
 
-        return None
\ No newline at end of file
+    async def get(self, customer_id: Optional[str] = None) -> Optional[dict]:
+        """Get or create the customer's session on first use"""
+        if self._loaded:
+            return self._session
+        self._loaded = True
+
+        customer_id = customer_id or self.customer_id
+        if not customer_id:
+            return None
+
+        try:
+            session = await self._session_manager.get_active_session(customer_id)
+            if not session:
+                session = await self._session_manager.create_session(customer_id)
+            self._session = session
+        except redis.ConnectionError:
+            logger.error("Redis connection failed")
+        return self._session
+
+class SessionMiddleware:
+    def __init__(self, app: ASGIApp, session_manager: SessionManager, activity: SessionActivityBatcher):
+        """Initialize middleware with session manager and activity batcher."""
+        self.app = app
+        self.session_manager = session_manager
+        self.activity = activity
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Attach a lazy session handle and record activity after the request."""
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        lazy_session = LazySession(scope, self.session_manager)
+        scope.setdefault('state', {})['session'] = lazy_session
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session = lazy_session.session
+            if session and 'id' in session:
+                self.activity.touch(session['id'])
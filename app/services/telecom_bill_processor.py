@@ -2,9 +2,37 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import re
 import json
-from app.utils.custom_logger import logger
+import logging
+from app.core.logging import SAMPLED, LazyJson
 from .bill_text_processor import enhance_bill_processor
 
+logger = logging.getLogger(__name__)
+
+# Fixed process_bill patterns, compiled at import; the container imports
+# this module while warming services at startup
+_MONTHLY_FEE = re.compile(r'תשלום חודשי קבוע.*?(\d+\.\d+)')
+_CYBER_FEE = re.compile(r'CYBER.*?Pelephone.*?(\d+\.\d+)')
+_SMS_COUNTS = re.compile(r"SMS/MMS\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)")
+_TOTAL_AMOUNT_PATTERNS = (
+    # Exact pattern as appears in bill
+    re.compile(r'סה"כ\s+חשבון\s+נוכחי\s+כולל\s+מע"מ\s+([0-9]+\.[0-9]+)'),
+    # Alternative in case of different spacing/formatting
+    re.compile(r'סה"כ[^0-9]*כולל[^0-9]*מע"מ[^0-9]*([0-9]+\.[0-9]+)')
+)
+_BILLING_PERIOD_PATTERNS = (
+    re.compile(r'תקופת\s+החשבון\s*:\s*(\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4})'),
+    re.compile(r'תקופה\s*:\s*(\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4})'),
+    re.compile(r'(\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4})'),
+    re.compile(r'חשבון\s+לתקופה\s*:\s*(\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4})')
+)
+_PHONE_NUMBER = re.compile(r'(050-[0-9]{7}|051-[0-9]{7}|052-[0-9]{7}|053-[0-9]{7}|054-[0-9]{7}|055-[0-9]{7}|058-[0-9]{7})')
+_SERVICE_CHARGE_PATTERNS = {
+    # The normalizer joins adjacent Hebrew words, so spaces are optional
+    "repairs_top": re.compile(r'שירות\s*תיקונים.*?Top.*?למספר\s*אלקטרוני.*?(\d+\.\d+)', re.DOTALL),
+    "repairs_regular": re.compile(r'שירות\s*תיקונים\s*פלאפון\s*למספר\s*אלקטרוני.*?(\d+\.\d+)', re.DOTALL),
+    "cyber": re.compile(r'(?:CYBER|סייבר).*?לגלישה\s*בטוחה\s*ברשת.*?(\d+\.\d+)', re.DOTALL)
+}
+
 @dataclass
 class BillSection:
     name: str
@@ -46,7 +74,6 @@ class BillData:
 class TelecomBillProcessor:
     def __init__(self):
         self.content = ""
-        self.debug = True
         self.sections = {
             "summary": BillSection(
                 name="summary",
@@ -71,6 +98,11 @@ class TelecomBillProcessor:
             )
         }
 
+    @property
+    def debug(self) -> bool:
+        """Verbose tracing follows this module's logger level"""
+        return logger.isEnabledFor(logging.DEBUG)
+
     # Update process_bill method to use the correct method name
     def process_bill(self, content: str) -> Dict:
         """Process complete bill with all subscriber data"""
@@ -96,10 +128,10 @@ class TelecomBillProcessor:
                 subscriber_data = self._extract_subscriber_usage(phone)
                 bill_data["usage"][phone] = subscriber_data
                 if self.debug:
-                    logger.info(f"Processed data for {phone}: {json.dumps(subscriber_data, ensure_ascii=False)}")
+                    logger.debug("Processed data for %s: %s", phone, LazyJson(subscriber_data), extra=SAMPLED)
                     
             if self.debug:
-                logger.info(f"Processed bill data: {json.dumps(bill_data, ensure_ascii=False)}")
+                logger.debug("Processed bill data: %s", LazyJson(bill_data), extra=SAMPLED)
                 
             return bill_data
                     
@@ -153,13 +185,13 @@ class TelecomBillProcessor:
             fixed_section = self._get_subscriber_section(phone_number, "fixed")
             if fixed_section:
                 # Monthly fee
-                if fee_match := re.search(r'תשלום חודשי קבוע.*?(\d+\.\d+)', fixed_section):
+                if fee_match := _MONTHLY_FEE.search(fixed_section):
                     subscriber_data['monthly_fee'] = float(fee_match.group(1))
                     if self.debug:
                         logger.debug(f"Found monthly fee for {phone_number}: {subscriber_data['monthly_fee']}")
                 
                 # Services like CYBER
-                if cyber_match := re.search(r'CYBER.*?Pelephone.*?(\d+\.\d+)', fixed_section):
+                if cyber_match := _CYBER_FEE.search(fixed_section):
                     subscriber_data['services'] = {'cyber': float(cyber_match.group(1))}
                     if self.debug:
                         logger.debug(f"Found services for {phone_number}: {subscriber_data['services']}")
@@ -184,8 +216,7 @@ class TelecomBillProcessor:
                         logger.debug(f"Found calls for {phone_number}: {subscriber_data['calls']}")
 
                 # SMS
-                sms_pattern = f"SMS/MMS\\s+(\\d+)\\s+(\\d+)\\s+(\\d+)\\s+(\\d+)"
-                if sms_match := re.search(sms_pattern, usage_section):
+                if sms_match := _SMS_COUNTS.search(usage_section):
                     subscriber_data['sms'] = {
                         'internal': int(sms_match.group(1)),
                         'external': int(sms_match.group(2)),
@@ -230,7 +261,7 @@ class TelecomBillProcessor:
             subscriber_data['total_charges'] = subscriber_total
 
             if self.debug:
-                logger.info(f"Complete data for {phone_number}: {json.dumps(subscriber_data, ensure_ascii=False)}")
+                logger.debug("Complete data for %s: %s", phone_number, LazyJson(subscriber_data), extra=SAMPLED)
 
             return subscriber_data
 
@@ -270,8 +301,7 @@ class TelecomBillProcessor:
             if summary_section:
                 numbers = re.findall(pattern, summary_section)
                 if numbers:
-                    if self.debug:
-                        print(f"Found phone numbers in summary: {numbers}")
+                    logger.debug("Found phone numbers in summary: %s", numbers)
                     return list(set(numbers))  # Remove duplicates
             
             # If not found in summary, try fixed charges section
@@ -279,23 +309,20 @@ class TelecomBillProcessor:
             if fixed_charges:
                 numbers = re.findall(pattern, fixed_charges)
                 if numbers:
-                    if self.debug:
-                        print(f"Found phone numbers in fixed charges: {numbers}")
+                    logger.debug("Found phone numbers in fixed charges: %s", numbers)
                     return list(set(numbers))
             
             # As a fallback, search in entire content
             numbers = re.findall(pattern, self.content)
             if numbers:
-                if self.debug:
-                    print(f"Found phone numbers in full content: {numbers}")
+                logger.debug("Found phone numbers in full content: %s", numbers)
                 return list(set(numbers))
             
-            if self.debug:
-                print("No phone numbers found")
+            logger.debug("No phone numbers found")
             return []
             
         except Exception as e:
-            print(f"Error extracting phone numbers: {str(e)}")
+            logger.error(f"Error extracting phone numbers: {str(e)}")
             return []
 
     def _validate_phone_number(self, phone: str) -> bool:
@@ -309,7 +336,7 @@ class TelecomBillProcessor:
             return bool(re.match(pattern, phone))
             
         except Exception as e:
-            print(f"Error validating phone number {phone}: {str(e)}")
+            logger.error(f"Error validating phone number {phone}: {str(e)}")
             return False
 
 
@@ -380,50 +407,35 @@ class TelecomBillProcessor:
     def _extract_sections(self):
         """Extract all bill sections with debug info"""
         for section in self.sections.values():
-            if self.debug:
-                print(f"\nLooking for section {section.name}")
-                print(f"Start marker: {section.start_marker}")
-                print(f"End marker: {section.end_marker}")
-                
             section.content = self._get_section(section.start_marker, section.end_marker)
-            
-            if self.debug:
-                print(f"Found content: {'Yes' if section.content else 'No'}")
-                if section.content:
-                    print(f"Content sample: {section.content[:100]}")
+            logger.debug(
+                "Section %s (%r .. %r): %s",
+                section.name, section.start_marker, section.end_marker,
+                f"{len(section.content)} chars" if section.content else "not found"
+            )
                                 
     def _get_section(self, start_marker: str, end_marker: str) -> str:
         """Extract content between markers with improved debugging"""
         try:
-            if self.debug:
-                print(f"\nSearching content for markers:")
-                print(f"Start: '{start_marker}'")
-                print(f"End: '{end_marker}'")
-                print(f"Content sample: {self.content[:200]}")
-
             # First, check if markers exist
             if start_marker not in self.content:
-                print(f"Warning: Start marker '{start_marker}' not found in content")
+                logger.debug("Start marker %r not found in content", start_marker)
                 return ""
             if end_marker not in self.content:
-                print(f"Warning: End marker '{end_marker}' not found in content")
+                logger.debug("End marker %r not found in content", end_marker)
                 return ""
 
             pattern = f"({re.escape(start_marker)}).*?(?={re.escape(end_marker)})"
             match = re.search(pattern, self.content, re.DOTALL)
             
             if match:
-                section_content = match.group(0).strip()
-                if self.debug:
-                    print(f"Found section content: {section_content[:100]}...")
-                return section_content
+                return match.group(0).strip()
 
-            if self.debug:
-                print("No match found between markers")
+            logger.debug("No match found between %r and %r", start_marker, end_marker)
             return ""
 
         except Exception as e:
-            print(f"Error in get_section: {str(e)}")
+            logger.error(f"Error in get_section: {str(e)}")
             return ""
                 
     def _extract_total_amount(self) -> float:
@@ -432,15 +444,8 @@ class TelecomBillProcessor:
             # Take just the first part of content where total appears
             first_section = self.content[:1000]  # First 1000 chars should include the total
             
-            patterns = [
-                # Exact pattern as appears in bill
-                r'סה"כ\s+חשבון\s+נוכחי\s+כולל\s+מע"מ\s+([0-9]+\.[0-9]+)',
-                # Alternative in case of different spacing/formatting
-                r'סה"כ[^0-9]*כולל[^0-9]*מע"מ[^0-9]*([0-9]+\.[0-9]+)'
-            ]
-
-            for pattern in patterns:
-                if match := re.search(pattern, first_section):
+            for pattern in _TOTAL_AMOUNT_PATTERNS:
+                if match := pattern.search(first_section):
                     amount = float(match.group(1))
                     if self.debug:
                         logger.info(f"Found total amount in first section: {amount} ₪")
@@ -517,25 +522,18 @@ class TelecomBillProcessor:
     def _extract_billing_period(self) -> str:
         """Extract billing period with improved Hebrew pattern matching"""
         try:
-            patterns = [
-                r'תקופת\s+החשבון\s*:\s*(\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4})',
-                r'תקופה\s*:\s*(\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4})',
-                r'(\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4})',
-                r'חשבון\s+לתקופה\s*:\s*(\d{2}/\d{2}/\d{4}\s*-\s*\d{2}/\d{2}/\d{4})'
-            ]
-            
             # First try in summary section
             section = self.sections["summary"].content
-            for pattern in patterns:
+            for pattern in _BILLING_PERIOD_PATTERNS:
                 # Try in summary section first
                 if section:
-                    if match := re.search(pattern, section):
+                    if match := pattern.search(section):
                         if self.debug:
                             logger.info(f"Found billing period in summary: {match.group(1)}")
                         return match.group(1)
                 
                 # Try in full content if not found in summary
-                if match := re.search(pattern, self.content):
+                if match := pattern.search(self.content):
                     if self.debug:
                         logger.info(f"Found billing period in full content: {match.group(1)}")
                     return match.group(1)
@@ -555,9 +553,7 @@ class TelecomBillProcessor:
             # Try both summary section and full content
             search_text = self.sections["summary"].content or self.content
             
-            # Pattern for phone numbers
-            pattern = r'(050-[0-9]{7}|051-[0-9]{7}|052-[0-9]{7}|053-[0-9]{7}|054-[0-9]{7}|055-[0-9]{7}|058-[0-9]{7})'
-            matches = re.findall(pattern, search_text)
+            matches = _PHONE_NUMBER.findall(search_text)
             
             # Filter out service numbers
             service_numbers = {'050-7078888', '050-7078000', '050-9999166'}
@@ -581,17 +577,10 @@ class TelecomBillProcessor:
             # First try the fixed charges section
             section = self.sections["fixed_charges"].content
             if section:
-                patterns = {
-                    "repairs_top": r'[שירות תיקונים]{dir="rtl"}.*?Top.*?[למספר אלקטרוני]{dir="rtl"}.*?(\d+\.\d+)',
-                    "repairs_regular": r'[שירות תיקונים פלאפון למספר אלקטרוני]{dir="rtl"}.*?(\d+\.\d+)',
-                    "cyber": r'(?:CYBER|[סייבר]{dir="rtl"}).*?[לגלישה בטוחה ברשת]{dir="rtl"}.*?(\d+\.\d+)'
-
-                }
-
                 # Search in both fixed charges and full content
-                for service, pattern in patterns.items():
+                for service, pattern in _SERVICE_CHARGE_PATTERNS.items():
                     for text in [section, self.content]:
-                        matches = list(re.finditer(pattern, text, re.DOTALL))
+                        matches = list(pattern.finditer(text))
                         for idx, match in enumerate(matches, 1):
                             try:
                                 amount = float(match.group(1))
@@ -662,7 +651,7 @@ class TelecomBillProcessor:
             # Pattern to match call details line
             # Example: "0503060366 שיחות 247:54 710:37 73:11 1031:42"
             call_pattern = (
-                rf"{phone}\s+[שיחות]{{dir=\"rtl\"}}\s+"
+                rf"{phone}\s+שיחות\s+"
                 r"(\d+:\d+)\s+"  # Internal
                 r"(\d+:\d+)\s+"  # External
                 r"(\d+:\d+)\s+"  # Landline
@@ -767,7 +756,11 @@ class TelecomQueryProcessor:
     
     def __init__(self):
         """Initialize the TelecomQueryProcessor"""
-        self.debug = True
+
+    @property
+    def debug(self) -> bool:
+        """Verbose tracing follows this module's logger level"""
+        return logger.isEnabledFor(logging.DEBUG)
 
     def create_prompt(self, query: str, bill_data: Dict) -> str:
         """Create detailed prompt for Claude"""
@@ -776,14 +769,14 @@ class TelecomQueryProcessor:
             usage_data = bill_data.get('usage', {})
             
             # Use double curly braces {{ }} for literal braces in f-strings
-            prompt = f"""[אתה נציג שירות לקוחות של פלאפון. להלן הנתונים המדויקים מהחשבונית]{{dir="rtl"}}:
+            prompt = f"""אתה נציג שירות לקוחות של פלאפון. להלן הנתונים המדויקים מהחשבונית:
 
-    [מידע כללי]{{dir="rtl"}}:
+    מידע כללי:
     =========
-    • [סכום כולל לתשלום]{{dir="rtl"}}: {total_amount:.2f} [₪]{{dir="rtl"}}
-    • [תקופת החיוב]{{dir="rtl"}}: {bill_data.get('billing_period', '')}
+    • סכום כולל לתשלום: {total_amount:.2f} ₪
+    • תקופת החיוב: {bill_data.get('billing_period', '')}
 
-    [פירוט חיובים לפי מנוי]{{dir="rtl"}}:
+    פירוט חיובים לפי מנוי:
     =================="""
 
             # Add specific subscriber details
@@ -794,22 +787,22 @@ class TelecomQueryProcessor:
                 prompt += f"""
 
         מנוי {phone}:
-        • [תשלום חודשי קבוע]{{dir="rtl"}}: {monthly_fee:.2f} [₪]{{dir="rtl"}}"""
+        • תשלום חודשי קבוע: {monthly_fee:.2f} ₪"""
 
             # Add instructions for response
             prompt += """
 
-    [הנחיות למענה]{{dir="rtl"}}:
+    הנחיות למענה:
     ===========
-    1. [השתמש אך ורק בנתונים המדויקים שצוינו למעלה]{{dir="rtl"}}
-    2. [בתשובות על סכומים, ציין תמיד את הסימן ₪]{{dir="rtl"}}
-    3. [בתשובות על מנוי ספציפי, השתמש בחיובים המתאימים למנוי זה]{{dir="rtl"}}
-    4. [אם המידע המבוקש לא מופיע בפירוט למעלה, ציין זאת בבירור]{{dir="rtl"}}
+    1. השתמש אך ורק בנתונים המדויקים שצוינו למעלה
+    2. בתשובות על סכומים, ציין תמיד את הסימן ₪
+    3. בתשובות על מנוי ספציפי, השתמש בחיובים המתאימים למנוי זה
+    4. אם המידע המבוקש לא מופיע בפירוט למעלה, ציין זאת בבירור
 
-    [שאלת הלקוח]{{dir="rtl"}}: {query}"""
+    שאלת הלקוח: {query}"""
 
             if self.debug:
-                logger.info(f"Created prompt with usage data: {usage_data}")
+                logger.debug("Created prompt with usage data: %s", LazyJson(usage_data), extra=SAMPLED)
             
             return prompt
 
@@ -820,20 +813,18 @@ class TelecomQueryProcessor:
             
     def _get_default_prompt(self) -> str:
         """Get default system prompt"""
-        return """[אתה נציג שירות לקוחות של חברת פלאפון]{{dir="rtl"}}.
-[עליך לענות בעברית בצורה ברורה ומקצועית]{{dir="rtl"}}.
-[כאשר אתה מזכיר סכומים, השתמש תמיד בסימן ₪]{{dir="rtl"}}.
-[אם אין לך את המידע המבוקש, ציין זאת בבירור]{{dir="rtl"}}."""
-
-
-
-# Create instances
-#bill_processor = TelecomBillProcessor()
-#query_processor = TelecomQueryProcessor()
-
-base_processor = TelecomBillProcessor()
-bill_processor = enhance_bill_processor(base_processor)
-query_processor = TelecomQueryProcessor()
+        return """אתה נציג שירות לקוחות של חברת פלאפון.
+עליך לענות בעברית בצורה ברורה ומקצועית.
+כאשר אתה מזכיר סכומים, השתמש תמיד בסימן ₪.
+אם אין לך את המידע המבוקש, ציין זאת בבירור."""
+
+
+def __getattr__(name: str):
+    # Module-level singletons are built on first use by app.core.container
+    if name in ("bill_processor", "query_processor"):
+        from app.core.container import container
+        return container.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Export both instances
 __all__ = ['bill_processor', 'query_processor']
\ No newline at end of file
@@ -0,0 +1,80 @@
+# app/services/websocket/connection.py
+
+from collections import deque
+from typing import Deque, Optional
+import asyncio
+import time
+from fastapi import WebSocket
+
+METRICS_FRAME = "metrics_update"
+
+class SlowConsumer(Exception):
+    """The client is not reading fast enough to keep up with its queue"""
+
+class SocketConnection:
+    """
+    One client socket with a bounded outbound queue.
+
+    Senders only enqueue; a single writer drains the queue, so a slow
+    client never blocks delivery to anyone else. Metrics frames are
+    coalesced: a newer frame replaces an unsent one instead of queueing
+    behind it.
+    """
+
+    def __init__(self, websocket: WebSocket, customer_id: str, max_queue: int, send_timeout: float):
+        self.websocket = websocket
+        self.customer_id = customer_id
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.coalesced = 0
+        self.closed = False
+        # Maintained by the heartbeat service
+        self.connected_at = self.last_seen = time.monotonic()
+        self.pings_sent = 0
+        self.task: Optional[asyncio.Task] = None
+        self._queue: Deque[dict] = deque()
+        self._latest_metrics: Optional[dict] = None
+        self._ready = asyncio.Event()
+
+    def pending(self) -> int:
+        return len(self._queue) + (self._latest_metrics is not None)
+
+    def enqueue(self, message: dict) -> None:
+        """Queue a message for the writer; raises SlowConsumer when the queue is full"""
+        if self.closed:
+            return
+        if message.get("type") == METRICS_FRAME:
+            if self._latest_metrics is not None:
+                self.coalesced += 1
+            self._latest_metrics = message
+        else:
+            if len(self._queue) >= self.max_queue:
+                raise SlowConsumer(f"{len(self._queue)} messages pending for {self.customer_id}")
+            self._queue.append(message)
+        self._ready.set()
+
+    def _next(self) -> Optional[dict]:
+        if self._queue:
+            return self._queue.popleft()
+        message, self._latest_metrics = self._latest_metrics, None
+        return message
+
+    async def run_writer(self) -> None:
+        """Send queued messages until cancelled; a send that times out raises"""
+        while True:
+            await self._ready.wait()
+            message = self._next()
+            if message is None:
+                self._ready.clear()
+                continue
+            await asyncio.wait_for(self.websocket.send_json(message), self.send_timeout)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await asyncio.wait_for(self.websocket.close(code, reason), self.send_timeout)
+        except Exception:
+            # The socket is already gone or too stuck to say goodbye
+            pass
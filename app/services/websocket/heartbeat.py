@@ -0,0 +1,158 @@
+# app/services/websocket/heartbeat.py
+
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import math
+import time
+from app.core.config import settings
+from .connection import SocketConnection, SlowConsumer
+
+logger = logging.getLogger(__name__)
+
+OnIdle = Callable[[SocketConnection, str], Awaitable[None]]
+
+class TimerWheel:
+    """
+    Hashed timer wheel.
+
+    Timers hash into one of `slots` buckets by deadline; each advance()
+    moves the cursor one tick and returns the timers due in that bucket.
+    Scheduling and cancelling are O(1) dict operations, and a timer more
+    than one revolution away carries a count of rounds left to wait.
+    """
+
+    def __init__(self, tick: float, slots: int):
+        self.tick = tick
+        self.slots = slots
+        self._wheel: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[Hashable, int] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def schedule(self, key: Hashable, delay: float) -> None:
+        """(Re)schedule key to fire after delay seconds, rounded up to a tick"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % self.slots
+        self._wheel[slot][key] = (ticks - 1) // self.slots
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> None:
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            del self._wheel[slot][key]
+
+    def advance(self) -> List[Hashable]:
+        """Move one tick and return the keys that expired"""
+        self._cursor = (self._cursor + 1) % self.slots
+        bucket = self._wheel[self._cursor]
+        expired = []
+        for key, rounds in bucket.items():
+            if rounds:
+                bucket[key] = rounds - 1
+            else:
+                expired.append(key)
+        for key in expired:
+            del bucket[key]
+            del self._slot_of[key]
+        return expired
+
+class HeartbeatService:
+    """
+    Pings and idle detection for every socket from a single task.
+
+    Each connection holds one timer on the wheel. When it fires, a
+    connection quiet for idle_timeout is handed to on_idle; one quiet for
+    a full interval gets a ping; anything more recently seen is simply
+    rescheduled from its last_seen. Receiving any frame only stamps
+    last_seen, so busy sockets cost nothing per message. A connection
+    whose queue is too full to take a ping goes to on_slow instead.
+    """
+
+    def __init__(
+        self,
+        on_idle: OnIdle,
+        interval: float = settings.WS_HEARTBEAT_INTERVAL,
+        idle_timeout: float = settings.WS_IDLE_TIMEOUT,
+        tick: float = 1.0,
+        slots: int = 64,
+        on_slow: Optional[OnIdle] = None
+    ):
+        self.on_idle = on_idle
+        self.on_slow = on_slow or on_idle
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.wheel = TimerWheel(tick, slots)
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, connection: SocketConnection) -> None:
+        connection.last_seen = time.monotonic()
+        self.wheel.schedule(connection, self.interval)
+
+    def unregister(self, connection: SocketConnection) -> None:
+        self.wheel.cancel(connection)
+
+    @staticmethod
+    def touch(connection: SocketConnection) -> None:
+        connection.last_seen = time.monotonic()
+
+    async def check(self, now: Optional[float] = None) -> int:
+        """Advance one tick; returns the number of connections checked"""
+        now = time.monotonic() if now is None else now
+        due = self.wheel.advance()
+        for connection in due:
+            idle = now - connection.last_seen
+            if idle >= self.idle_timeout:
+                await self.on_idle(connection, f"no traffic for {idle:.0f}s")
+                continue
+            if idle < self.interval:
+                self.wheel.schedule(connection, self.interval - idle)
+                continue
+            try:
+                connection.enqueue({"type": "ping", "timestamp": datetime.utcnow().isoformat()})
+            except SlowConsumer as e:
+                await self.on_slow(connection, str(e))
+                continue
+            connection.pings_sent += 1
+            self.wheel.schedule(connection, min(self.interval, self.idle_timeout - idle))
+        return len(due)
+
+    def stats(self) -> List[dict]:
+        """Last-seen stats for every tracked connection"""
+        now = time.monotonic()
+        return [
+            {
+                "customer_id": connection.customer_id,
+                "seconds_since_seen": round(now - connection.last_seen, 3),
+                "connected_seconds": round(now - connection.connected_at, 3),
+                "pings_sent": connection.pings_sent,
+                "pending": connection.pending(),
+                "coalesced": connection.coalesced
+            }
+            for connection in self.wheel._slot_of
+        ]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Heartbeat error: {str(e)}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,86 @@
+# app/services/websocket/metrics_publisher.py
+
+from typing import Dict, Optional
+import asyncio
+import logging
+from app.services.monitoring.metrics_service import metrics_service
+from .websocket_manager import websocket_manager, WebSocketManager
+
+logger = logging.getLogger(__name__)
+
+class MetricsPublisher:
+    """
+    Pushes metrics to connected WebSocket customers from one background task.
+
+    Each tick computes the shared queue metrics once, reads every connected
+    customer's counters in a single Redis pipeline and only sends to a
+    customer whose metrics changed since the last push.
+    """
+
+    def __init__(self, manager: WebSocketManager = websocket_manager, interval: float = 5.0):
+        self.manager = manager
+        self.interval = interval
+        self._last_sent: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _comparable(payload: dict) -> dict:
+        # reset_time moves with the clock; it alone is not a change
+        token_usage = {k: v for k, v in payload["token_usage"].items() if k != "reset_time"}
+        return {**payload, "token_usage": token_usage}
+
+    async def publish_once(self) -> int:
+        """Run one tick, returning the number of customers pushed to"""
+        customers = self.manager.connected_customers()
+        # Forget customers who went away so a reconnect gets a full push
+        for customer_id in list(self._last_sent):
+            if customer_id not in customers:
+                del self._last_sent[customer_id]
+        if not customers:
+            return 0
+
+        queue_metrics = (await metrics_service.get_queue_metrics()).__dict__
+        per_customer = await metrics_service.get_customer_metrics_batch(customers)
+
+        sent = 0
+        for customer_id, (rate_limit, token_usage) in per_customer.items():
+            payload = {
+                "rate_limit_metrics": rate_limit.__dict__,
+                "queue_metrics": queue_metrics,
+                "token_usage": {
+                    "used": token_usage.used,
+                    "remaining": token_usage.remaining,
+                    "reset_time": token_usage.reset_time.isoformat()
+                }
+            }
+            comparable = self._comparable(payload)
+            if self._last_sent.get(customer_id) == comparable:
+                continue
+            self._last_sent[customer_id] = comparable
+            # Every customer listed has a socket on this worker; skip the bus
+            await self.manager.broadcast_metrics(customer_id, payload, local=True)
+            sent += 1
+        return sent
+
+    async def _run(self):
+        while True:
+            try:
+                await self.publish_once()
+            except Exception as e:
+                logger.error(f"Metrics publisher error: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+metrics_publisher = MetricsPublisher()
@@ -0,0 +1,91 @@
+# app/services/websocket/pubsub.py
+
+from typing import Awaitable, Callable, Optional
+import asyncio
+import json
+import logging
+from redis import asyncio as redis_asyncio
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "ws:customer:"
+# Longest the listener holds the connection while waiting for a message
+READ_TIMEOUT = 0.2
+
+Deliver = Callable[[str, dict], Awaitable[None]]
+
+class WebSocketBus:
+    """
+    Cross-worker delivery of WebSocket messages over Redis pub/sub.
+
+    Any worker can publish to a customer's channel. A worker subscribes to
+    a channel only while it holds a socket for that customer, so a message
+    reaches exactly the workers that can deliver it. All subscriptions of
+    a worker share one PubSub connection; a lock keeps SUBSCRIBE and
+    UNSUBSCRIBE from interleaving with the listener's reads on it.
+    """
+
+    def __init__(self, host: str, port: int, db: int):
+        self.redis = redis_asyncio.Redis(host=host, port=port, db=db, decode_responses=True)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._deliver: Optional[Deliver] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def channel(customer_id: str) -> str:
+        return f"{CHANNEL_PREFIX}{customer_id}"
+
+    async def publish(self, customer_id: str, message: dict) -> int:
+        """Publish to a customer's channel, returning the number of subscribed workers"""
+        return await self.redis.publish(self.channel(customer_id), json.dumps(message))
+
+    async def subscribe(self, customer_id: str) -> None:
+        """Subscribe to a customer's channel; raises if Redis refuses"""
+        async with self._lock:
+            await self.pubsub.subscribe(self.channel(customer_id))
+
+    async def unsubscribe(self, customer_id: str) -> None:
+        async with self._lock:
+            await self.pubsub.unsubscribe(self.channel(customer_id))
+
+    async def _listen(self):
+        while True:
+            if not self.pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                async with self._lock:
+                    message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=READ_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read
+                logger.error(f"WebSocket bus read error: {str(e)}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+
+            customer_id = message["channel"][len(CHANNEL_PREFIX):]
+            try:
+                await self._deliver(customer_id, json.loads(message["data"]))
+            except Exception as e:
+                logger.error(f"Error delivering bus message to {customer_id}: {str(e)}")
+
+    def start(self, deliver: Deliver) -> None:
+        """Start the listener; deliver(customer_id, message) sends to local sockets"""
+        self._deliver = deliver
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.pubsub.close()
+        await self.redis.close()
@@ -1,62 +1,233 @@
 # app/services/websocket/websocket_manager.py
 
 from fastapi import WebSocket
-from typing import Dict, Set, Optional
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict, List, Optional
+import asyncio
 import logging
 import json
 from datetime import datetime
+from app.core.config import settings
+from .connection import METRICS_FRAME, SocketConnection, SlowConsumer
+from .heartbeat import HeartbeatService
+from .pubsub import WebSocketBus
 
 logger = logging.getLogger(__name__)
 
 class WebSocketManager:
-    def __init__(self):
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
-        self.customer_connections: Dict[str, Set[WebSocket]] = {}
+    def __init__(
+        self,
+        bus: Optional[WebSocketBus] = None,
+        max_queue: int = settings.WS_SEND_QUEUE_SIZE,
+        send_timeout: float = settings.WS_SEND_TIMEOUT
+    ):
+        self.active_connections: Dict[str, Dict[WebSocket, SocketConnection]] = {}
+        # Serialise connect/disconnect per customer: [lock, tasks using it]
+        self._customer_locks: Dict[str, list] = {}
+        # Delivers messages published on other workers to sockets held here
+        self.bus = bus
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.heartbeat = HeartbeatService(on_idle=self._close_idle, on_slow=self._evict)
 
-    async def connect(self, websocket: WebSocket, customer_id: str):
+    async def connect(self, websocket: WebSocket, customer_id: str) -> SocketConnection:
+        """
+        Accept the socket and start its writer task, replacing any socket
+        the customer already has. Raises, after closing the socket, if the
+        customer's bus channel cannot be subscribed.
+        """
         await websocket.accept()
-        if customer_id not in self.active_connections:
-            self.active_connections[customer_id] = set()
-        self.active_connections[customer_id].add(websocket)
+        async with self._customer_lock(customer_id):
+            # One socket per customer: a reconnect closes the previous one,
+            # which keeps the bus subscription
+            for previous in list(self.active_connections.get(customer_id, {}).values()):
+                self._release(previous)
+                await previous.close(1000, "New connection established")
+            if customer_id not in self.active_connections:
+                self.active_connections[customer_id] = {}
+                if self.bus:
+                    try:
+                        await self.bus.subscribe(customer_id)
+                    except Exception as e:
+                        # Without the subscription pushes from other workers
+                        # would never arrive; refuse so the client reconnects
+                        logger.error(f"Error subscribing {customer_id} to WebSocket bus: {e}")
+                        del self.active_connections[customer_id]
+                        await websocket.close(1011, "Message bus unavailable")
+                        raise
+            connection = SocketConnection(websocket, customer_id, self.max_queue, self.send_timeout)
+            connection.task = asyncio.create_task(self._write(connection))
+            self.active_connections[customer_id][websocket] = connection
+            self.heartbeat.register(connection)
         logger.info(f"New WebSocket connection for customer {customer_id}")
+        return connection
 
     async def disconnect(self, websocket: WebSocket, customer_id: str):
-        self.active_connections[customer_id].remove(websocket)
-        if not self.active_connections[customer_id]:
-            del self.active_connections[customer_id]
+        async with self._customer_lock(customer_id):
+            connections = self.active_connections.get(customer_id)
+            if connections is None:
+                return
+            connection = connections.get(websocket)
+            if connection:
+                self._release(connection)
+            if not connections:
+                del self.active_connections[customer_id]
+                if self.bus:
+                    try:
+                        await self.bus.unsubscribe(customer_id)
+                    except Exception as e:
+                        logger.error(f"Error unsubscribing {customer_id} from WebSocket bus: {e}")
         logger.info(f"WebSocket disconnected for customer {customer_id}")
 
-    async def broadcast_metrics(self, customer_id: str, metrics: dict):
-        """Broadcast metrics to all connected clients for a customer"""
-        if customer_id in self.active_connections:
-            dead_connections = set()
-            for connection in self.active_connections[customer_id]:
-                try:
-                    await connection.send_json({
-                        "type": "metrics_update",
-                        "data": metrics,
-                        "timestamp": datetime.utcnow().isoformat()
-                    })
-                except Exception as e:
-                    logger.error(f"Error broadcasting to connection: {e}")
-                    dead_connections.add(connection)
-            
-            # Clean up dead connections
-            for dead in dead_connections:
-                self.active_connections[customer_id].remove(dead)
+    @asynccontextmanager
+    async def _customer_lock(self, customer_id: str) -> AsyncGenerator[None, None]:
+        """Hold the customer's lock; it is dropped once no task is using it"""
+        entry = self._customer_locks.setdefault(customer_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._customer_locks[customer_id]
+
+    def _release(self, connection: SocketConnection) -> None:
+        """Forget a connection and stop its writer; the customer's bus subscription is left alone"""
+        self.active_connections.get(connection.customer_id, {}).pop(connection.websocket, None)
+        self.heartbeat.unregister(connection)
+        if connection.task and connection.task is not asyncio.current_task():
+            connection.task.cancel()
+
+    async def _write(self, connection: SocketConnection):
+        try:
+            await connection.run_writer()
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            await self._evict(connection, f"send timed out after {connection.send_timeout}s")
+        except Exception as e:
+            logger.error(f"Error sending to connection for {connection.customer_id}: {e}")
+            await self.disconnect(connection.websocket, connection.customer_id)
+
+    async def _evict(self, connection: SocketConnection, reason: str):
+        """Drop a client that cannot keep up so it stops holding memory"""
+        logger.warning(f"Evicting slow WebSocket consumer {connection.customer_id}: {reason}")
+        await self.disconnect(connection.websocket, connection.customer_id)
+        await connection.close(1013, "Slow consumer")
+
+    async def _close_idle(self, connection: SocketConnection, reason: str):
+        """Drop a client that stopped sending anything, pongs included"""
+        logger.info(f"Closing idle WebSocket for {connection.customer_id}: {reason}")
+        await self.disconnect(connection.websocket, connection.customer_id)
+        await connection.close(4000, "Idle timeout")
+
+    def start(self) -> None:
+        self.heartbeat.start()
+        if self.bus:
+            self.bus.start(self.send_to_customer)
+
+    async def stop(self) -> None:
+        await self.heartbeat.stop()
+        if self.bus:
+            await self.bus.stop()
+
+    async def publish(self, customer_id: str, message: dict):
+        """Deliver to the customer's sockets on whichever worker holds them"""
+        if self.bus:
+            try:
+                await self.bus.publish(customer_id, message)
+                return
+            except Exception as e:
+                logger.error(f"Error publishing to WebSocket bus, delivering locally: {e}")
+        await self.send_to_customer(customer_id, message)
+
+    def is_connected(self, websocket: WebSocket, customer_id: str) -> bool:
+        return websocket in self.active_connections.get(customer_id, {})
+
+    def touch(self, websocket: WebSocket, customer_id: str) -> None:
+        """Count an inbound frame of any kind as liveness"""
+        connection = self.active_connections.get(customer_id, {}).get(websocket)
+        if connection:
+            self.heartbeat.touch(connection)
+
+    def connected_customers(self) -> List[str]:
+        """Customers with at least one open socket on this worker"""
+        return list(self.active_connections)
+
+    def send(self, websocket: WebSocket, customer_id: str, message: dict) -> bool:
+        """Queue a message for one socket, False if it is no longer connected"""
+        connection = self.active_connections.get(customer_id, {}).get(websocket)
+        if connection is None:
+            return False
+        connection.enqueue(message)
+        return True
+
+    async def send_to_customer(self, customer_id: str, message: dict):
+        """Queue a message on every connection of a customer, evicting full ones"""
+        connections = self.active_connections.get(customer_id)
+        if not connections:
+            return
+        slow = []
+        for connection in connections.values():
+            try:
+                connection.enqueue(message)
+            except SlowConsumer as e:
+                slow.append((connection, str(e)))
+
+        for connection, reason in slow:
+            await self._evict(connection, reason)
+
+    async def handle_message(self, websocket: WebSocket, customer_id: str, message: dict):
+        """Handle different types of incoming messages"""
+        try:
+            connection = self.active_connections.get(customer_id, {}).get(websocket)
+            message_type = message.get("type")
+
+            if message_type == "ping":
+                self.send(websocket, customer_id, {
+                    "type": "pong",
+                    "timestamp": datetime.now().isoformat()
+                })
+            elif message_type == "session_start":
+                self.send(websocket, customer_id, {
+                    "type": "session_update",
+                    "status": "active",
+                    "timestamp": datetime.now().isoformat()
+                })
+            elif message_type == "session_end":
+                await self.disconnect(websocket, customer_id)
+                if connection:
+                    await connection.close(1000, "Normal closure")
+
+        except Exception as e:
+            logger.error(f"Error handling message for {customer_id}: {str(e)}")
+
+    async def broadcast_metrics(self, customer_id: str, metrics: dict, local: bool = False):
+        """Broadcast metrics to all connected clients for a customer; local skips the bus"""
+        message = {
+            "type": METRICS_FRAME,
+            "data": metrics,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        if local:
+            await self.send_to_customer(customer_id, message)
+        else:
+            await self.publish(customer_id, message)
 
     async def send_alert(self, customer_id: str, alert_type: str, message: str):
         """Send alert to specific customer connections"""
-        if customer_id in self.active_connections:
-            for connection in self.active_connections[customer_id]:
-                try:
-                    await connection.send_json({
-                        "type": "alert",
-                        "alert_type": alert_type,
-                        "message": message,
-                        "timestamp": datetime.utcnow().isoformat()
-                    })
-                except Exception as e:
-                    logger.error(f"Error sending alert: {e}")
-
-websocket_manager = WebSocketManager()
\ No newline at end of file
+        await self.publish(customer_id, {
+            "type": "alert",
+            "alert_type": alert_type,
+            "message": message,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+websocket_manager = WebSocketManager(
+    bus=WebSocketBus(
+        settings.REDIS_SESSION_HOST,
+        settings.REDIS_SESSION_PORT,
+        settings.REDIS_SESSION_DB
+    ) if settings.WS_PUBSUB_ENABLED else None
+)
@@ -1,38 +1,17 @@
 import logging
-import os
-from datetime import datetime
 
 class CustomLogger:
+    """
+    Proxy for the 'custom_logger' logger, kept for existing imports.
+
+    It has no handlers of its own: records propagate to the queue handler
+    installed by app.core.logging.setup_logging.
+    """
+
     def __init__(self):
-        self.log_dir = "logs"
-        if not os.path.exists(self.log_dir):
-            os.makedirs(self.log_dir)
-        
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        log_file = os.path.join(self.log_dir, f"{current_date}.log")
-        
-        # Create a logger instance
         self.logger = logging.getLogger('custom_logger')
-        self.logger.setLevel(logging.DEBUG)
-        
-        # Define the log format
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s')
-        
-        # Create a file handler
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
-        
-        # Create a console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
-        
-        # Add handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
 
     def __getattr__(self, name):
         return getattr(self.logger, name)
 
-logger = CustomLogger()
\ No newline at end of file
+logger = CustomLogger()
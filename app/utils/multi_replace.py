@@ -0,0 +1,26 @@
+from typing import Dict, Tuple
+import re
+
+class MultiReplacer:
+    """
+    Replace many literal patterns in a single left-to-right pass.
+
+    The patterns compile into one regex alternation, longest first, so at
+    any position the longest matching pattern wins. Scanning resumes after
+    each match, so replacement text is never rescanned and the result
+    does not depend on the order of the mapping.
+    """
+
+    def __init__(self, replacements: Dict[str, str]):
+        self.replacements = dict(replacements)
+        ordered = sorted(self.replacements, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(re.escape, ordered))) if ordered else None
+
+    def _lookup(self, match: re.Match) -> str:
+        return self.replacements[match.group()]
+
+    def replace(self, text: str) -> Tuple[str, int]:
+        """Return the replaced text and the number of replacements made"""
+        if self.pattern is None or not text:
+            return text, 0
+        return self.pattern.subn(self._lookup, text)
@@ -0,0 +1,21 @@
+-- BM25 section index per bill, stored next to pdf_content_cache
+CREATE TABLE IF NOT EXISTS telecom.pdf_section_index (
+    content_hash VARCHAR(64) PRIMARY KEY,
+    index_version INTEGER NOT NULL,
+    index_data JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Drop indexes together with the cached content they were built from
+CREATE OR REPLACE FUNCTION telecom.cleanup_old_cache() RETURNS void AS $$
+BEGIN
+    DELETE FROM telecom.pdf_content_cache 
+    WHERE created_at < NOW() - INTERVAL '7 days';
+
+    DELETE FROM telecom.pdf_section_index i
+    WHERE NOT EXISTS (
+        SELECT 1 FROM telecom.pdf_content_cache c
+        WHERE c.content_hash = i.content_hash
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,9 @@
+-- Keyset pagination on (created_at, id) for chat history
+CREATE INDEX IF NOT EXISTS idx_chat_messages_session_created_id
+ON telecom.chat_messages(session_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS telecom.idx_chat_messages_session_created;
+
+-- Covering index so customer-wide history resolves session ids index-only
+CREATE INDEX IF NOT EXISTS idx_sessions_customer_id
+ON telecom.sessions(customer_id) INCLUDE (id);
@@ -0,0 +1,122 @@
+-- Convert telecom.chat_messages to monthly range partitions on created_at.
+-- Retention becomes DETACH + DROP of whole partitions instead of a DELETE.
+BEGIN;
+
+ALTER TABLE telecom.chat_messages RENAME TO chat_messages_unpartitioned;
+ALTER INDEX telecom.chat_messages_pkey RENAME TO chat_messages_unpartitioned_pkey;
+
+DROP INDEX IF EXISTS telecom.idx_chat_messages_session_created;
+DROP INDEX IF EXISTS telecom.idx_chat_messages_session_created_id;
+DROP INDEX IF EXISTS telecom.idx_chat_messages_created_at;
+
+CREATE TABLE telecom.chat_messages (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    session_id UUID NOT NULL REFERENCES telecom.sessions(id),
+    message_type VARCHAR(10) NOT NULL,
+    content TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    pdf_context UUID REFERENCES telecom.pdf_documents(id),
+    metadata JSONB DEFAULT '{}'::jsonb,
+    CONSTRAINT valid_message_type CHECK (message_type IN ('user', 'bot', 'system')),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX IF NOT EXISTS idx_chat_messages_session_created_id
+ON telecom.chat_messages(session_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_chat_messages_created_at
+ON telecom.chat_messages(created_at DESC);
+
+-- Catches rows outside every monthly partition; normally stays empty
+CREATE TABLE IF NOT EXISTS telecom.chat_messages_default
+PARTITION OF telecom.chat_messages DEFAULT;
+
+-- Create the partition holding the month that starts at month_start
+CREATE OR REPLACE FUNCTION telecom.create_chat_message_partition(month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    partition_name TEXT := 'chat_messages_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS telecom.%I PARTITION OF telecom.chat_messages
+         FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        month_start,
+        (month_start + INTERVAL '1 month')::date
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Make sure the current month and the next months_ahead months exist
+CREATE OR REPLACE FUNCTION telecom.ensure_chat_message_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS void AS $$
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        PERFORM telecom.create_chat_message_partition(
+            (date_trunc('month', NOW()) + make_interval(months => i))::date
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach and drop monthly partitions whose whole range is older than retention
+CREATE OR REPLACE FUNCTION telecom.drop_expired_chat_message_partitions(retention INTERVAL DEFAULT INTERVAL '90 days')
+RETURNS INTEGER AS $$
+DECLARE
+    part RECORD;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        JOIN pg_namespace n ON n.oid = p.relnamespace
+        WHERE n.nspname = 'telecom'
+        AND p.relname = 'chat_messages'
+        AND c.relname ~ '^chat_messages_\d{4}_\d{2}$'
+    LOOP
+        IF to_date(substring(part.relname FROM '\d{4}_\d{2}$'), 'YYYY_MM') + INTERVAL '1 month'
+            <= NOW() - retention THEN
+            EXECUTE format('ALTER TABLE telecom.chat_messages DETACH PARTITION telecom.%I', part.relname);
+            EXECUTE format('DROP TABLE telecom.%I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep the old entry point working for existing callers
+CREATE OR REPLACE FUNCTION telecom.cleanup_old_chat_messages()
+RETURNS void AS $$
+BEGIN
+    PERFORM telecom.drop_expired_chat_message_partitions(INTERVAL '90 days');
+END;
+$$ LANGUAGE plpgsql;
+
+-- Move existing rows into their monthly partitions
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', created_at)::date
+        FROM telecom.chat_messages_unpartitioned
+        WHERE created_at IS NOT NULL
+    LOOP
+        PERFORM telecom.create_chat_message_partition(month_start);
+    END LOOP;
+    PERFORM telecom.ensure_chat_message_partitions(3);
+END;
+$$;
+
+INSERT INTO telecom.chat_messages
+(id, session_id, message_type, content, created_at, pdf_context, metadata)
+SELECT id, session_id, message_type, content, COALESCE(created_at, NOW()), pdf_context, metadata
+FROM telecom.chat_messages_unpartitioned;
+
+DROP TABLE telecom.chat_messages_unpartitioned;
+
+COMMIT;
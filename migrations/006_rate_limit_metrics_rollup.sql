@@ -0,0 +1,32 @@
+-- Per-customer 10 second rollups written by MetricsAggregator.
+-- No FK to customers: one unknown id must not fail the whole multi-row insert.
+CREATE TABLE IF NOT EXISTS telecom.rate_limit_metrics_rollup (
+    customer_id VARCHAR(20) NOT NULL,
+    bucket_start TIMESTAMPTZ NOT NULL,
+    bucket_seconds INTEGER NOT NULL,
+    request_count INTEGER NOT NULL,
+    error_count INTEGER NOT NULL DEFAULT 0,
+    rate_limited_requests INTEGER NOT NULL DEFAULT 0,
+    token_usage BIGINT NOT NULL DEFAULT 0,
+    max_queue_length INTEGER NOT NULL DEFAULT 0,
+    response_time_sum FLOAT NOT NULL DEFAULT 0.0,
+    response_time_min FLOAT,
+    response_time_max FLOAT,
+    response_time_p50 FLOAT,
+    response_time_p95 FLOAT,
+    response_time_p99 FLOAT,
+    PRIMARY KEY (customer_id, bucket_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_limit_metrics_rollup_bucket
+ON telecom.rate_limit_metrics_rollup(bucket_start);
+
+CREATE OR REPLACE FUNCTION telecom.cleanup_old_rate_limit_metrics()
+RETURNS void AS $$
+BEGIN
+    DELETE FROM telecom.rate_limit_metrics
+    WHERE created_at < NOW() - INTERVAL '7 days';
+    DELETE FROM telecom.rate_limit_metrics_rollup
+    WHERE bucket_start < NOW() - INTERVAL '7 days';
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,18 @@
+-- Cached PDF text is stored already normalized. Record which normalizer
+-- produced it so reads can return it as is; rows from before this
+-- migration have NULL and are re-extracted on next use.
+ALTER TABLE telecom.pdf_content_cache
+    ADD COLUMN IF NOT EXISTS normalizer_version INTEGER;
+
+-- Whole-document rows (page_number IS NULL) were never matched by
+-- UNIQUE(content_hash, page_number) and piled up on every extraction.
+-- Keep the newest one per bill and make them unique from here on.
+DELETE FROM telecom.pdf_content_cache c
+USING telecom.pdf_content_cache newer
+WHERE c.page_number IS NULL
+  AND newer.page_number IS NULL
+  AND newer.content_hash = c.content_hash
+  AND (newer.created_at, newer.id) > (c.created_at, c.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pdf_content_cache_document
+ON telecom.pdf_content_cache(content_hash) WHERE page_number IS NULL;
@@ -0,0 +1,40 @@
+-- A row for a month without a partition lands in chat_messages_default.
+-- CREATE TABLE ... PARTITION OF then fails for that month ("updated
+-- partition constraint for default partition would be violated"), which
+-- stalls ensure_chat_message_partitions. Build the partition detached,
+-- move the month's rows out of the default partition and attach it.
+BEGIN;
+
+CREATE OR REPLACE FUNCTION telecom.create_chat_message_partition(month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    partition_name TEXT := 'chat_messages_' || to_char(month_start, 'YYYY_MM');
+    month_end DATE := (month_start + INTERVAL '1 month')::date;
+BEGIN
+    IF to_regclass(format('telecom.%I', partition_name)) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE telecom.%I (LIKE telecom.chat_messages INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS (
+             DELETE FROM telecom.chat_messages_default
+             WHERE created_at >= %L AND created_at < %L
+             RETURNING *
+         )
+         INSERT INTO telecom.%I SELECT * FROM moved',
+        month_start, month_end, partition_name
+    );
+    -- Indexes and foreign keys are cloned from the parent on attach
+    EXECUTE format(
+        'ALTER TABLE telecom.chat_messages ATTACH PARTITION telecom.%I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start, month_end
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -156,6 +156,10 @@ export const useWebSocket = (url: string) => {
 
   const handleMessage = (data: any) => {
     switch (data.type) {
+      case 'ping':
+        // Server heartbeat: answer so an otherwise quiet socket is not closed as idle
+        send({ type: 'pong', timestamp: new Date().toISOString() })
+        break
       case 'pong':
         // Handle ping response
         sessionStore.updateLastActivity()
@@ -0,0 +1,51 @@
+import asyncio
+from uuid import uuid4
+
+import asyncpg
+
+from app.services.chat_history.models import ChatMessage
+from app.services.chat_history.writer import ChatHistoryWriter
+
+
+def make_messages(count):
+    session_id = uuid4()
+    return [
+        ChatMessage(id=uuid4(), session_id=session_id, message_type="user", content=f"m{i}", metadata={"customer_id": "c1"})
+        for i in range(count)
+    ]
+
+
+def test_bad_row_is_dead_lettered_and_the_rest_written(tmp_path):
+    writer = ChatHistoryWriter(spool_path=str(tmp_path / "spool.jsonl"), dead_letter_path=str(tmp_path / "dead.jsonl"))
+    messages = make_messages(7)
+    bad = messages[4]
+    written = []
+
+    async def write_batch(batch):
+        if bad in batch:
+            raise asyncpg.exceptions.ForeignKeyViolationError("violates foreign key constraint")
+        written.extend(batch)
+
+    writer._write_batch = write_batch
+    for message in messages:
+        writer.enqueue(message)
+    assert asyncio.run(writer.flush()) == 7
+
+    assert sorted(m.content for m in written) == sorted(m.content for m in messages if m is not bad)
+    assert not writer.spool_path.exists()
+    dead = writer.dead_letter_path.read_text(encoding="utf-8").splitlines()
+    assert [ChatMessage.model_validate_json(line).id for line in dead] == [bad.id]
+
+
+def test_connection_errors_spool_the_whole_batch(tmp_path):
+    writer = ChatHistoryWriter(spool_path=str(tmp_path / "spool.jsonl"), dead_letter_path=str(tmp_path / "dead.jsonl"))
+
+    async def write_batch(batch):
+        raise ConnectionRefusedError("postgres is down")
+
+    writer._write_batch = write_batch
+    for message in make_messages(3):
+        writer.enqueue(message)
+    assert asyncio.run(writer.flush()) == 0
+    assert len(writer.spool_path.read_text(encoding="utf-8").splitlines()) == 3
+    assert not writer.dead_letter_path.exists()
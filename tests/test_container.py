@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+from app.core.container import Container
+
+
+def make_container(calls):
+    container = Container()
+
+    def slow_factory():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        return object()
+
+    container.register("slow", slow_factory)
+    container.register("dependent", lambda: ("dependent", container.get("slow")))
+    return container
+
+
+def test_service_is_created_once_on_first_use():
+    calls = []
+    container = make_container(calls)
+    assert not container.created("slow")
+
+    threads = [threading.Thread(target=container.get, args=("slow",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert container.get("dependent")[1] is container.get("slow")
+
+
+def test_warm_and_override():
+    calls = []
+    container = make_container(calls)
+    asyncio.run(container.warm(["dependent", "slow"]))
+    assert len(calls) == 1 and container.created("dependent")
+
+    fake = object()
+    container.override("slow", fake)
+    assert container.provide("slow")() is fake
+
+    container.reset()
+    assert not container.created("slow")
+
+
+def test_importing_metrics_service_does_not_build_redis():
+    import importlib
+    from app.core.container import container
+    from app.services.monitoring import metrics_service
+
+    container.reset()
+    importlib.reload(metrics_service)
+    assert not container.created("redis_client")
@@ -0,0 +1,48 @@
+import asyncio
+
+from app.services.monitoring.health import HealthMonitor
+
+
+def test_ready_needs_startup_and_fresh_passing_probes():
+    calls = []
+
+    async def postgres():
+        calls.append("postgresql")
+        return True
+
+    async def redis():
+        raise ConnectionError("refused")
+
+    async def scheduler():
+        await asyncio.sleep(1)
+        return True
+
+    async def run():
+        monitor = HealthMonitor(interval=0.05, timeout=0.02)
+        monitor.register("postgresql", postgres)
+        monitor.register("redis", redis)
+        monitor.register("scheduler", scheduler)
+        await monitor.check_once()
+        snapshot = monitor.snapshot()
+        assert snapshot["postgresql"]["status"] == "up"
+        assert snapshot["redis"] == {**snapshot["redis"], "status": "down", "error": "refused"}
+        assert snapshot["scheduler"]["error"].startswith("timed out")
+        assert not monitor.is_ready()
+
+        healthy = HealthMonitor(interval=0.05, timeout=0.02)
+        healthy.register("postgresql", postgres)
+        await healthy.start()
+        assert not healthy.is_ready()
+        healthy.accepting = True
+        assert healthy.is_ready()
+        await healthy.stop()
+        assert not healthy.is_ready()
+
+        # Reading the cache never runs a probe
+        probes = len(calls)
+        healthy.snapshot()
+        assert len(calls) == probes
+        await asyncio.sleep(0.2)
+        assert not healthy.is_up("postgresql")
+
+    asyncio.run(run())
@@ -0,0 +1,37 @@
+import asyncio
+
+from app.services.websocket.connection import SocketConnection
+from app.services.websocket.heartbeat import HeartbeatService, TimerWheel
+
+
+def test_timer_wheel_fires_after_delay_across_rounds():
+    wheel = TimerWheel(tick=1.0, slots=4)
+    wheel.schedule("a", 2)
+    wheel.schedule("b", 6)
+    wheel.schedule("c", 3)
+    wheel.cancel("c")
+
+    fired = [wheel.advance() for _ in range(6)]
+    assert fired == [[], ["a"], [], [], [], ["b"]]
+    assert len(wheel) == 0
+
+
+def test_quiet_connection_is_pinged_then_evicted():
+    evicted = []
+
+    async def on_idle(connection, reason):
+        evicted.append(connection.customer_id)
+
+    async def run():
+        heartbeat = HeartbeatService(on_idle, interval=2, idle_timeout=4, tick=1.0, slots=8)
+        connection = SocketConnection(None, "c1", max_queue=10, send_timeout=1.0)
+        heartbeat.register(connection)
+        start = connection.last_seen
+        for second in range(1, 5):
+            await heartbeat.check(now=start + second)
+        return connection
+
+    connection = asyncio.run(run())
+    assert connection.pings_sent == 1
+    assert connection._next()["type"] == "ping"
+    assert evicted == ["c1"]
@@ -0,0 +1,19 @@
+from app.services.pdf_content.hebrew import normalize_hebrew, render_rtl
+
+
+def test_joins_split_hebrew_without_markup():
+    assert normalize_hebrew("ש ל ו ם  world") == 'שלום world'
+
+
+def test_fixes_letters_and_drops_marks_and_nikkud():
+    text = "‏שָׁלוֹם‎ ×ב¬ 12.50"
+    assert normalize_hebrew(text) == 'שלום אב 12.50'
+
+
+def test_collapses_whitespace():
+    assert normalize_hebrew("  a \n\t b  ") == "a b"
+    assert normalize_hebrew("") == ""
+
+
+def test_render_rtl_wraps_hebrew_runs_for_display():
+    assert render_rtl('שלום אב 12.50') == '[שלום]{dir="rtl"} [אב]{dir="rtl"} 12.50'
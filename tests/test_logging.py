@@ -0,0 +1,66 @@
+import logging
+import threading
+
+from app.core import logging as app_logging
+from app.core.logging import SAMPLED, LazyJson, SamplingFilter
+
+
+def make_record(sampled: bool) -> logging.LogRecord:
+    record = logging.LogRecord("t", logging.DEBUG, __file__, 1, "msg", None, None)
+    if sampled:
+        record.sampled = True
+    return record
+
+
+def test_sampling_filter_keeps_one_in_n_marked_records():
+    sampling = SamplingFilter(rate=10)
+    kept = sum(sampling.filter(make_record(sampled=True)) for _ in range(100))
+    assert kept == 10
+    assert all(sampling.filter(make_record(sampled=False)) for _ in range(5))
+
+
+def test_lazy_json_formats_only_when_rendered():
+    assert str(LazyJson({"סכום": 1})) == '{"סכום": 1}'
+
+
+class ThreadProbe:
+    """Records which thread renders it"""
+
+    def __init__(self):
+        self.rendered_on = None
+
+    def __str__(self):
+        self.rendered_on = threading.get_ident()
+        return "probe"
+
+
+def test_setup_logging_writes_through_listener(tmp_path):
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    log_file = tmp_path / "app.log"
+    try:
+        app_logging.setup_logging(
+            level="INFO", log_file=str(log_file), levels={"bench.verbose": "DEBUG"}, sample_rate=1000
+        )
+        logging.getLogger("bench.quiet").debug("hidden")
+        logging.getLogger("bench.verbose").debug("shown %s", LazyJson([1]))
+        probe = ThreadProbe()
+        logging.getLogger("bench.verbose").info("rendered %s", probe)
+        for _ in range(3):
+            logging.getLogger("bench.verbose").debug("dump", extra=SAMPLED)
+    finally:
+        app_logging.stop_logging()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
+        logging.getLogger("bench.verbose").setLevel(logging.NOTSET)
+
+    text = log_file.read_text(encoding="utf-8")
+    assert "hidden" not in text
+    assert "shown [1]" in text
+    assert text.count("dump") == 1
+    # Formatting happens on the listener thread, not the caller's
+    assert "rendered probe" in text
+    assert probe.rendered_on not in (None, threading.get_ident())
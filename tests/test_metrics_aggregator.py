@@ -0,0 +1,40 @@
+import asyncio
+
+from app.services.monitoring.aggregator import METRICS_BUCKETS_DROPPED, MetricsAggregator, MetricsBucket
+
+
+def test_records_roll_up_per_customer_bucket():
+    aggregator = MetricsAggregator(bucket_seconds=3600)
+    for response_time in (0.1, 0.2, 0.3, 0.4):
+        aggregator.record("c1", queue_length=2, rate_limited_requests=1, token_usage=10, response_time=response_time)
+    aggregator.record("c1", queue_length=5, rate_limited_requests=2, token_usage=0, response_time=-1)
+    aggregator.record("c2", queue_length=0, rate_limited_requests=0, token_usage=3, response_time=1.0)
+
+    buckets = aggregator._take_closed(include_open=True)
+    assert len(buckets) == 2
+    assert aggregator._buckets == {}
+
+    c1 = next(bucket for (customer_id, _), bucket in buckets.items() if customer_id == "c1")
+    assert c1.request_count == 5
+    assert c1.error_count == 1
+    assert c1.token_usage == 40
+    assert c1.max_queue_length == 5
+    assert c1.rate_limited_requests == 2
+    assert c1.percentile(0.5) == 0.3
+    assert c1.percentile(0.99) == 0.4
+
+
+def test_failed_flush_keeps_only_the_newest_buckets():
+    aggregator = MetricsAggregator(bucket_seconds=10, max_buckets=3)
+
+    async def fail(buckets):
+        raise ConnectionRefusedError()
+    aggregator._write = fail
+
+    for bucket_start in (40, 10, 30, 20, 50):
+        aggregator._buckets[("c1", bucket_start)] = MetricsBucket(request_count=1)
+    dropped = METRICS_BUCKETS_DROPPED.value()
+
+    assert asyncio.run(aggregator.flush(include_open=True)) == 0
+    assert sorted(start for _, start in aggregator._buckets) == [30, 40, 50]
+    assert METRICS_BUCKETS_DROPPED.value() == dropped + 2
@@ -0,0 +1,23 @@
+from app.services.monitoring.registry import MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("q_seconds", "Query latency", ["statement"], buckets=(0.1, 1.0))
+    latency.observe(0.05, statement="a")
+    latency.observe(0.5, statement="a")
+    latency.observe(5, statement="a")
+
+    text = registry.render()
+    assert 'q_seconds_bucket{statement="a",le="0.1"} 1' in text
+    assert 'q_seconds_bucket{statement="a",le="1"} 2' in text
+    assert 'q_seconds_bucket{statement="a",le="+Inf"} 3' in text
+    assert 'q_seconds_count{statement="a"} 3' in text
+
+
+def test_reregistering_returns_same_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("hits_total", "Hits")
+    first.inc()
+    assert registry.counter("hits_total", "Hits") is first
+    assert "hits_total 1" in registry.render()
@@ -0,0 +1,19 @@
+from app.services.bill_text_processor import BillTextProcessor
+from app.utils.multi_replace import MultiReplacer
+
+
+def test_longest_match_wins_and_output_is_not_rescanned():
+    replacer = MultiReplacer({"ab": "X", "abc": "Y", "Y": "Z"})
+    assert replacer.replace("abcab Yab") == ("YX ZX", 4)
+
+
+def test_no_patterns_is_a_no_op():
+    assert MultiReplacer({}).replace("text") == ("text", 0)
+
+
+def test_bill_processor_fixes_and_marks_in_one_pass_each():
+    processor = BillTextProcessor()
+    text = 'חיובים קבועים 10ש"ח מעמ סה"כ חיובים'
+    assert processor.process(text) == (
+        '[SECTION_CHARGES_START]חיובים קבועים 10 ₪ מע"מ סה"כ חיובים[SECTION_USAGE_END]'
+    )
@@ -0,0 +1,38 @@
+import json
+from app.services.pdf_content.section_index import SectionIndex, tokenize
+
+BILL_PAGES = [
+    (0, 'סיכום החשבון שלך בהתייחס למנויים שברשותך: 050-5148080 '
+        'סה"כ חשבון נוכחי כולל מע"מ 174.48 ₪ תקופת החשבון: 08/09/2024 - 07/10/2024'),
+    (1, 'חיובים קבועים למנוי 050-5148080 שירות תיקונים פלאפון Top 39.90 '
+        'CYBER Pelephone לגלישה בטוחה ברשת 9.90'),
+    (2, 'שיעור שימוש בחבילות 0503060366 דקות שיחה 2500:00 1025:47 41% '
+        'גלישה באינטרנט בארץ(ב-MB) 102400 1670.306 2%'),
+]
+
+
+def test_tokenize_handles_rtl_markup_and_glued_words():
+    """Markup is ignored and glued Hebrew words still share trigrams"""
+    assert tokenize('[חיוביםקבועים]{dir="rtl"}') == tokenize('חיוביםקבועים')
+    assert set(tokenize('קבועים')) <= set(tokenize('חיוביםקבועים'))
+    assert 'rtl' not in tokenize('[שלום]{dir="rtl"}')
+
+
+def test_search_ranks_matching_section_first():
+    index = SectionIndex.build(BILL_PAGES)
+
+    hits = index.search('כמה עולה שירות תיקונים?', top_k=2)
+    assert hits[0].page_number == 1
+    assert 'תיקונים' in hits[0].text
+
+    hits = index.search('כמה גלישה נשארה בחבילה', top_k=1)
+    assert hits[0].page_number == 2
+
+
+def test_serialization_roundtrip():
+    index = SectionIndex.build(BILL_PAGES)
+    restored = SectionIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+
+    query = 'סכום החשבון'
+    assert [h.text for h in restored.search(query)] == [h.text for h in index.search(query)]
+
@@ -0,0 +1,167 @@
+import asyncio
+
+from app.services.websocket.websocket_manager import WebSocketManager
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+
+
+def test_metrics_frames_are_coalesced():
+    async def run():
+        manager = WebSocketManager(max_queue=10, send_timeout=1.0)
+        socket = FakeSocket()
+        await manager.connect(socket, "c1")
+        for i in range(5):
+            await manager.broadcast_metrics("c1", {"n": i}, local=True)
+        await manager.send_alert("c1", "quota", "almost out")
+        await asyncio.sleep(0.05)
+        await manager.disconnect(socket, "c1")
+        return socket.sent
+
+    sent = asyncio.run(run())
+    assert [m["type"] for m in sent] == ["alert", "metrics_update"]
+    assert sent[1]["data"] == {"n": 4}
+
+
+def test_slow_consumer_does_not_block_others_and_is_evicted():
+    async def run():
+        manager = WebSocketManager(max_queue=10, send_timeout=0.05)
+        slow, fast = FakeSocket(delay=1.0), FakeSocket()
+        await manager.connect(slow, "slow")
+        await manager.connect(fast, "fast")
+        await manager.send_alert("slow", "a", "x")
+        await manager.send_alert("fast", "a", "x")
+        await asyncio.sleep(0.2)
+        return manager, slow, fast
+
+    manager, slow, fast = asyncio.run(run())
+    assert len(fast.sent) == 1
+    assert slow.sent == []
+    assert slow.close_code == 1013
+    assert manager.connected_customers() == ["fast"]
+
+
+def test_full_queue_evicts_consumer():
+    async def run():
+        manager = WebSocketManager(max_queue=2, send_timeout=5.0)
+        socket = FakeSocket(delay=1.0)
+        await manager.connect(socket, "c1")
+        for _ in range(4):
+            await manager.send_alert("c1", "a", "x")
+        return manager, socket
+
+    manager, socket = asyncio.run(run())
+    assert socket.close_code == 1013
+    assert manager.connected_customers() == []
+
+
+def test_reconnect_replaces_the_previous_socket():
+    async def run():
+        manager = WebSocketManager(max_queue=10, send_timeout=1.0)
+        old, new = FakeSocket(), FakeSocket()
+        await manager.connect(old, "c1")
+        await manager.connect(new, "c1")
+        await manager.send_alert("c1", "a", "x")
+        await asyncio.sleep(0.05)
+        # The old socket's route cleans up after it is closed
+        await manager.disconnect(old, "c1")
+        return manager, old, new
+
+    manager, old, new = asyncio.run(run())
+    assert old.close_code == 1000
+    assert old.sent == []
+    assert len(new.sent) == 1
+    assert manager.connected_customers() == ["c1"]
+
+
+class FailingBus:
+    async def subscribe(self, customer_id):
+        raise ConnectionError("bus down")
+
+
+def test_failed_bus_subscription_refuses_the_socket():
+    async def run():
+        manager = WebSocketManager(bus=FailingBus(), max_queue=10, send_timeout=1.0)
+        socket = FakeSocket()
+        try:
+            await manager.connect(socket, "c1")
+        except ConnectionError:
+            return manager, socket
+        raise AssertionError("connect() did not raise")
+
+    manager, socket = asyncio.run(run())
+    assert socket.close_code == 1011
+    assert manager.connected_customers() == []
+
+
+def test_idle_socket_is_closed_with_idle_timeout():
+    async def run():
+        manager = WebSocketManager(max_queue=10, send_timeout=1.0)
+        manager.heartbeat.interval = manager.heartbeat.idle_timeout = 1
+        socket = FakeSocket()
+        connection = await manager.connect(socket, "c1")
+        await manager.heartbeat.check(now=connection.last_seen + 2)
+        return manager, socket
+
+    manager, socket = asyncio.run(run())
+    assert socket.close_code == 4000
+    assert manager.connected_customers() == []
+
+
+class SlowBus:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.subscribed = []
+
+    async def subscribe(self, customer_id):
+        await asyncio.sleep(0.05)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("bus down")
+        self.subscribed.append(customer_id)
+
+
+def test_concurrent_connects_keep_one_socket():
+    async def run():
+        bus = SlowBus()
+        manager = WebSocketManager(bus=bus, max_queue=10, send_timeout=1.0)
+        first, second = FakeSocket(), FakeSocket()
+        await asyncio.gather(manager.connect(first, "c1"), manager.connect(second, "c1"))
+        return manager, bus, first, second
+
+    manager, bus, first, second = asyncio.run(run())
+    assert bus.subscribed == ["c1"]
+    assert first.close_code == 1000
+    assert list(manager.active_connections["c1"]) == [second]
+    assert manager._customer_locks == {}
+
+
+def test_concurrent_connect_subscribes_after_a_failed_one():
+    async def run():
+        bus = SlowBus(failures=1)
+        manager = WebSocketManager(bus=bus, max_queue=10, send_timeout=1.0)
+        first, second = FakeSocket(), FakeSocket()
+        results = await asyncio.gather(
+            manager.connect(first, "c1"), manager.connect(second, "c1"), return_exceptions=True
+        )
+        return manager, bus, first, results
+
+    manager, bus, first, results = asyncio.run(run())
+    assert isinstance(results[0], ConnectionError)
+    assert first.close_code == 1011
+    assert bus.subscribed == ["c1"]
+    assert list(manager.active_connections["c1"]) == [results[1].websocket]